@@ -0,0 +1,98 @@
+# benchmarks/import_budget.py
+"""
+启动时间预算检查 (导入耗时 + 不该提前加载的重依赖)
+
+用法:
+    python -m benchmarks.import_budget                  # 打印每个入口的导入耗时
+    python -m benchmarks.import_budget --fail           # 超预算或提前加载了重依赖时返回非 0 退出码
+    python -m benchmarks.import_budget --scale 2        # 慢机器上把预算放宽一倍
+
+每个入口在一个全新的子进程里用 `python -X importtime` 导入，不受当前进程已加载模块的影响
+预算按毫秒算，只是个粗略上限：主要防止有人在模块顶部又 import 了 pandas_ta / yfinance / plotly 这类慢模块
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口模块 -> (导入耗时预算 ms, 导入时不允许出现的模块)
+# 这些模块只应该在第一次真正用到时 (下载数据、算指标、画图、拉新闻) 才加载
+HEAVY = ('pandas_ta', 'yfinance', 'plotly', 'feedparser', 'textblob', 'requests')
+BUDGETS = {
+    'main': (1500, HEAVY),
+    'core.scanner': (1500, HEAVY),
+    'core.portfolio': (1500, HEAVY),
+    'core.optimizer': (1500, HEAVY),
+    'data.news_provider': (500, HEAVY),
+    # streamlit 本身就要 1 秒左右，这里只限制它之外的部分不要再叠加重依赖
+    'ui.dashboard': (4000, HEAVY),
+}
+
+
+def measure(module):
+    """
+    在子进程里导入 module
+    :return: (总耗时 ms, 导入过的顶层包名集合)，导入失败时抛 RuntimeError
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed')
+
+    total_us = 0
+    packages = set()
+    for line in proc.stderr.splitlines():
+        # 格式: "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        packages.add(name.strip().split('.')[0])
+    return total_us / 1000, packages
+
+
+def check(scale=1.0):
+    """
+    :param scale: 预算倍数 (CI 机器慢可以调大)
+    :return: 结果列表 [{'module', 'ms', 'budget_ms', 'heavy', 'error'}]
+    """
+    results = []
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        row = {'module': module, 'ms': None, 'budget_ms': budget_ms * scale, 'heavy': [], 'error': None}
+        try:
+            row['ms'], packages = measure(module)
+            row['heavy'] = sorted(packages.intersection(forbidden))
+        except RuntimeError as e:
+            row['error'] = str(e)
+        results.append(row)
+
+        if row['error']:
+            print(f"⚠️ {module:<22} 导入失败: {row['error']}")
+        else:
+            over = row['ms'] > row['budget_ms']
+            flag = "🔺 超预算" if over else "✅"
+            heavy = f"  提前加载: {', '.join(row['heavy'])}" if row['heavy'] else ""
+            print(f"⏱️ {module:<22} {row['ms']:8.1f} ms / {row['budget_ms']:.0f} ms {flag}{heavy}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="启动时间预算检查")
+    parser.add_argument('--scale', type=float, default=1.0, help="预算倍数")
+    parser.add_argument('--fail', action='store_true', help="超预算或提前加载重依赖时返回非 0 退出码")
+    args = parser.parse_args(argv)
+
+    results = check(args.scale)
+    failed = [r for r in results if r['error'] or r['heavy'] or r['ms'] > r['budget_ms']]
+    if failed and args.fail:
+        print(f"❌ {len(failed)} 个入口没通过启动预算")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
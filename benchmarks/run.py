@@ -0,0 +1,282 @@
+# benchmarks/run.py
+"""
+离线基准测试 (合成数据，不联网)
+
+用法:
+    python -m benchmarks.run                               # 跑全部，结果写到 benchmarks/results/latest.json
+    python -m benchmarks.run --quick                       # 只跑小规模 (改代码时快速看一眼)
+    python -m benchmarks.run --filter backtest             # 只跑名字里包含 backtest 的
+    python -m benchmarks.run --save-baseline               # 把这次结果存成基线
+    python -m benchmarks.run --compare benchmarks/results/baseline.json --fail-on-regression
+
+每个用例在几种数据规模下各跑 repeat 次，记录最小值和中位数 (秒)
+对比时按中位数算 新/旧 的比值，超过 threshold 记为变慢
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_ohlcv, make_universe, make_panel
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# 数据规模：单只股票按 K 线数，股票池按股票数
+BAR_SIZES = [500, 2500, 10000]
+UNIVERSE_SIZES = [50, 500]
+QUICK_BAR_SIZES = [500]
+QUICK_UNIVERSE_SIZES = [50]
+
+# name -> (规模类型 'bars' / 'symbols', 准备函数)
+# 准备函数接收规模，返回要计时的无参函数 (数据准备不计入耗时)
+BENCHMARKS = {}
+
+
+def benchmark(name, scale='bars'):
+    def decorator(func):
+        BENCHMARKS[name] = (scale, func)
+        return func
+    return decorator
+
+
+# ---------- 用例 ----------
+
+@benchmark('strategy.ma_cross.generate_signals')
+def bench_ma_cross(bars):
+    from core.strategies.ma_cross import MovingAverageCrossStrategy
+    df = make_ohlcv(bars)
+    strategy = MovingAverageCrossStrategy(50, 200)
+    return lambda: strategy.generate_signals(df)
+
+
+@benchmark('strategy.macd.generate_signals')
+def bench_macd(bars):
+    from core.strategies.macd import MacdStrategy
+    df = make_ohlcv(bars)
+    strategy = MacdStrategy(12, 26, 9)
+    return lambda: strategy.generate_signals(df)
+
+
+@benchmark('strategy.rsi.generate_signals')
+def bench_rsi(bars):
+    from core.strategies.rsi import RsiStrategy
+    df = make_ohlcv(bars)
+    strategy = RsiStrategy(14, 30, 70)
+    return lambda: strategy.generate_signals(df)
+
+
+@benchmark('strategy.supertrend.generate_signals')
+def bench_supertrend(bars):
+    from core.strategies.supertrend import SuperTrendStrategy
+    df = make_ohlcv(bars)
+    strategy = SuperTrendStrategy(10, 3.0)
+    return lambda: strategy.generate_signals(df)
+
+
+@benchmark('backtester.run_backtest')
+def bench_run_backtest(bars):
+    from core.strategies.ma_cross import MovingAverageCrossStrategy
+    from core.backtester import Backtester
+    signals = MovingAverageCrossStrategy(50, 200).generate_signals(make_ohlcv(bars))
+    backtester = Backtester(10000)
+    return lambda: backtester.run_backtest(signals)
+
+
+@benchmark('backtester.run_fast')
+def bench_run_fast(bars):
+    from core.strategies.ma_cross import MovingAverageCrossStrategy
+    from core.backtester import Backtester
+    signals = MovingAverageCrossStrategy(50, 200).generate_signals(make_ohlcv(bars))
+    backtester = Backtester(10000)
+    return lambda: backtester.run_fast(signals['Close'], signals['Signal'])
+
+
+@benchmark('patterns.detect_patterns')
+def bench_detect_patterns(bars):
+    from core.patterns import PatternRecognizer
+    df = make_ohlcv(bars)
+    return lambda: PatternRecognizer(df).detect_patterns()
+
+
+@benchmark('optimizer.optimize_ma_grid')
+def bench_optimize_ma(bars):
+    from core.optimizer import StrategyOptimizer
+    optimizer = StrategyOptimizer(make_ohlcv(bars))
+    return lambda: optimizer.optimize(range(10, 50, 5), range(100, 200, 10))
+
+
+@benchmark('optimizer.optimize_strategy_serial')
+def bench_optimize_strategy(bars):
+    from core.optimizer import StrategyOptimizer
+    from core.strategies.macd import MacdStrategy
+    optimizer = StrategyOptimizer(make_ohlcv(bars))
+    grid = {'fast': [8, 12, 16], 'slow': [20, 26, 32], 'signal': [9]}
+    # 单进程，只测计算本身 (进程池的开销和机器核数关系太大)
+    return lambda: optimizer.optimize_strategy(MacdStrategy, grid, max_workers=0)
+
+
+@benchmark('optimizer.walk_forward_ma')
+def bench_walk_forward(bars):
+    from core.optimizer import StrategyOptimizer
+    from core.strategies.ma_cross import MovingAverageCrossStrategy
+    from core import walk_forward
+    optimizer = StrategyOptimizer(make_ohlcv(bars))
+    grid = {'short_window': range(10, 50, 5), 'long_window': range(100, 200, 10)}
+
+    def run():
+        walk_forward.fold_cache.clear()  # 测的是真实计算，不是折缓存命中
+        optimizer.walk_forward(MovingAverageCrossStrategy, grid, train_size=250, test_size=60)
+    return run
+
+
+@benchmark('robustness.monte_carlo_10k')
+def bench_monte_carlo(bars):
+    from core.backtester import Backtester
+    from core.strategies.ma_cross import MovingAverageCrossStrategy
+    from core.robustness import MonteCarlo
+    result = Backtester(10000).run_backtest(MovingAverageCrossStrategy(50, 200).generate_signals(make_ohlcv(bars)))
+    mc = MonteCarlo(n_samples=10000, seed=0)
+    return lambda: mc.run(result)
+
+
+@benchmark('pattern_engine.detect_latest', scale='symbols')
+def bench_pattern_engine(n_symbols):
+    from core.pattern_engine import PatternEngine
+    frames = make_universe(n_symbols, bars=500)
+    engine = PatternEngine()
+    return lambda: engine.detect_latest(frames)
+
+
+@benchmark('portfolio.batch_backtest', scale='symbols')
+def bench_batch_backtest(n_symbols):
+    from core.backtester import BatchBacktester
+    panel = make_panel(n_symbols, bars=500)
+    close = panel.xs('Close', axis=1, level=1)
+    # 简单的动量信号：收盘价在 50 日均线上方就持有
+    signals = (close > close.rolling(50).mean()).astype(float)
+    backtester = BatchBacktester(10000)
+    return lambda: backtester.run(close, signals)
+
+
+# ---------- 计时 ----------
+
+def time_case(func, repeat):
+    """跑 repeat 次，每次之前清空指标缓存，保证测的是真实计算而不是缓存命中"""
+    from core import indicators
+    timings = []
+    for _ in range(repeat):
+        indicators.cache.clear()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(name_filter=None, repeat=5, quick=False):
+    """
+    :return: 结果列表 [{'name', 'scale', 'size', 'min_s', 'median_s', 'repeat'}]
+    """
+    sizes = {
+        'bars': QUICK_BAR_SIZES if quick else BAR_SIZES,
+        'symbols': QUICK_UNIVERSE_SIZES if quick else UNIVERSE_SIZES,
+    }
+    results = []
+    for name, (scale, setup) in BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+        for size in sizes[scale]:
+            func = setup(size)
+            func()  # 预热 (导入、JIT 之类的一次性开销不计入)
+            timings = time_case(func, repeat)
+            row = {
+                'name': name,
+                'scale': scale,
+                'size': size,
+                'min_s': min(timings),
+                'median_s': statistics.median(timings),
+                'repeat': repeat,
+            }
+            results.append(row)
+            print(f"⏱️ {name:<40} {scale}={size:<6} median {row['median_s'] * 1000:9.2f} ms")
+    return results
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    和基线对比
+    :param threshold: 中位数变慢超过这个比例 (默认 20%) 算回退
+    :return: 变慢的用例列表
+    """
+    base = {(r['name'], r['size']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n📊 对比基线 ({baseline['environment'].get('timestamp', '?')})")
+    for row in results:
+        old = base.get((row['name'], row['size']))
+        if old is None:
+            continue
+        ratio = row['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        flag = "🔺 变慢" if ratio > 1 + threshold else ("🟢 变快" if ratio < 1 - threshold else "")
+        print(f"   {row['name']:<40} {row['scale']}={row['size']:<6} x{ratio:5.2f} {flag}")
+        if ratio > 1 + threshold:
+            regressions.append({**row, 'baseline_median_s': old['median_s'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线基准测试 (合成数据)")
+    parser.add_argument('--filter', help="只跑名字里包含这个字符串的用例")
+    parser.add_argument('--repeat', type=int, default=5, help="每个规模重复次数")
+    parser.add_argument('--quick', action='store_true', help="只跑最小规模")
+    parser.add_argument('--out', default=os.path.join(RESULTS_DIR, 'latest.json'), help="结果输出路径")
+    parser.add_argument('--save-baseline', action='store_true', help="同时把结果存成 results/baseline.json")
+    parser.add_argument('--compare', help="要对比的基线 JSON 文件")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定变慢的比例")
+    parser.add_argument('--fail-on-regression', action='store_true', help="有用例变慢时返回非 0 退出码")
+    args = parser.parse_args(argv)
+
+    # 先读基线：--save-baseline 和 --compare 指向同一个文件时，不能先被这次的结果覆盖掉
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = run_benchmarks(args.filter, args.repeat, args.quick)
+    report = {'environment': environment(), 'results': results}
+
+    regressions = compare(results, baseline, args.threshold) if baseline is not None else []
+
+    outputs = [args.out]
+    if args.save_baseline:
+        outputs.append(os.path.join(RESULTS_DIR, 'baseline.json'))
+    for path in outputs:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 结果已写入 {path}")
+
+    if regressions and args.fail_on_regression:
+        print(f"❌ {len(regressions)} 个用例变慢超过 {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
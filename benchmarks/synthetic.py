@@ -0,0 +1,55 @@
+# benchmarks/synthetic.py
+"""
+离线合成行情 (几何布朗运动)，基准测试用，不依赖网络和 yfinance
+同样的 seed 永远生成同样的数据，不同机器、不同时间的结果可以直接对比
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(bars=1000, seed=0, start="2000-01-03", freq="B", s0=100.0, mu=0.08, sigma=0.25) -> pd.DataFrame:
+    """
+    生成一只股票的日线
+    :param bars: K 线数量
+    :param seed: 随机种子
+    :param mu: 年化漂移
+    :param sigma: 年化波动率
+    :return: [Open, High, Low, Close, Volume]，索引为 tz-naive 的交易日 (和 YFinanceProvider 一致)
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / 252
+
+    # 收盘价：几何布朗运动
+    log_returns = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(bars)
+    close = s0 * np.exp(np.cumsum(log_returns))
+
+    # 开盘价：在昨收附近跳空一点
+    prev_close = np.concatenate([[s0], close[:-1]])
+    open_ = prev_close * np.exp(0.2 * sigma * np.sqrt(dt) * rng.standard_normal(bars))
+
+    # 高低点：在实体外面再延伸一段影线
+    wick = sigma * np.sqrt(dt) * np.abs(rng.standard_normal((2, bars)))
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+
+    volume = rng.lognormal(mean=15, sigma=0.5, size=bars).round()
+
+    index = pd.date_range(start=start, periods=bars, freq=freq, name="Date")
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume
+    }, index=index)
+
+
+def make_universe(n_symbols=50, bars=1000, seed=0) -> dict:
+    """
+    生成一个股票池 {symbol: DataFrame}，每只股票的种子不同
+    """
+    return {
+        f"SYN{i:04d}": make_ohlcv(bars=bars, seed=seed * 100_003 + i)
+        for i in range(n_symbols)
+    }
+
+
+def make_panel(n_symbols=50, bars=1000, seed=0) -> pd.DataFrame:
+    """生成和 get_price_history_many 一样格式的面板 (列为 MultiIndex (symbol, field))"""
+    return pd.concat(make_universe(n_symbols, bars, seed), axis=1)
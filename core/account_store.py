@@ -0,0 +1,319 @@
+# core/account_store.py
+"""
+模拟账户的存储后端
+
+JsonAccountStore    : 老格式，整个账户 (含全部流水) 存成一个 JSON，每笔交易整体重写
+JournalAccountStore : 追加式流水日志 (JSONL) + 定期原子快照
+                      每笔交易只追加一行，加载时从最近的快照开始重放后面的流水
+                      多个进程共用同一个账户时，写流水前加文件锁，并先补上别的进程写的流水
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只能保证单进程内的安全
+    fcntl = None
+
+
+def atomic_write_json(path, data, indent=None):
+    """
+    先写临时文件再 os.replace，进程中途被杀也不会留下写了一半的文件
+    临时文件名每次唯一，同一进程里的多个线程同时保存也不会写到同一个临时文件
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def parse_journal(raw: bytes) -> list:
+    """JSONL 字节 -> 流水记录列表 (损坏的行跳过)"""
+    records = []
+    for line in raw.decode('utf-8').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            print(f"⚠️ 忽略损坏的流水记录: {line[:60]}")
+    return records
+
+
+class JournalHistory:
+    """
+    账户流水列表 (按时间正序)，前半段 (快照之前的流水) 第一次访问时才从流水文件读出来
+    加载账户不用解析全部历史，只有真的要看流水 (例如页面上的交易记录) 时才读
+    """
+
+    def __init__(self, journal_file, head_end):
+        """
+        :param head_end: 前半段在流水文件里的结束位置 (字节)
+        """
+        self._journal_file = journal_file
+        self._head_end = head_end
+        self._head = None if head_end else []
+        self._tail = []  # 快照之后重放的、以及之后新成交的流水
+
+    def _items(self):
+        if self._head is None:
+            with open(self._journal_file, 'rb') as f:
+                raw = f.read(self._head_end)
+            self._head = [record['trade'] for record in parse_journal(raw)]
+        return self._head + self._tail
+
+    def append(self, trade):
+        self._tail.append(trade)
+
+    def extend(self, trades):
+        self._tail.extend(trades)
+
+    def __len__(self):
+        return len(self._items())
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __reversed__(self):
+        return reversed(self._items())
+
+    def __getitem__(self, index):
+        return self._items()[index]
+
+
+class JsonAccountStore:
+    """老的单文件存储 (每次保存都把整个账户重写一遍)"""
+
+    def __init__(self, data_file='data/paper_account.json'):
+        self.data_file = data_file
+
+    def load(self):
+        """:return: 账户数据 {"cash", "positions", "history"}，文件不存在返回 None"""
+        if not os.path.exists(self.data_file):
+            return None
+        with open(self.data_file, 'r') as f:
+            data = json.load(f)
+        # 老文件里流水是最新的在最前面，内存里统一按时间正序存放
+        data['history'] = list(reversed(data.get('history', [])))
+        return data
+
+    def append(self, records, data):
+        self.save(data)
+
+    def save(self, data):
+        out = dict(data)
+        out['history'] = list(reversed(data['history']))
+        with open(self.data_file, 'w') as f:
+            json.dump(out, f, indent=4)
+
+
+class JournalAccountStore:
+    """
+    追加式流水 + 原子快照
+    - 流水文件 (JSONL): 每笔成交一行，包含成交后的现金和该股票持仓，重放时直接覆盖状态
+    - 快照文件 (JSON) : 现金、持仓、已包含的最后一条流水序号 seq 和它在流水文件里的位置，每 snapshot_every 笔更新一次
+    崩溃时最多丢掉最后一行没写完的流水 (加载时会忽略)，快照永远是完整的
+    老的 paper_account.json 只读 (第一次加载时迁移成 流水 + 快照)，不会被改写
+
+    多进程: 流水序号 seq 以文件里最后一条为准，不是进程内计数
+    写入前拿文件锁 (lock)，先把别的进程追加的流水补到内存状态 (sync)，再接着往后编号
+    """
+
+    def __init__(self, data_file='data/paper_account.json', journal_file=None, snapshot_file=None,
+                 snapshot_every=100):
+        """
+        :param data_file: 老格式的账户文件 (只在没有快照和流水时用来迁移)
+        :param journal_file: 流水文件，默认和老文件放在一起
+        :param snapshot_file: 快照文件，默认和老文件放在一起
+        :param snapshot_every: 每多少笔成交写一次快照
+        """
+        base = os.path.splitext(data_file)[0]
+        self.data_file = data_file
+        self.journal_file = journal_file or base + '.journal.jsonl'
+        self.snapshot_file = snapshot_file or base + '.snapshot.json'
+        self.lock_file = self.journal_file + '.lock'
+        self.snapshot_every = snapshot_every
+        self.seq = 0            # 已经读到 / 写到的最后一条流水的序号
+        self.snapshot_seq = 0   # 快照里包含到的序号
+        self._offset = 0        # 流水文件里已经读过的字节数 (sync 只读后面新增的部分)
+        self._lock_depth = 0
+        self._lock_fd = None
+
+    @contextmanager
+    def lock(self):
+        """跨进程的文件锁 (同一个对象里可以嵌套)"""
+        if self._lock_depth == 0 and fcntl is not None:
+            os.makedirs(os.path.dirname(self.lock_file) or '.', exist_ok=True)
+            self._lock_fd = open(self.lock_file, 'a')
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0 and self._lock_fd is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                self._lock_fd.close()
+                self._lock_fd = None
+
+    def load(self):
+        """
+        :return: 账户数据 {"cash", "positions", "history"}，什么都没有返回 None
+        启动时只读快照和快照之后的流水；更早的流水 (history 的前半段) 第一次用到时才读
+        """
+        with self.lock():
+            snapshot = self._read_json(self.snapshot_file)
+            if snapshot is None:
+                legacy = self._read_json(self.data_file)
+                if legacy is not None:
+                    return self._migrate_legacy(legacy)
+
+            self.snapshot_seq = snapshot['seq'] if snapshot else 0
+            self.seq = self.snapshot_seq
+            # 快照记着它对应流水文件的哪个位置，前面的流水都已经包含在快照里
+            head_end = snapshot.get('offset', 0) if snapshot else 0
+            tail = self._read_journal(head_end)
+            if snapshot is None and not tail:
+                return None
+
+            data = {
+                'cash': snapshot['cash'] if snapshot else 0.0,
+                'positions': snapshot['positions'] if snapshot else {},
+                'history': JournalHistory(self.journal_file, head_end),
+            }
+            for record in tail:
+                data['history'].append(record['trade'])
+                if record['seq'] <= self.snapshot_seq:
+                    continue  # 已经包含在快照里
+                # 重放：直接用流水里记录的成交后状态覆盖
+                self._apply(data, record)
+                self.seq = record['seq']
+
+            return data
+
+    def sync(self, data) -> int:
+        """
+        把别的进程追加的流水补到 data 里 (应该在 lock 里调用)
+        :return: 补了多少条
+        """
+        records = self._read_new()
+        for record in records:
+            data['history'].append(record['trade'])
+            if record['seq'] > self.seq:
+                self._apply(data, record)
+                self.seq = record['seq']
+        return len(records)
+
+    def append(self, records, data):
+        """
+        追加成交记录 (一次可以多条，一起写入、一起 fsync)
+        :param records: [{'trade': 流水, 'cash': 成交后现金, 'symbol': 股票, 'position': 成交后持仓或 None}]
+        :param data: 追加后的完整账户状态 (用来写快照)
+        """
+        with self.lock():
+            # 序号接在文件里最后一条后面；调用方没先 sync 的话，内存状态不完整，这次不写快照
+            foreign = self._read_new()
+            if foreign:
+                self.seq = max(self.seq, foreign[-1]['seq'])
+
+            lines = []
+            for record in records:
+                self.seq += 1
+                lines.append(json.dumps({'seq': self.seq, **record}, ensure_ascii=False))
+
+            with open(self.journal_file, 'a') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+
+            if not foreign and self.seq - self.snapshot_seq >= self.snapshot_every:
+                self.save(data)
+
+    def save(self, data):
+        """写一次快照 (不含流水，流水在 journal 里)"""
+        with self.lock():
+            atomic_write_json(self.snapshot_file, {
+                'cash': data['cash'],
+                'positions': data['positions'],
+                'seq': self.seq,
+                'offset': self._offset,
+            }, indent=4)
+            self.snapshot_seq = self.seq
+
+    @staticmethod
+    def _apply(data, record):
+        data['cash'] = record['cash']
+        if record['position'] is None:
+            data['positions'].pop(record['symbol'], None)
+        else:
+            data['positions'][record['symbol']] = record['position']
+
+    @staticmethod
+    def _read_json(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _read_journal(self, start=0):
+        """读 start 字节之后的全部流水，读完后 _offset 指向文件末尾"""
+        if not os.path.exists(self.journal_file):
+            self._offset = 0
+            return []
+        with open(self.journal_file, 'rb') as f:
+            f.seek(start)
+            raw = f.read()
+
+        # 崩溃时最后一行可能没写完 (没有换行符)，截掉它，否则下一次追加会接在这半行后面
+        if raw and not raw.endswith(b"\n"):
+            keep = raw.rfind(b"\n") + 1
+            print(f"⚠️ 丢弃未写完的流水记录: {raw[keep:keep + 60]!r}")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(start + keep)
+            raw = raw[:keep]
+
+        self._offset = start + len(raw)
+        return parse_journal(raw)
+
+    def _read_new(self):
+        """读上次读到的位置之后新增的完整流水 (别的进程写的)"""
+        if not os.path.exists(self.journal_file):
+            return []
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._offset)
+            raw = f.read()
+        raw = raw[:raw.rfind(b"\n") + 1]  # 只要完整的行
+        self._offset += len(raw)
+        return parse_journal(raw)
+
+    def _migrate_legacy(self, legacy):
+        """把老格式 (流水存在 JSON 里、最新的在最前) 迁移成 流水文件 + 快照，老文件保持不动"""
+        history = list(reversed(legacy.get('history', [])))
+        data = {'cash': legacy['cash'], 'positions': legacy['positions'], 'history': history}
+
+        # 老流水里没有成交后的状态，迁移时只保留流水本身，状态以老文件里的为准
+        self.seq = 0
+        if history and not os.path.exists(self.journal_file):
+            with open(self.journal_file, 'w') as f:
+                for trade in history:
+                    self.seq += 1
+                    f.write(json.dumps({'seq': self.seq, 'trade': trade, 'migrated': True}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+        else:
+            # 上次迁移写完流水、没来得及写快照
+            self.seq = max((r['seq'] for r in self._read_journal()), default=0)
+        self.save(data)
+        return data
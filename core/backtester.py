@@ -1,59 +1,228 @@
 # core/backtester.py
 import pandas as pd
 import numpy as np
+from core import instrumentation as inst
+
+
+def to_percent(value: float) -> float:
+    """0.12345 -> 12.35 (保留两位小数，和格式化成 "12.35%" 的结果一致)"""
+    return float(f"{value:.2%}".strip('%'))
+
+
+def evaluate_signal_matrix(close, signals, initial_capital=10000) -> dict:
+    """
+    纯 NumPy 回测内核，一次可以回测很多条信号
+    :param close: 收盘价 (长度 n)
+    :param signals: (n × k) 的持仓矩阵 (1 持有, 0 空仓)，每一列是一条独立的信号
+    :return: {'total_return', 'max_drawdown', 'win_rate', 'final_value'}，每个都是长度 k 的数组
+    """
+    close = np.asarray(close, dtype=float)
+    signals = np.asarray(signals, dtype=float)
+
+    # 今天的收益 = 今天的涨跌 * 昨天收盘时的持仓 (和 run_backtest 的 shift(1) 一致)
+    market_return = close[1:] / close[:-1] - 1
+    strategy_returns = market_return[:, None] * signals[:-1]
+    has_return = ~np.isnan(strategy_returns)
+
+    # 缺失收盘价的日子收益为 NaN：当作 0 收益参与累乘，再盖回 NaN (和 pandas cumprod 跳过 NaN 一致)
+    growth = np.cumprod(1 + np.where(has_return, strategy_returns, 0.0), axis=0)
+    equity = np.where(has_return, initial_capital * growth, np.nan)
+
+    peak = np.fmax.accumulate(equity, axis=0)
+    with np.errstate(invalid='ignore'):
+        drawdown = (equity - peak) / peak
+
+    # run_backtest 里第一天的收益是 NaN，NaN != 0 会被算进交易日，这里补上这 1 天保持一致
+    winning_days = np.count_nonzero(strategy_returns > 0, axis=0)
+    total_days = np.count_nonzero(strategy_returns != 0, axis=0) + 1
+
+    return {
+        'total_return': equity[-1] / initial_capital - 1,
+        'max_drawdown': np.fmin.reduce(drawdown, axis=0),
+        'win_rate': winning_days / total_days,
+        'final_value': equity[-1],
+    }
+
 
 class Backtester:
     def __init__(self, initial_capital=10000):
         self.initial_capital = initial_capital
 
-    def run_backtest(self, df: pd.DataFrame) -> dict:
+    @inst.timed('backtester.run_backtest')
+    def run_backtest(self, df: pd.DataFrame, include_data=True) -> dict:
         """
         运行回测
         :param df: 必须包含 'Close' 和 'Signal' 列
+        :param include_data: 是否需要逐日明细 (画图用)。不需要时走 run_fast，不复制 DataFrame
         :return: 包含回测结果和性能指标的字典
         """
+        if not include_data:
+            values = self.run_fast(df['Close'], df['Signal'])
+            return {
+                'data': None,
+                'metrics': self.format_metrics(values),
+                'values': values
+            }
+
         # 1. 准备数据
         data = df.copy()
-        
+
         # 计算股票的每日涨跌幅 (Pct Change)
         data['Market_Return'] = data['Close'].pct_change()
-        
+
         # 2. 计算策略收益
         # 核心逻辑：今天的策略收益 = 今天的股票涨跌 * 昨天收盘时的持仓状态
         # shift(1) 非常重要！防止“未来函数”作弊
         data['Strategy_Return'] = data['Market_Return'] * data['Signal'].shift(1)
-        
+
         # 3. 计算资金曲线 (累计收益)
         # cumprod() 是累乘，计算复利
         data['Equity_Curve'] = self.initial_capital * (1 + data['Strategy_Return']).cumprod()
-        
+
         # 4. 计算最大回撤 (Max Drawdown) - 评估风险的关键
         # rolling_max: 截止到当天的历史最高净值
         data['Peak'] = data['Equity_Curve'].cummax()
         # drawdown: 当前净值相对于历史最高点的跌幅
         data['Drawdown'] = (data['Equity_Curve'] - data['Peak']) / data['Peak']
-        
+
         # 5. 汇总性能指标
-        metrics = self._calculate_metrics(data)
-        
+        values = self._calculate_values(data)
+
         return {
             'data': data,       # 详细的每日数据 (用于画图)
-            'metrics': metrics  # 汇总的指标 (用于报告)
+            'metrics': self.format_metrics(values),  # 汇总的指标 (用于报告)
+            'values': values    # 数字版指标 (用于排序、比较)
         }
 
-    def _calculate_metrics(self, data: pd.DataFrame) -> dict:
-        """计算核心评价指标"""
+    @inst.timed('backtester.run_fast')
+    def run_fast(self, close, signal) -> dict:
+        """
+        快速回测：直接在 NumPy 数组上算，不复制 DataFrame、不生成中间列
+        优化器、组合回测这种只要指标不要明细的场景用它
+        :param close: 收盘价 (Series 或数组)
+        :param signal: 持仓信号 (Series 或数组)
+        :return: 数字版指标 {'total_return', 'max_drawdown', 'win_rate', 'final_value'} (小数，不是百分比)
+        """
+        close = np.asarray(close, dtype=float)
+        signal = np.asarray(signal, dtype=float)
+        if len(close) < 2:
+            return {'total_return': 0.0, 'max_drawdown': 0.0, 'win_rate': 0.0,
+                    'final_value': float(self.initial_capital)}
+
+        result = evaluate_signal_matrix(close, signal[:, None], self.initial_capital)
+        return {key: float(value[0]) for key, value in result.items()}
+
+    def _calculate_values(self, data: pd.DataFrame) -> dict:
+        """计算核心评价指标 (数字版)"""
         total_return = (data['Equity_Curve'].iloc[-1] / self.initial_capital) - 1
         max_drawdown = data['Drawdown'].min() # 这是一个负数
-        
+
         # 计算胜率 (基于日收益)
         winning_days = len(data[data['Strategy_Return'] > 0])
         total_days = len(data[data['Strategy_Return'] != 0])
         win_rate = winning_days / total_days if total_days > 0 else 0
-        
+
+        return {
+            'total_return': total_return,
+            'max_drawdown': max_drawdown,
+            'win_rate': win_rate,
+            'final_value': data['Equity_Curve'].iloc[-1]
+        }
+
+    @staticmethod
+    def format_metrics(values: dict) -> dict:
+        """数字版指标 -> 报告用的字符串"""
         return {
-            'Total Return': f"{total_return:.2%}",
-            'Max Drawdown': f"{max_drawdown:.2%}",
-            'Win Rate (Daily)': f"{win_rate:.2%}",
-            'Final Value': f"${data['Equity_Curve'].iloc[-1]:,.2f}"
-        }
\ No newline at end of file
+            'Total Return': f"{values['total_return']:.2%}",
+            'Max Drawdown': f"{values['max_drawdown']:.2%}",
+            'Win Rate (Daily)': f"{values['win_rate']:.2%}",
+            'Final Value': f"${values['final_value']:,.2f}"
+        }
+
+
+class BatchBacktester:
+    """
+    横截面批量回测：一次算完整个股票池
+    输入 (日期 × 股票) 的价格矩阵和信号矩阵，所有资金曲线、回撤、指标都用二维 NumPy 运算一次完成
+    每只股票的口径和单独跑 Backtester.run_backtest 一致 (上市前的日期不参与计算)
+    """
+
+    def __init__(self, initial_capital=10000):
+        """
+        :param initial_capital: 每只股票分配的资金
+        """
+        self.initial_capital = initial_capital
+
+    @inst.timed('backtester.batch_run')
+    def run(self, close: pd.DataFrame, signals: pd.DataFrame) -> dict:
+        """
+        :param close: 收盘价矩阵，行是日期，列是股票 (某只股票没有数据的日期为 NaN)
+        :param signals: 持仓信号矩阵，和 close 同样的行列 (缺失视为空仓)
+        :return: {
+            'equity': 每只股票的资金曲线 (DataFrame),
+            'drawdown': 每只股票的回撤 (DataFrame),
+            'values': 每只股票的数字版指标 (DataFrame，行是股票),
+            'total_equity': 组合总资产曲线 (Series)
+        }
+        """
+        signals = signals.reindex(index=close.index, columns=close.columns)
+
+        listed = close.notna().cumsum().to_numpy() > 0  # 上市 (有第一根 K 线) 之后为 True
+        # 停牌的日子沿用最后一个收盘价，收益为 0
+        prices = close.ffill().to_numpy(dtype=float)
+        # 停牌日没有信号，沿用前一天的持仓
+        held = signals.ffill().fillna(0).to_numpy(dtype=float)
+
+        # 1. 每日收益 (上市第一天和之前为 NaN，和 pct_change 一致)
+        market_return = np.full_like(prices, np.nan)
+        market_return[1:] = prices[1:] / prices[:-1] - 1
+
+        # 2. 策略收益 = 今天涨跌 * 昨天持仓
+        strategy_return = np.full_like(prices, np.nan)
+        strategy_return[1:] = market_return[1:] * held[:-1]
+        has_return = ~np.isnan(strategy_return)
+
+        # 3. 资金曲线 (NaN 当作 0 收益参与累乘，再把没有收益的日期盖回 NaN)
+        growth = np.cumprod(1 + np.where(has_return, strategy_return, 0.0), axis=0)
+        equity = np.where(has_return, self.initial_capital * growth, np.nan)
+
+        # 4. 回撤
+        peak = np.fmax.accumulate(equity, axis=0)
+        with np.errstate(invalid='ignore'):
+            drawdown = (equity - peak) / peak
+
+        # 5. 指标 (上市第一天的 NaN 收益算作一个交易日，和单只回测的口径一致)
+        last_equity = self._last_valid(equity)
+        winning_days = np.count_nonzero(has_return & (strategy_return > 0), axis=0)
+        total_days = np.count_nonzero(listed & ((strategy_return != 0) | ~has_return), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            win_rate = np.where(total_days > 0, winning_days / np.maximum(total_days, 1), 0.0)
+            max_drawdown = np.where(np.isnan(drawdown), np.inf, drawdown).min(axis=0)
+        max_drawdown = np.where(np.isinf(max_drawdown), np.nan, max_drawdown)
+
+        values = pd.DataFrame({
+            'total_return': last_equity / self.initial_capital - 1,
+            'max_drawdown': max_drawdown,
+            'win_rate': win_rate,
+            'final_value': last_equity,
+        }, index=close.columns)
+
+        # 6. 组合总资产：按日期相加，某只股票当天没有数据就不计入 (全部没有数据为 NaN)
+        any_equity = has_return.any(axis=1)
+        total = np.where(any_equity, np.nansum(equity, axis=1), np.nan)
+
+        return {
+            'equity': pd.DataFrame(equity, index=close.index, columns=close.columns),
+            'drawdown': pd.DataFrame(drawdown, index=close.index, columns=close.columns),
+            'values': values,
+            'total_equity': pd.Series(total, index=close.index, name='Equity_Curve'),
+        }
+
+    @staticmethod
+    def _last_valid(matrix: np.ndarray) -> np.ndarray:
+        """每一列最后一个非 NaN 的值"""
+        valid = ~np.isnan(matrix)
+        # 从下往上找第一个有效值的位置
+        last_idx = matrix.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        result = matrix[last_idx, np.arange(matrix.shape[1])]
+        return np.where(valid.any(axis=0), result, np.nan)
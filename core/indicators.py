@@ -0,0 +1,130 @@
+# core/indicators.py
+"""
+共享的指标计算层 (带缓存)
+所有策略都通过这里调用 pandas_ta，同一份数据 + 同一个指标 + 同样的参数只算一次
+缓存键 = (数据指纹, 指标名, 参数)，按 LRU 淘汰，并限制总内存占用
+pandas_ta 导入很慢，第一次真正计算指标时才导入 (缓存命中时不会导入)
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def fingerprint(*objs) -> str:
+    """
+    计算数据指纹 (Series / DataFrame 的数值 + 索引)
+    只要数据一样，不管是不是同一个对象，指纹都一样
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        h.update(np.ascontiguousarray(obj.to_numpy(dtype=float)).tobytes())
+        index = obj.index
+        if isinstance(index, pd.DatetimeIndex):
+            # 带上 dtype (精度 + 时区)：同样的 int64 在 'ns' 和 'us' 下是完全不同的日期
+            h.update(str(index.dtype).encode())
+            h.update(index.asi8.tobytes())
+        else:
+            h.update(str(list(index)).encode())
+        h.update(str(len(obj)).encode())
+    return h.hexdigest()
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(np.asarray(value.memory_usage(index=True)).sum())
+    return 0
+
+
+class IndicatorCache:
+    """线程安全的 LRU 缓存，按条目数和内存总量双重限制"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_entries=4096):
+        """
+        :param max_bytes: 缓存的指标结果最多占用多少内存 (默认 256MB)
+        :param max_entries: 最多缓存多少条
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+
+        # 计算放在锁外面，避免一个慢指标卡住其他线程
+        value = compute()
+        size = _nbytes(value)
+
+        with self._lock:
+            if size > self.max_bytes:
+                return value  # 单条就超过上限，不缓存
+            if key not in self._items:
+                self._items[key] = (value, size)
+                self._bytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        while self._items and (self._bytes > self.max_bytes or len(self._items) > self.max_entries):
+            _, (_, size) = self._items.popitem(last=False)
+            self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._items),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# 进程内共享的默认缓存 (优化器、扫描器、界面都用这一个)
+cache = IndicatorCache()
+
+
+def _ta():
+    """延迟导入 pandas_ta (只在缓存没命中、真的要计算时调用)"""
+    import pandas_ta
+    return pandas_ta
+
+
+def sma(close: pd.Series, length: int) -> pd.Series:
+    key = (fingerprint(close), 'sma', length)
+    return cache.get_or_compute(key, lambda: _ta().sma(close, length=length))
+
+
+def macd(close: pd.Series, fast: int, slow: int, signal: int) -> pd.DataFrame:
+    """返回三列: MACD, Histogram, Signal (和 ta.macd 一致)"""
+    key = (fingerprint(close), 'macd', fast, slow, signal)
+    return cache.get_or_compute(key, lambda: _ta().macd(close, fast=fast, slow=slow, signal=signal))
+
+
+def rsi(close: pd.Series, length: int) -> pd.Series:
+    key = (fingerprint(close), 'rsi', length)
+    return cache.get_or_compute(key, lambda: _ta().rsi(close, length=length))
+
+
+def supertrend(high: pd.Series, low: pd.Series, close: pd.Series, length: int, multiplier: float) -> pd.DataFrame:
+    """返回的第 0 列是趋势线，第 1 列是方向 (和 ta.supertrend 一致)"""
+    key = (fingerprint(high, low, close), 'supertrend', length, float(multiplier))
+    return cache.get_or_compute(
+        key, lambda: _ta().supertrend(high, low, close, length=length, multiplier=multiplier)
+    )
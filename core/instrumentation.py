@@ -0,0 +1,232 @@
+# core/instrumentation.py
+"""
+轻量级耗时统计 (span) 和计数器 (counter)
+
+用法:
+    from core import instrumentation as inst
+
+    with inst.span('scanner.fetch', symbols=len(symbols)):
+        ...
+    inst.count('provider.cache_hit', 3)
+
+默认关闭，关闭时 span() 直接返回一个什么都不做的共享对象，几乎没有开销
+打开方式: 环境变量 SIS_INSTRUMENTATION=1，或者代码里调用 enable()
+导出: snapshot() (字典) / to_prometheus() (Prometheus 文本格式) / to_log_records() (结构化日志)
+
+注意：进程池 worker 里记录的数据留在 worker 进程里，这里只统计当前进程
+     需要统计的阶段由 worker 把耗时随结果带回来，主进程用 record() 记进来
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+_enabled = os.environ.get('SIS_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def disable():
+    enable(False)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    """进程内的统计数据 (线程安全)"""
+
+    def __init__(self, max_events=1000):
+        """
+        :param max_events: 最多保留多少条最近的 span 明细 (结构化日志用)
+        """
+        self._lock = threading.Lock()
+        self.spans = {}     # (name, labels) -> {'count', 'total', 'min', 'max', 'errors'}
+        self.counters = {}  # (name, labels) -> value
+        self.events = deque(maxlen=max_events)
+
+    def record_span(self, name, labels, duration, error=False):
+        key = (name, _label_key(labels))
+        with self._lock:
+            stat = self.spans.get(key)
+            if stat is None:
+                stat = self.spans[key] = {'count': 0, 'total': 0.0, 'min': duration, 'max': duration, 'errors': 0}
+            stat['count'] += 1
+            stat['total'] += duration
+            stat['min'] = min(stat['min'], duration)
+            stat['max'] = max(stat['max'], duration)
+            if error:
+                stat['errors'] += 1
+            self.events.append({
+                'ts': time.time(), 'type': 'span', 'name': name,
+                'labels': dict(key[1]), 'duration_s': duration, 'error': error
+            })
+
+    def add(self, name, labels, value):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.events.clear()
+
+
+registry = Registry()
+
+
+class _Span:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        registry.record_span(self.name, self.labels, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **labels):
+    """
+    统计一段代码的耗时
+    :param name: 阶段名，用 "模块.阶段" 命名 (例如 'scanner.fetch')
+    :param labels: 附加标签 (例如 strategy='MacdStrategy')，相同 name + labels 的耗时合并统计
+    """
+    if not _enabled:
+        return _NOOP
+    return _Span(name, labels)
+
+
+def timed(name):
+    """装饰器版的 span：统计整个函数的耗时 (关闭时只多一次布尔判断)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, duration, error=False, **labels):
+    """记一段在别处量好的耗时 (例如进程池 worker 里算的，和 span 合并统计)"""
+    if _enabled:
+        registry.record_span(name, labels, duration, error)
+
+
+def count(name, value=1, **labels):
+    """累加计数器 (例如缓存命中次数、下载的股票数)"""
+    if _enabled:
+        registry.add(name, labels, value)
+
+
+def snapshot() -> dict:
+    """
+    :return: {'spans': [{'name', 'labels', 'count', 'total_s', 'mean_s', 'min_s', 'max_s', 'errors'}],
+              'counters': [{'name', 'labels', 'value'}]}
+    """
+    with registry._lock:
+        spans = [
+            {
+                'name': name, 'labels': dict(labels), 'count': s['count'],
+                'total_s': s['total'], 'mean_s': s['total'] / s['count'],
+                'min_s': s['min'], 'max_s': s['max'], 'errors': s['errors']
+            }
+            for (name, labels), s in registry.spans.items()
+        ]
+        counters = [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in registry.counters.items()
+        ]
+    spans.sort(key=lambda s: s['total_s'], reverse=True)
+    return {'spans': spans, 'counters': counters}
+
+
+def reset():
+    registry.reset()
+
+
+def _prom_name(name):
+    return 'sis_' + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def _prom_labels(labels: dict):
+    if not labels:
+        return ''
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    body = ",".join(f'{k}="{escape(v)}"' for k, v in sorted(labels.items()))
+    return "{" + body + "}"
+
+
+def to_prometheus() -> str:
+    """
+    导出成 Prometheus 文本格式
+    span -> <name>_seconds (summary 的 _count/_sum) + <name>_seconds_max (gauge)
+    计数器 -> <name>_total (counter)
+    """
+    snap = snapshot()
+    by_metric = {}
+    for s in snap['spans']:
+        by_metric.setdefault(_prom_name(s['name']) + '_seconds', []).append(s)
+
+    lines = []
+    for metric, rows in by_metric.items():
+        lines.append(f"# TYPE {metric} summary")
+        for s in rows:
+            lines.append(f"{metric}_count{_prom_labels(s['labels'])} {s['count']}")
+            lines.append(f"{metric}_sum{_prom_labels(s['labels'])} {s['total_s']:.6f}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        for s in rows:
+            lines.append(f"{metric}_max{_prom_labels(s['labels'])} {s['max_s']:.6f}")
+
+    seen = set()
+    for c in snap['counters']:
+        metric = _prom_name(c['name']) + '_total'
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_prom_labels(c['labels'])} {c['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def to_log_records() -> list:
+    """最近的 span 明细 (每条一个 dict，按时间顺序)"""
+    with registry._lock:
+        return list(registry.events)
+
+
+def to_json_lines() -> str:
+    """结构化日志 (JSON Lines)"""
+    return "\n".join(json.dumps(r, ensure_ascii=False) for r in to_log_records())
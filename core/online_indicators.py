@@ -0,0 +1,178 @@
+# core/online_indicators.py
+"""
+增量 (在线) 指标：每来一根新 K 线只做 O(1) 的更新，不用重算整段历史
+计算口径和 pandas_ta 保持一致，用 BaseStrategy.replay() 可以和批量版 generate_signals 对比
+"""
+import math
+from collections import deque
+
+NAN = float('nan')
+
+
+class RollingSMA:
+    """简单移动平均 (和 ta.sma / rolling().mean() 一致，前 length-1 根为 NaN)"""
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.length:
+            self.total -= self.window.popleft()
+        if len(self.window) == self.length:
+            self.value = self.total / self.length
+        return self.value
+
+
+class OnlineEMA:
+    """
+    指数移动平均 (和 ta.ema 一致)
+    前 length 根取简单平均作为种子，之后 ema = α * x + (1 - α) * ema, α = 2 / (length + 1)
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.seed = []
+        self.value = NAN
+
+    def update(self, x):
+        if self.seed is not None:
+            self.seed.append(x)
+            if len(self.seed) == self.length:
+                self.value = sum(self.seed) / self.length
+                self.seed = None
+            return self.value
+        self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class WilderRMA:
+    """
+    Wilder 平滑 (和 pandas_ta 的 rma 一致: ewm(alpha=1/length, adjust=True, min_periods=length))
+    adjust=True 的加权平均可以拆成分子分母两个递推量，依然是 O(1)
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.count = 0
+        self.value = NAN
+
+    def update(self, x):
+        if math.isnan(x):
+            # 开头的 NaN (比如 diff 的第一根) 直接跳过
+            return self.value
+        self.numerator = x + self.decay * self.numerator
+        self.denominator = 1.0 + self.decay * self.denominator
+        self.count += 1
+        if self.count >= self.length:
+            self.value = self.numerator / self.denominator
+        return self.value
+
+
+class OnlineMACD:
+    """MACD 线 = EMA(fast) - EMA(slow)，信号线 = MACD 有效值开始后的 EMA(signal)"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast_ema = OnlineEMA(fast)
+        self.slow_ema = OnlineEMA(slow)
+        self.signal_ema = OnlineEMA(signal)
+        self.macd = NAN
+        self.signal = NAN
+
+    def update(self, close):
+        fast = self.fast_ema.update(close)
+        slow = self.slow_ema.update(close)
+        self.macd = fast - slow
+        if not math.isnan(self.macd):
+            self.signal = self.signal_ema.update(self.macd)
+        return self.macd, self.signal
+
+
+class OnlineRSI:
+    """Wilder RSI (和 ta.rsi 一致)"""
+
+    def __init__(self, length=14):
+        self.gain = WilderRMA(length)
+        self.loss = WilderRMA(length)
+        self.prev_close = None
+        self.value = NAN
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+        change = close - self.prev_close
+        self.prev_close = close
+        avg_gain = self.gain.update(max(change, 0.0))
+        avg_loss = self.loss.update(min(change, 0.0))
+        denominator = avg_gain + abs(avg_loss)
+        # 完全没有波动时 0/0，pandas 里得到 NaN，这里保持一致
+        self.value = 100.0 * avg_gain / denominator if denominator != 0 else NAN
+        return self.value
+
+
+class OnlineATR:
+    """平均真实波幅 (和 ta.atr 默认的 rma 口径一致)"""
+
+    def __init__(self, length=14):
+        self.rma = WilderRMA(length)
+        self.prev_close = None
+        self.value = NAN
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            # 第一根没有昨收，真实波幅为 NaN
+            true_range = NAN
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(self.prev_close - low))
+        self.prev_close = close
+        self.value = self.rma.update(true_range)
+        return self.value
+
+
+class OnlineSuperTrend:
+    """
+    SuperTrend (和 ta.supertrend 的逐根循环完全一样，只是把循环拆成每根调用一次)
+    状态只需要上一根的上下轨和方向
+    """
+
+    def __init__(self, length=10, multiplier=3.0):
+        self.atr = OnlineATR(length)
+        self.multiplier = multiplier
+        self.prev_upper = NAN
+        self.prev_lower = NAN
+        self.direction = 1
+        self.started = False
+        self.value = NAN
+
+    def update(self, high, low, close):
+        atr = self.atr.update(high, low, close)
+        hl2 = (high + low) / 2
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+
+        if self.started:
+            if close > self.prev_upper:
+                self.direction = 1
+            elif close < self.prev_lower:
+                self.direction = -1
+            else:
+                # 趋势延续时轨道只能往有利方向收紧
+                if self.direction > 0 and lower < self.prev_lower:
+                    lower = self.prev_lower
+                if self.direction < 0 and upper > self.prev_upper:
+                    upper = self.prev_upper
+            self.value = lower if self.direction > 0 else upper
+        self.started = True
+
+        self.prev_upper = upper
+        self.prev_lower = lower
+        return self.value, self.direction
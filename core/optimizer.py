@@ -1,54 +1,278 @@
 # core/optimizer.py
-import pandas as pd
+import os
 import itertools
-from core.strategies.ma_cross import MovingAverageCrossStrategy
-from core.backtester import Backtester
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from core.grid_search import ma_cross_grid
+from core.backtester import Backtester, to_percent
+from core.shared_frame import SharedFrame
+from core import walk_forward as wf
+from core import search as adaptive_search
+from core.result_store import data_key, params_key
+from core import instrumentation as inst
+
+# worker 进程里的全局状态 (由 _init_worker 在进程启动时设置一次)
+_worker_state = {}
+
+
+def _init_worker(spec, strategy_class, initial_capital):
+    """进程池 initializer：映射共享内存里的价格数据，每个进程只做一次"""
+    df, handles = SharedFrame.attach(spec)
+    _worker_state['df'] = df
+    _worker_state['handles'] = handles  # 持有句柄，防止共享内存被提前回收
+    _worker_state['strategy_class'] = strategy_class
+    _worker_state['initial_capital'] = initial_capital
+    # worker 退出时先丢掉 DataFrame 再关闭映射，不留下没关闭的共享内存句柄
+    Finalize(None, _release_worker, exitpriority=10)
+
+
+def _release_worker():
+    handles = _worker_state.get('handles', [])
+    _worker_state.clear()
+    SharedFrame.detach(handles)
+
+
+def _evaluate_params(df, strategy_class, params, initial_capital):
+    """用一组参数跑一次策略 + 回测，返回数字化的指标"""
+    strategy = strategy_class(**params)
+    signals = strategy.generate_signals(df)
+    # 只要指标，走 NumPy 快速通道，不生成逐日明细
+    values = Backtester(initial_capital).run_fast(signals['Close'], signals['Signal'])
+
+    return {
+        **params,
+        'Return (%)': to_percent(values['total_return']),
+        'Drawdown (%)': to_percent(values['max_drawdown']),
+        'Win Rate': f"{values['win_rate']:.2%}"
+    }
+
+
+def _run_chunk(param_chunk):
+    """worker 端：跑一批参数组合 (数据从共享内存里读，任务本身只传参数)"""
+    state = _worker_state
+    return [
+        _evaluate_params(state['df'], state['strategy_class'], params, state['initial_capital'])
+        for params in param_chunk
+    ]
+
+
+def expand_grid(strategy_class, param_grid: dict) -> list:
+    """
+    把参数范围展开成参数组合列表，并跳过无效组合 (strategy_class.valid_params)
+    :param param_grid: {'period': range(5, 30), 'multiplier': [2.0, 2.5, 3.0]}
+    """
+    names = list(param_grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    return [params for params in combos if strategy_class.valid_params(**params)]
+
 
 class StrategyOptimizer:
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, initial_capital=10000, store=None, label=None, checkpoint_size=64):
+        """
+        :param store: OptimizerResultStore，传了就把结果存盘：算过的组合直接跳过，中断后重跑会接着算
+        :param label: 扫参记录的名字 (例如 "AAPL 5y")，方便之后查历史结果
+        :param checkpoint_size: 在当前进程里跑时，每算完这么多组就写一次盘
+        """
         self.df = df
-        
+        self.initial_capital = initial_capital
+        self.store = store
+        self.label = label
+        self.checkpoint_size = checkpoint_size
+        self._data_keys = {}  # K线数 -> 数据指纹 (逐轮淘汰只用末尾一段历史，每种长度只算一次指纹)
+
+    @inst.timed('optimizer.optimize_ma_grid')
     def optimize(self, short_range: range, long_range: range) -> pd.DataFrame:
         """
-        暴力搜索最优参数组合
+        暴力搜索最优参数组合 (向量化引擎：所有均线只算一次，整批参数一起回测)
         :param short_range: 短期均线尝试范围 (例如 range(10, 50, 5))
         :param long_range: 长期均线尝试范围 (例如 range(100, 200, 10))
         """
-        results = []
-        
-        # 生成所有组合
-        combinations = list(itertools.product(short_range, long_range))
-        print(f"🧪 正在测试 {len(combinations)} 种参数组合...")
-        
-        for short_win, long_win in combinations:
-            # 必须保证 短期 < 长期，否则没意义
-            if short_win >= long_win:
-                continue
-                
-            # 1. 运行策略
-            strategy = MovingAverageCrossStrategy(short_win, long_win)
-            signals = strategy.generate_signals(self.df)
-            
-            # 2. 运行回测
-            backtester = Backtester() # 默认 10000 起始资金
-            res = backtester.run_backtest(signals)
-            metrics = res['metrics']
-            
-            # 3. 记录结果 (我们需要数字类型来排序，所以要把百分号去掉)
-            total_return = float(metrics['Total Return'].strip('%'))
-            max_drawdown = float(metrics['Max Drawdown'].strip('%'))
-            
-            results.append({
-                'Short': short_win,
-                'Long': long_win,
-                'Return (%)': total_return,
-                'Drawdown (%)': max_drawdown,
-                'Win Rate': metrics['Win Rate (Daily)']
-            })
-            
-        # 转为 DataFrame 并按收益率排序
-        results_df = pd.DataFrame(results)
+        # 组合总数 (短期 >= 长期的组合会在引擎里跳过)
+        total = len(short_range) * len(long_range)
+        print(f"🧪 正在测试 {total} 种参数组合...")
+
+        # 结果和逐个跑 MovingAverageCrossStrategy + Backtester 完全一致
+        if self.store is None:
+            results_df = ma_cross_grid(self.df['Close'], short_range, long_range, self.initial_capital)
+        else:
+            results_df = self._optimize_ma_stored(short_range, long_range)
+
+        # 按收益率排序
         if not results_df.empty:
             results_df = results_df.sort_values(by='Return (%)', ascending=False)
-            
-        return results_df
\ No newline at end of file
+
+        return results_df
+
+    @inst.timed('optimizer.optimize_strategy')
+    def optimize_strategy(self, strategy_class, param_grid: dict, max_workers=None, chunk_size=None) -> pd.DataFrame:
+        """
+        任意策略的参数网格搜索，用进程池并行跑
+        价格数据通过共享内存交给 worker，只拷贝一次，每个任务只传参数
+        :param strategy_class: BaseStrategy 的子类 (例如 SuperTrendStrategy)
+        :param param_grid: 参数名 -> 取值范围，参数名和策略构造函数一致
+        :param max_workers: 进程数 (默认 CPU 核数，0 表示在当前进程里跑)
+        :param chunk_size: 每个任务包含的参数组合数量 (默认自动按进程数均分)
+        :return: 结果表，列为各参数 + 'Return (%)', 'Drawdown (%)', 'Win Rate'，按收益率排序
+        """
+        combos = expand_grid(strategy_class, param_grid)
+        print(f"🧪 正在测试 {len(combos)} 种 {strategy_class.__name__} 参数组合...")
+        if not combos:
+            return pd.DataFrame()
+
+        sweep_id = self._begin_sweep(strategy_class.__name__, 'grid', param_grid, len(combos))
+        results = self._evaluate_many(self.df, strategy_class, combos, max_workers, chunk_size, sweep_id)
+        self._finish_sweep(sweep_id)
+        results_df = pd.DataFrame(results)
+        return results_df.sort_values(by='Return (%)', ascending=False)
+
+    @inst.timed('optimizer.search')
+    def search(self, strategy_class, param_grid: dict, method='tpe', budget=50, seed=None,
+               max_workers=None, **options) -> pd.DataFrame:
+        """
+        自适应参数搜索：只回测 budget 次左右，不用把网格全跑一遍 (参数维度多、网格细的时候用)
+        :param method: 'random' (随机抽样) / 'halving' (逐轮淘汰，历史逐轮加长) / 'tpe' (基于模型)
+        :param budget: 回测次数上限 (halving 把较短历史上的回测也算在内)
+        :param seed: 随机种子 (固定后结果可复现)
+        :param max_workers: 进程数，random / halving 每轮一批并行跑；tpe 一次只提一组参数，总在当前进程里跑
+        :param options: 传给对应搜索函数的额外参数 (例如 halving 的 eta、min_fraction，tpe 的 n_startup、gamma)
+        :return: 和 optimize_strategy 一样的结果表 (只含全部历史上的成绩)，按收益率排序
+        """
+        combos = expand_grid(strategy_class, param_grid)
+        if not combos:
+            return pd.DataFrame()
+        print(f"🧪 {method} 搜索: 网格共 {len(combos)} 种 {strategy_class.__name__} 参数组合，预算 {budget} 次回测...")
+
+        sweep_id = self._begin_sweep(strategy_class.__name__, method, param_grid, budget)
+
+        def evaluate(param_list, bars):
+            df = self.df if bars is None else self.df.iloc[-bars:]
+            workers = 0 if method == 'tpe' else max_workers
+            inst.count('optimizer.search_evaluations', len(param_list), method=method)
+            # 只有全部历史上的成绩算进扫参记录 (逐轮淘汰前几轮的短历史成绩只存结果，不进记录)
+            return self._evaluate_many(df, strategy_class, param_list, workers,
+                                       sweep_id=sweep_id if bars is None else None)
+
+        rng = np.random.default_rng(seed)
+        if method == 'random':
+            results = adaptive_search.random_search(combos, evaluate, budget, rng)
+        elif method == 'halving':
+            results = adaptive_search.successive_halving(combos, evaluate, budget, rng, len(self.df), **options)
+        elif method == 'tpe':
+            results = adaptive_search.tpe_search(combos, evaluate, budget, rng, **options)
+        else:
+            raise ValueError(f"未知的搜索方式: {method} (可选 'random' / 'halving' / 'tpe')")
+
+        self._finish_sweep(sweep_id)
+        results_df = pd.DataFrame(results)
+        return results_df.sort_values(by='Return (%)', ascending=False)
+
+    @inst.timed('optimizer.walk_forward')
+    def walk_forward(self, strategy_class, param_grid: dict, train_size=252, test_size=63,
+                     step=None, anchored=False, metric='total_return') -> pd.DataFrame:
+        """
+        滚动前推优化：每折在训练段选参数，在随后的测试段检验，比全样本排名更不容易过拟合
+        信号在整段历史上只算一次，每折的结果有缓存 (配置了 store 时存进 SQLite)，历史延长后只算新增的折
+        :param train_size: 训练段 K 线数 (默认约 1 年)
+        :param test_size: 测试段 K 线数 (默认约 1 个季度)
+        :param step: 每折往后挪多少根 (默认等于 test_size)
+        :param anchored: True 时训练段都从第一根开始 (扩张窗口)
+        :param metric: 训练段选参数用的指标 ('total_return' / 'max_drawdown' / 'win_rate')
+        :return: 每折一行，见 core.walk_forward.walk_forward；用 core.walk_forward.summarize 汇总
+        """
+        combos = expand_grid(strategy_class, param_grid)
+        splits = wf.walk_forward_splits(len(self.df), train_size, test_size, step, anchored)
+        print(f"🧪 滚动前推: {len(splits)} 折 × {len(combos)} 种 {strategy_class.__name__} 参数组合...")
+        return wf.walk_forward(self.df, strategy_class, combos, train_size, test_size, step, anchored,
+                               metric, self.initial_capital, store=self.store)
+
+    # ---------- 结果存储 ----------
+
+    def _data_key(self, df):
+        if len(df) not in self._data_keys:
+            self._data_keys[len(df)] = data_key(df)
+        return self._data_keys[len(df)]
+
+    def _begin_sweep(self, strategy_name, method, grid, total):
+        if self.store is None:
+            return None
+        return self.store.begin_sweep(self._data_key(self.df), self.initial_capital, strategy_name,
+                                      method, grid, total, self.label)
+
+    def _finish_sweep(self, sweep_id):
+        if sweep_id is not None:
+            self.store.finish_sweep(sweep_id)
+
+    def _optimize_ma_stored(self, short_range, long_range) -> pd.DataFrame:
+        """向量化双均线 + 结果存储：整张网格都存过就直接读，否则整张重算 (向量化引擎重算比逐个补更快)"""
+        pairs = [{'Short': s, 'Long': l} for s in short_range for l in long_range if s < l]
+        key = self._data_key(self.df)
+        grid = {'Short': short_range, 'Long': long_range}
+        sweep_id = self._begin_sweep('ma_cross_grid', 'grid', grid, len(pairs))
+
+        stored = self.store.get_many(key, self.initial_capital, 'ma_cross_grid', pairs)
+        if pairs and len(stored) == len(pairs):
+            print("⚡ [Store] 整张网格都算过了，直接读取历史结果")
+            inst.count('optimizer.store_hit', len(pairs))
+            self.store.add_to_sweep(sweep_id, pairs)
+            results_df = pd.DataFrame([stored[params_key(p)] for p in pairs])
+        else:
+            results_df = ma_cross_grid(self.df['Close'], short_range, long_range, self.initial_capital)
+            rows = results_df.to_dict('records')
+            self.store.put_many(key, self.initial_capital, 'ma_cross_grid',
+                                [{'Short': r['Short'], 'Long': r['Long']} for r in rows], rows, sweep_id)
+        self._finish_sweep(sweep_id)
+        return results_df
+
+    def _evaluate_many(self, df, strategy_class, combos, max_workers=None, chunk_size=None, sweep_id=None) -> list:
+        """
+        跑一批参数组合 (进程数 <= 1 或只有一组时在当前进程里跑)，结果顺序和 combos 一致
+        有 store 时先查库跳过算过的组合，剩下的每算完一批就写盘 (中断后重跑从这里接着算)
+        """
+        if self.store is None:
+            return [row for _, rows in self._compute(df, strategy_class, combos, max_workers, chunk_size)
+                    for row in rows]
+
+        key = self._data_key(df)
+        name = strategy_class.__name__
+        done = self.store.get_many(key, self.initial_capital, name, combos)
+        missing = [params for params in combos if params_key(params) not in done]
+        if done:
+            print(f"⚡ [Store] {len(done)} 组参数已经算过，跳过")
+            inst.count('optimizer.store_hit', len(done))
+            if sweep_id is not None:
+                self.store.add_to_sweep(sweep_id, [p for p in combos if params_key(p) in done])
+
+        for batch, rows in self._compute(df, strategy_class, missing, max_workers, chunk_size):
+            self.store.put_many(key, self.initial_capital, name, batch, rows, sweep_id)
+            done.update({params_key(params): row for params, row in zip(batch, rows)})
+        return [done[params_key(params)] for params in combos]
+
+    def _compute(self, df, strategy_class, combos, max_workers, chunk_size):
+        """逐批产出 (参数列表, 结果行列表)"""
+        max_workers = os.cpu_count() if max_workers is None else max_workers
+        if max_workers <= 1 or len(combos) < 2:
+            for i in range(0, len(combos), self.checkpoint_size):
+                batch = combos[i:i + self.checkpoint_size]
+                yield batch, [_evaluate_params(df, strategy_class, params, self.initial_capital) for params in batch]
+            return
+        yield from self._run_parallel(df, strategy_class, combos, max_workers, chunk_size)
+
+    def _run_parallel(self, df, strategy_class, combos, max_workers, chunk_size):
+        # 每个进程分到几块任务，块太小调度开销大，块太大负载不均
+        if chunk_size is None:
+            chunk_size = max(1, len(combos) // (max_workers * 4))
+        chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+        shared = SharedFrame(df)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(shared.spec, strategy_class, self.initial_capital)
+            ) as pool:
+                # map 保持输入顺序，结果和串行版本一致；每块算完就交出去 (可以边算边存)
+                yield from zip(chunks, pool.map(_run_chunk, chunks))
+        finally:
+            shared.release()
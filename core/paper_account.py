@@ -1,26 +1,32 @@
 # core/paper_account.py
-import json
-import os
+import contextlib
+import threading
 from datetime import datetime
+from core.account_store import JournalAccountStore
 
 class PaperAccount:
-    def __init__(self, data_file='data/paper_account.json'):
+    def __init__(self, data_file='data/paper_account.json', store=None):
+        """
+        :param data_file: 账户快照文件
+        :param store: 存储后端 (默认 JournalAccountStore：追加流水 + 定期快照)
+        """
         self.data_file = data_file
+        self.store = store or JournalAccountStore(data_file)
+        self._lock = threading.Lock()  # 同一个账户对象可能被多个会话线程共享
         self.load_account()
 
     def load_account(self):
         """加载账户数据，如果不存在则初始化"""
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                self.data = json.load(f)
+        data = self.store.load()
+        if data is not None:
+            self.data = data
         else:
             self.data = {"cash": 100000.0, "positions": {}, "history": []}
             self.save_account()
 
     def save_account(self):
-        """保存账户数据到硬盘"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.data, f, indent=4)
+        """把当前完整状态写成一次快照 (平时成交只追加流水，不需要调用它)"""
+        self.store.save(self.data)
 
     def get_balance(self):
         return self.data['cash']
@@ -28,61 +34,161 @@ class PaperAccount:
     def get_positions(self):
         return self.data['positions']
 
+    def get_history(self, newest_first=True):
+        """交易流水 (默认最新的在最前面)"""
+        history = self.data['history']
+        return list(reversed(history)) if newest_first else list(history)
+
     def execute_trade(self, symbol, action, price, quantity):
         """
         执行交易
         :param action: "BUY" or "SELL"
         """
-        cost = price * quantity
+        ok, messages = self.execute_orders([(symbol, action, price, quantity)])
+        return ok, messages[0]
+
+    def execute_orders(self, orders):
+        """
+        批量执行一组订单：全部成功才生效 (要么全成交，要么一笔都不成交)，只持久化一次
+        订单按顺序撮合，前面的卖出回笼的资金可以给后面的买入用
+        :param orders: [(symbol, action, price, quantity), ...]
+        :return: (是否全部成交, 每笔订单的结果说明)
+        """
+        with self._lock, self._store_lock():
+            # 别的进程 (另一个 Streamlit 实例、命令行) 可能刚成交过，先把它们的流水补上再撮合
+            if hasattr(self.store, 'sync'):
+                self.store.sync(self.data)
+            return self._execute_orders(orders)
+
+    def _store_lock(self):
+        """存储后端支持跨进程锁就用它，否则只靠上面的线程锁"""
+        lock = getattr(self.store, 'lock', None)
+        return lock() if lock is not None else contextlib.nullcontext()
+
+    def _execute_orders(self, orders):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+        # 1. 在状态副本上逐笔撮合，任何一笔失败都不影响真实账户
+        cash = self.data['cash']
+        positions = {symbol: dict(pos) for symbol, pos in self.data['positions'].items()}
+        records = []
+        messages = []
+        for symbol, action, price, quantity in orders:
+            cash, ok, message = self._match_order(cash, positions, symbol, action, price, quantity)
+            messages.append(message)
+            if not ok:
+                return False, messages
+
+            trade = {
+                "time": timestamp,
+                "symbol": symbol,
+                "action": action,
+                "price": price,
+                "qty": quantity,
+                "amount": price * quantity
+            }
+            position = positions.get(symbol)
+            records.append({
+                'trade': trade,
+                'cash': cash,
+                'symbol': symbol,
+                'position': dict(position) if position else None
+            })
+
+        # 2. 全部成交：提交状态，流水一次写入
+        if records:
+            self.data['cash'] = cash
+            self.data['positions'] = positions
+            self.data['history'].extend(r['trade'] for r in records)  # 按时间顺序追加
+            self.store.append(records, self.data)
+        return True, messages
+
+    @staticmethod
+    def _match_order(cash, positions, symbol, action, price, quantity):
+        """
+        撮合一笔订单 (直接修改 positions)
+        :return: (成交后现金, 是否成交, 结果说明)
+        """
+        cost = price * quantity
+
         if action == "BUY":
-            if self.data['cash'] >= cost:
-                self.data['cash'] -= cost
+            if cash >= cost:
+                cash -= cost
                 # 更新持仓
-                current_qty = self.data['positions'].get(symbol, {}).get('qty', 0)
+                current_qty = positions.get(symbol, {}).get('qty', 0)
                 # 简单计算平均成本 (Average Cost)
-                current_avg = self.data['positions'].get(symbol, {}).get('avg_price', 0)
+                current_avg = positions.get(symbol, {}).get('avg_price', 0)
                 new_avg = ((current_qty * current_avg) + cost) / (current_qty + quantity)
-                
-                self.data['positions'][symbol] = {
+
+                positions[symbol] = {
                     'qty': current_qty + quantity,
                     'avg_price': new_avg
                 }
-                # 记录流水
-                self.log_transaction(timestamp, symbol, "BUY", price, quantity)
-                self.save_account()
-                return True, "✅ 买入成功"
+                return cash, True, "✅ 买入成功"
             else:
-                return False, "❌ 资金不足"
+                return cash, False, "❌ 资金不足"
 
         elif action == "SELL":
-            current_qty = self.data['positions'].get(symbol, {}).get('qty', 0)
+            current_qty = positions.get(symbol, {}).get('qty', 0)
             if current_qty >= quantity:
-                self.data['cash'] += cost
+                cash += cost
                 # 更新持仓
                 remaining_qty = current_qty - quantity
                 if remaining_qty == 0:
-                    del self.data['positions'][symbol]
+                    del positions[symbol]
                 else:
-                    self.data['positions'][symbol]['qty'] = remaining_qty
-                
-                # 记录流水
-                self.log_transaction(timestamp, symbol, "SELL", price, quantity)
-                self.save_account()
-                return True, "✅ 卖出成功"
+                    positions[symbol]['qty'] = remaining_qty
+                return cash, True, "✅ 卖出成功"
             else:
-                return False, "❌ 持仓不足"
-        
-        return False, "未知操作"
-
-    def log_transaction(self, time, symbol, action, price, qty):
-        record = {
-            "time": time,
-            "symbol": symbol,
-            "action": action,
-            "price": price,
-            "qty": qty,
-            "amount": price * qty
+                return cash, False, "❌ 持仓不足"
+
+        return cash, False, "未知操作"
+
+    def mark_to_market(self, quote_cache=None, live=True):
+        """
+        按最新价给所有持仓估值 (报价走短时缓存，所有持仓合并成一次批量请求)
+        :param quote_cache: QuoteCache 实例，默认使用进程内共享的缓存
+        :param live: False 时不取报价 (不联网)，全部按成本价估值
+        :return: {'cash', 'market_value', 'equity', 'unrealized_pnl', 'positions': [每只持仓的估值]}
+                 拿不到报价的持仓按成本价估值，并标记 stale=True
+        """
+        positions = self.data['positions']
+        prices = {}
+        if live and positions:
+            if quote_cache is None:
+                from data.quote_cache import shared_quote_cache
+                quote_cache = shared_quote_cache()
+            prices = quote_cache.get_prices(list(positions))
+
+        rows = []
+        market_value = 0.0
+        cost_basis = 0.0
+        for symbol, pos in positions.items():
+            qty, avg_price = pos['qty'], pos['avg_price']
+            price = prices.get(symbol)
+            stale = price is None
+            if stale:
+                price = avg_price
+            value = qty * price
+            pnl = value - qty * avg_price
+            rows.append({
+                'symbol': symbol,
+                'qty': qty,
+                'avg_price': avg_price,
+                'price': price,
+                'market_value': value,
+                'pnl': pnl,
+                'pnl_pct': pnl / (qty * avg_price) if qty * avg_price else 0.0,
+                'stale': stale
+            })
+            market_value += value
+            cost_basis += qty * avg_price
+
+        cash = self.data['cash']
+        return {
+            'cash': cash,
+            'market_value': market_value,
+            'equity': cash + market_value,
+            'unrealized_pnl': market_value - cost_basis,
+            'positions': rows
         }
-        self.data['history'].insert(0, record) # 把最新的插到最前面
\ No newline at end of file
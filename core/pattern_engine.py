@@ -0,0 +1,191 @@
+# core/pattern_engine.py
+"""
+全市场K线形态引擎
+
+把整个股票池的 OHLC 叠成 (股票数, K线数) 的二维数组，一次 NumPy 计算识别所有形态，
+结果压成位掩码 (每种形态占一个 bit)，比逐只股票建 DataFrame 快得多
+
+新增形态只需要写一个函数并用 @register_pattern 注册:
+    @register_pattern('my_pattern', '🆕 Mine', lookback=2)
+    def my_pattern(c):
+        return (c.body > 0) & (c.prev_close < c.prev_open)
+"""
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# name -> (bit, 显示标签, 需要的K线数, 识别函数)
+PATTERNS = OrderedDict()
+
+
+def register_pattern(name, label, lookback=1):
+    """
+    注册一种形态
+    :param name: 形态名 (也是 decode 返回的名字)
+    :param label: 扫描结果里显示的标签
+    :param lookback: 识别最后一根K线需要的K线数 (单K线形态是 1，吞没是 2，晨星是 3)
+    """
+    def decorator(func):
+        bit = len(PATTERNS)
+        if bit >= 32:
+            raise ValueError("最多支持 32 种形态")
+        PATTERNS[name] = (bit, label, lookback, func)
+        return func
+    return decorator
+
+
+def shift(a, k=1):
+    """沿最后一维 (时间) 向后移 k 根K线，前面补 NaN (等价于 pandas 的 shift)"""
+    out = np.full_like(a, np.nan)
+    out[..., k:] = a[..., :-k]
+    return out
+
+
+class Candles:
+    """预先算好的K线分量，所有形态共用 (数组形状都是 (股票数, K线数) 或 (K线数,))"""
+
+    def __init__(self, open_, high, low, close):
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+
+        # 实体 (Body) = |收 - 开|
+        self.body = np.abs(self.close - self.open)
+        # 实体上沿 / 下沿
+        self.body_top = np.maximum(self.open, self.close)
+        self.body_bottom = np.minimum(self.open, self.close)
+        # 上影线 = 高 - max(开, 收)，下影线 = min(开, 收) - 低
+        self.upper_shadow = self.high - self.body_top
+        self.lower_shadow = self.body_bottom - self.low
+        # 蜡烛总长度 (Range)
+        self.range = self.high - self.low
+
+        self.is_green = self.close > self.open
+        self.is_red = self.close < self.open
+        self.prev_open = shift(self.open)
+        self.prev_close = shift(self.close)
+
+
+# --- 单根K线形态 ---
+
+@register_pattern('doji', '➕ Doji')
+def doji(c):
+    # 实体非常小 (小于总长度的 10%)
+    return c.body <= c.range * 0.1
+
+
+@register_pattern('hammer', '🔨 Hammer')
+def hammer(c):
+    # 实体较小、下影线至少是实体的 2 倍、上影线很短 (只看形态本身，不看趋势位置)
+    return (c.body <= c.range * 0.3) & (c.lower_shadow >= c.body * 2.0) & (c.upper_shadow <= c.body * 0.5)
+
+
+@register_pattern('shooting_star', '🌠 Shooting Star')
+def shooting_star(c):
+    # 锤子线倒过来：上影线长、下影线短
+    return (c.body <= c.range * 0.3) & (c.upper_shadow >= c.body * 2.0) & (c.lower_shadow <= c.body * 0.5)
+
+
+# --- 两根K线形态 ---
+
+@register_pattern('bullish_engulfing', '🐂 Bullish', lookback=2)
+def bullish_engulfing(c):
+    # 昨天跌、今天涨，今天开盘 <= 昨天收盘 且 今天收盘 >= 昨天开盘
+    return (c.prev_close < c.prev_open) & c.is_green & (c.open <= c.prev_close) & (c.close >= c.prev_open)
+
+
+@register_pattern('bearish_engulfing', '🐻 Bearish', lookback=2)
+def bearish_engulfing(c):
+    # 昨天涨、今天跌，今天开盘 >= 昨天收盘 且 今天收盘 <= 昨天开盘
+    return (c.prev_close > c.prev_open) & c.is_red & (c.open >= c.prev_close) & (c.close <= c.prev_open)
+
+
+@register_pattern('bullish_harami', '🤰 Harami', lookback=2)
+def bullish_harami(c):
+    # 昨天一根大阴线，今天的小阳线实体完全在昨天实体里面
+    prev_body = np.abs(c.prev_close - c.prev_open)
+    return ((c.prev_close < c.prev_open) & c.is_green & (c.body < prev_body) &
+            (c.open >= c.prev_close) & (c.close <= c.prev_open))
+
+
+# --- 三根K线形态 ---
+
+@register_pattern('morning_star', '🌅 Morning Star', lookback=3)
+def morning_star(c):
+    # 第一根大阴线，第二根小实体落在第一根收盘价下方，第三根阳线收复第一根实体的一半以上
+    first_open, first_close = shift(c.open, 2), shift(c.close, 2)
+    first_range = shift(c.range, 2)
+    mid_body, mid_range, mid_top = shift(c.body), shift(c.range), shift(c.body_top)
+    return ((first_close < first_open) & (first_open - first_close >= first_range * 0.5) &
+            (mid_body <= mid_range * 0.3) & (mid_top <= first_close) &
+            c.is_green & (c.close >= (first_open + first_close) / 2))
+
+
+def max_lookback(names=None):
+    """识别最后一根K线需要的K线数 (所选形态里最长的)"""
+    names = names or PATTERNS.keys()
+    return max(PATTERNS[name][2] for name in names)
+
+
+def decode(mask, names=None):
+    """位掩码 -> 形态名列表"""
+    names = names or PATTERNS.keys()
+    return [name for name in names if int(mask) >> PATTERNS[name][0] & 1]
+
+
+def labels(mask, names=None):
+    """位掩码 -> 显示标签列表"""
+    return [PATTERNS[name][1] for name in decode(mask, names)]
+
+
+class PatternEngine:
+    def __init__(self, names=None):
+        """
+        :param names: 要识别的形态 (默认全部已注册的形态)
+        """
+        self.names = list(names or PATTERNS.keys())
+
+    def detect(self, open_, high, low, close) -> np.ndarray:
+        """
+        一次识别所有形态
+        :param open_/high/low/close: 形状相同的数组，(K线数,) 或 (股票数, K线数)，时间在最后一维
+        :return: 同形状的 uint32 位掩码，第 i 个 bit 表示 PATTERNS 里第 i 种形态
+        """
+        candles = Candles(open_, high, low, close)
+        mask = np.zeros(candles.close.shape, dtype=np.uint32)
+        with np.errstate(invalid='ignore'):
+            for name in self.names:
+                bit, _, _, func = PATTERNS[name]
+                mask |= func(candles).astype(np.uint32) << np.uint32(bit)
+        return mask
+
+    def detect_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """单只股票：返回每根K线每种形态的布尔列 (列名 Pattern_<name>)"""
+        mask = self.detect(df['Open'].to_numpy(), df['High'].to_numpy(),
+                           df['Low'].to_numpy(), df['Close'].to_numpy())
+        return pd.DataFrame(
+            {f"Pattern_{name}": (mask >> PATTERNS[name][0] & 1).astype(bool) for name in self.names},
+            index=df.index
+        )
+
+    def detect_latest(self, frames: dict) -> dict:
+        """
+        整个股票池只看最后一根K线
+        每只股票取自己最后 max_lookback 根真实K线 (停牌、上市晚的股票不会被对齐成 NaN)，
+        叠成二维数组一次算完
+        :param frames: {symbol: OHLC DataFrame}
+        :return: {symbol: 最后一根K线的位掩码}
+        """
+        symbols = [s for s, df in frames.items() if df is not None and not df.empty]
+        if not symbols:
+            return {}
+        bars = max_lookback(self.names)
+        stacked = {field: np.full((len(symbols), bars), np.nan) for field in ('Open', 'High', 'Low', 'Close')}
+        for i, symbol in enumerate(symbols):
+            tail = frames[symbol].iloc[-bars:]
+            for field, arr in stacked.items():
+                arr[i, bars - len(tail):] = tail[field].to_numpy(dtype=np.float64)
+
+        mask = self.detect(stacked['Open'], stacked['High'], stacked['Low'], stacked['Close'])
+        return dict(zip(symbols, mask[:, -1].tolist()))
@@ -1,13 +1,16 @@
 # core/portfolio.py
 import pandas as pd
-import plotly.graph_objects as go
 from data.yfinance_provider import YFinanceProvider
-from core.backtester import Backtester
+from core.backtester import Backtester, BatchBacktester
+from core import instrumentation as inst
 
 class PortfolioBacktester:
-    def __init__(self, initial_capital=10000.0):
+    def __init__(self, initial_capital=10000.0, provider=None):
+        """
+        :param provider: 数据源 (默认 YFinanceProvider)
+        """
         self.initial_capital = initial_capital
-        self.provider = YFinanceProvider()
+        self.provider = provider or YFinanceProvider()
 
     def run_portfolio_backtest(self, symbols: list, strategy_class, strategy_params: dict, period="2y"):
         """
@@ -17,46 +20,52 @@ class PortfolioBacktester:
         :param strategy_params: 策略参数字典 (例如 {'period':10, 'multiplier':3.0})
         """
         portfolio_results = {}
-        combined_equity = None
-        
+
         # 分配资金：假设平分
         capital_per_stock = self.initial_capital / len(symbols)
-        
+
         print(f"🧺 开始组合回测: {len(symbols)} 只股票, 每只分配 ${capital_per_stock:.2f}")
 
-        for symbol in symbols:
-            try:
-                # 1. 获取数据
-                df = self.provider.get_price_history(symbol, period)
-                if df.empty: continue
-                
-                # 2. 实例化策略
-                # 这里的 **strategy_params 是把字典解包传进去
-                strategy = strategy_class(**strategy_params)
-                signals = strategy.generate_signals(df)
-                
-                # 3. 运行回测 (使用分配到的资金)
-                backtester = Backtester(initial_capital=int(capital_per_stock))
-                res = backtester.run_backtest(signals)
-                
-                # 4. 记录数据
-                equity_curve = res['data']['Equity_Curve']
-                portfolio_results[symbol] = {
-                    'metrics': res['metrics'],
-                    'equity': equity_curve
-                }
-                
-                # 5. 叠加资金曲线
-                if combined_equity is None:
-                    combined_equity = equity_curve.copy()
-                else:
-                    # 按照日期对齐相加 (fill_value=0 处理停牌等情况)
-                    combined_equity = combined_equity.add(equity_curve, fill_value=0)
-                    
-            except Exception as e:
-                print(f"❌ {symbol} 回测失败: {e}")
+        # 批量拉取所有股票数据，一次请求代替逐个下载
+        with inst.span('portfolio.fetch', symbols=len(symbols)):
+            panel = self.provider.get_price_history_many(symbols, period)
+            price_frames = self.provider.split_panel(panel)
+
+        # 1. 逐只生成信号 (策略本身是按单只股票写的)
+        signal_columns = {}
+        with inst.span('portfolio.signals', strategy=strategy_class.__name__):
+            for symbol in symbols:
+                try:
+                    df = price_frames.get(symbol)
+                    if df is None or df.empty: continue
+
+                    # 这里的 **strategy_params 是把字典解包传进去
+                    strategy = strategy_class(**strategy_params)
+                    signal_columns[symbol] = strategy.generate_signals(df)['Signal']
+
+                except Exception as e:
+                    print(f"❌ {symbol} 回测失败: {e}")
+
+        if not signal_columns:
+            return {'details': {}, 'total_equity': None}
+
+        # 2. 整个股票池一次性回测 (日期 × 股票 的矩阵运算，代替逐只回测再逐个相加)
+        traded = list(signal_columns)
+        close = panel.xs('Close', axis=1, level=1)[traded]
+        signals = pd.DataFrame(signal_columns)
+        with inst.span('portfolio.backtest'):
+            batch = BatchBacktester(initial_capital=int(capital_per_stock)).run(close, signals)
+
+        # 3. 整理每只股票的战报
+        for symbol in traded:
+            values = batch['values'].loc[symbol].to_dict()
+            portfolio_results[symbol] = {
+                'metrics': Backtester.format_metrics(values),
+                'values': values,
+                'equity': batch['equity'][symbol].dropna()
+            }
 
         return {
-            'details': portfolio_results,   # 每只股票的详细战报
-            'total_equity': combined_equity # 总资产曲线
-        }
\ No newline at end of file
+            'details': portfolio_results,           # 每只股票的详细战报
+            'total_equity': batch['total_equity'].dropna() # 总资产曲线
+        }
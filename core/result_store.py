@@ -0,0 +1,224 @@
+# core/result_store.py
+"""
+参数优化结果的本地存储 (SQLite)
+
+results      : 每组参数的回测结果，主键 = (价格数据指纹, 初始资金, 策略, 参数)
+               同一份数据 + 同一组参数只回测一次，以后的扫参 (包括别的会话) 直接复用
+sweeps       : 每次扫参的记录 (股票、周期、策略、搜索方式、网格、进度、状态)
+sweep_params : 每次扫参包含哪些参数组合，查历史结果时和 results 连表
+folds        : 滚动前推每一折的结果 (键由 core.walk_forward 生成：数据前缀指纹 + 策略 + 网格 + 切分位置)
+
+扫参过程中每算完一批就写盘 (检查点)，进程崩溃或页面刷新后重跑同样的扫参，已算过的组合直接跳过
+"""
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from core.indicators import fingerprint
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def data_key(df: pd.DataFrame) -> str:
+    """价格数据指纹 (只看 OHLCV，策略加的指标列不影响)"""
+    return fingerprint(df[[c for c in PRICE_COLUMNS if c in df.columns]])
+
+
+def params_key(params: dict) -> str:
+    """参数字典 -> 规范化的 JSON (键排序，NumPy 数字转成 Python 数字)"""
+    return json.dumps(params, sort_keys=True, default=lambda v: v.item())
+
+
+class OptimizerResultStore:
+    def __init__(self, db_path='data/cache/optimizer.db'):
+        """
+        :param db_path: SQLite 文件路径
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            # WAL 模式：读写互不阻塞，适合多进程同时访问
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " data_key TEXT NOT NULL,"
+                " capital REAL NOT NULL,"
+                " strategy TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " computed_at REAL NOT NULL,"
+                " PRIMARY KEY (data_key, capital, strategy, params))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sweeps ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " label TEXT,"
+                " data_key TEXT NOT NULL,"
+                " capital REAL NOT NULL,"
+                " strategy TEXT NOT NULL,"
+                " method TEXT NOT NULL,"
+                " grid TEXT NOT NULL,"
+                " total INTEGER NOT NULL,"
+                " status TEXT NOT NULL,"
+                " started_at REAL NOT NULL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sweeps_label ON sweeps (label, started_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sweep_params ("
+                " sweep_id INTEGER NOT NULL,"
+                " params TEXT NOT NULL,"
+                " PRIMARY KEY (sweep_id, params))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS folds ("
+                " key TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " computed_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # 每次操作单独开连接，进程池回调、多个会话并发调用都是安全的
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    # ---------- 单组参数的结果 ----------
+
+    def get_many(self, key: str, capital, strategy: str, params_list: list) -> dict:
+        """
+        :return: {params_key: 结果行}，只返回已经算过的
+        """
+        keys = [params_key(p) for p in params_list]
+        results = {}
+        with self._connect() as conn:
+            # 分批查询，避免超过 SQLite 的参数个数上限
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT params, payload FROM results"
+                    f" WHERE data_key = ? AND capital = ? AND strategy = ? AND params IN ({placeholders})",
+                    [key, float(capital), strategy, *batch]
+                ).fetchall()
+                results.update({p: json.loads(payload) for p, payload in rows})
+        return results
+
+    def put_many(self, key: str, capital, strategy: str, params_list: list, rows: list, sweep_id=None):
+        """批量写入一批结果 (一个事务提交)，顺便记到扫参记录里"""
+        if not rows:
+            return
+        now = time.time()
+        keys = [params_key(p) for p in params_list]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (data_key, capital, strategy, params, payload, computed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, float(capital), strategy, k, json.dumps(row, default=lambda v: v.item()), now)
+                 for k, row in zip(keys, rows)]
+            )
+            if sweep_id is not None:
+                self._add_members(conn, sweep_id, keys)
+
+    # ---------- 滚动前推的折结果 ----------
+
+    def get_folds(self, keys: list) -> dict:
+        """:return: {key: 结果行}，只返回已经算过的"""
+        results = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, payload FROM folds WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                results.update({key: json.loads(payload) for key, payload in rows})
+        return results
+
+    def put_folds(self, rows: dict):
+        """批量写入 {key: 结果行} (一个事务提交)"""
+        if not rows:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO folds (key, payload, computed_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(row, default=lambda v: v.item()), now) for key, row in rows.items()]
+            )
+
+    # ---------- 扫参记录 ----------
+
+    def begin_sweep(self, key: str, capital, strategy: str, method: str, grid: dict, total: int, label=None) -> int:
+        """
+        登记一次扫参；同样的 (数据, 资金, 策略, 搜索方式, 网格) 有没跑完的记录时沿用它 (断点续跑)
+        :return: sweep_id
+        """
+        grid_json = json.dumps({name: list(values) for name, values in grid.items()},
+                               sort_keys=True, default=lambda v: v.item())
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM sweeps WHERE data_key = ? AND capital = ? AND strategy = ? AND method = ?"
+                " AND grid = ? AND status = 'running' ORDER BY id DESC LIMIT 1",
+                (key, float(capital), strategy, method, grid_json)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            cursor = conn.execute(
+                "INSERT INTO sweeps (label, data_key, capital, strategy, method, grid, total, status, started_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 'running', ?)",
+                (label, key, float(capital), strategy, method, grid_json, total, time.time())
+            )
+            return cursor.lastrowid
+
+    def add_to_sweep(self, sweep_id: int, params_list: list):
+        """把已有结果 (从缓存里直接拿的) 也记到这次扫参里"""
+        with self._connect() as conn:
+            self._add_members(conn, sweep_id, [params_key(p) for p in params_list])
+
+    @staticmethod
+    def _add_members(conn, sweep_id, keys):
+        conn.executemany(
+            "INSERT OR IGNORE INTO sweep_params (sweep_id, params) VALUES (?, ?)",
+            [(sweep_id, k) for k in keys]
+        )
+
+    def finish_sweep(self, sweep_id: int):
+        with self._connect() as conn:
+            conn.execute("UPDATE sweeps SET status = 'done', finished_at = ? WHERE id = ?", (time.time(), sweep_id))
+
+    def list_sweeps(self, label=None, limit=100) -> pd.DataFrame:
+        """
+        历史扫参列表 (最新的在前)
+        :return: 列为 id, label, strategy, method, total, done, status, started_at, finished_at
+        """
+        where, args = ("WHERE s.label = ?", [label]) if label is not None else ("", [])
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.id, s.label, s.strategy, s.method, s.total,"
+                " (SELECT COUNT(*) FROM sweep_params p WHERE p.sweep_id = s.id),"
+                " s.status, s.started_at, s.finished_at"
+                f" FROM sweeps s {where} ORDER BY s.id DESC LIMIT ?",
+                [*args, limit]
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=['id', 'label', 'strategy', 'method', 'total', 'done',
+                                         'status', 'started_at', 'finished_at'])
+        for col in ('started_at', 'finished_at'):
+            df[col] = pd.to_datetime(df[col], unit='s')
+        return df
+
+    def load_sweep(self, sweep_id: int) -> pd.DataFrame:
+        """某次扫参的结果表 (和优化器返回的格式一样)，按收益率排序"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT r.payload FROM sweeps s"
+                " JOIN sweep_params p ON p.sweep_id = s.id"
+                " JOIN results r ON r.data_key = s.data_key AND r.capital = s.capital"
+                "  AND r.strategy = s.strategy AND r.params = p.params"
+                " WHERE s.id = ?",
+                (sweep_id,)
+            ).fetchall()
+        df = pd.DataFrame([json.loads(payload) for payload, in rows])
+        if df.empty:
+            return df
+        return df.sort_values(by='Return (%)', ascending=False).reset_index(drop=True)
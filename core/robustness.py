@@ -0,0 +1,176 @@
+# core/robustness.py
+"""
+回测稳健性检验 (蒙特卡洛重采样)
+
+一条资金曲线说明不了策略是真有效还是运气好，这里把每日策略收益重采样成几千条 "平行历史"：
+- 块自助法 (block bootstrap)：随机抽取连续的 block_size 天拼成新序列，保留短期的波动聚集
+- 交易乱序 (trade shuffle)：把每笔交易 (连续持仓的一段) 的收益打乱顺序
+  总收益不变，但回撤会变，用来看回撤有多少是 "碰巧排在一起" 造成的
+
+所有重采样都是一个 (样本数 × 天数) 的 NumPy 矩阵一次算完，样本多时分块 (可以分给多个进程)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core import instrumentation as inst
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def path_metrics(returns: np.ndarray) -> dict:
+    """
+    每一行是一条收益序列，算出每条的指标 (口径和 evaluate_signal_matrix 一致)
+    :param returns: (样本数 × 天数) 的日收益矩阵
+    :return: {'total_return', 'max_drawdown', 'win_rate'}，每个都是长度为样本数的数组
+    """
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    drawdown = (equity - peak) / peak
+    active = np.count_nonzero(returns, axis=1)
+    wins = np.count_nonzero(returns > 0, axis=1)
+    return {
+        'total_return': equity[:, -1] - 1,
+        'max_drawdown': drawdown.min(axis=1),
+        'win_rate': np.divide(wins, active, out=np.zeros(len(returns)), where=active > 0),
+    }
+
+
+def block_bootstrap(returns: np.ndarray, n_samples: int, block_size: int, rng) -> dict:
+    """
+    环形块自助法：每条样本由若干个随机起点的连续 block_size 天拼成，长度和原序列一样
+    """
+    n = len(returns)
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_samples, n_blocks))
+    # (样本数 × 块数 × 块长) 的下标，超过末尾的绕回开头，最后截成原长度
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(n_samples, -1)[:, :n] % n
+    return path_metrics(returns[idx])
+
+
+def trade_returns(returns: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """
+    把每日收益按交易合并：连续持仓 (position != 0) 的一段算一笔，返回每笔的复利收益
+    """
+    held = np.asarray(position) != 0
+    if not held.any():
+        return np.zeros(0)
+    # 每一段持仓的起点：今天持仓、昨天没持仓
+    starts = held & ~np.concatenate([[False], held[:-1]])
+    trade_id = np.cumsum(starts) - 1
+    growth = np.log1p(returns[held])
+    return np.expm1(np.bincount(trade_id[held], weights=growth))
+
+
+def trade_shuffle(trades: np.ndarray, n_samples: int, rng) -> dict:
+    """
+    打乱交易顺序 (每一行是一个随机排列)，回撤按交易粒度计算 (交易内部的浮亏不计)
+    胜率在这里是按笔算的胜率，每条样本都一样
+    """
+    shuffled = rng.permuted(np.broadcast_to(trades, (n_samples, len(trades))), axis=1)
+    return path_metrics(shuffled)
+
+
+def _resample_chunk(method, data, n_samples, block_size, seed):
+    """进程池任务：用独立的种子算一块样本"""
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        return block_bootstrap(data, n_samples, block_size, rng)
+    return trade_shuffle(data, n_samples, rng)
+
+
+class MonteCarlo:
+    def __init__(self, n_samples=10000, block_size=20, chunk_size=2500, max_workers=0, seed=None):
+        """
+        :param n_samples: 重采样次数
+        :param block_size: 块自助法每块的天数 (默认约一个月)
+        :param chunk_size: 每块样本数 (控制内存：5 年日线 × 2500 条约 25MB 一个矩阵)
+        :param max_workers: 进程数 (默认 0，在当前进程里逐块算；None 表示 CPU 核数)
+        :param seed: 随机种子 (seed 和 chunk_size 固定后结果可复现，进程数不影响结果)
+        """
+        if n_samples < 1:
+            raise ValueError(f"n_samples 至少为 1 (当前为 {n_samples})")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size 至少为 1 (当前为 {chunk_size})")
+        self.n_samples = n_samples
+        self.block_size = block_size
+        self.chunk_size = chunk_size
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.seed = seed
+
+    @staticmethod
+    def from_backtest(result: dict):
+        """
+        从 Backtester.run_backtest 的结果里取出每日策略收益和持仓
+        :return: (returns, position)，都是 NumPy 数组，去掉了第一天 (没有收益)
+        """
+        data = result.get('data')
+        if data is None:
+            raise ValueError("需要逐日明细，请用 run_backtest(df, include_data=True) 的结果")
+        returns = data['Strategy_Return'].to_numpy(dtype=float)[1:]
+        position = data['Signal'].shift(1).to_numpy(dtype=float)[1:]
+        return np.nan_to_num(returns), np.nan_to_num(position)
+
+    @inst.timed('robustness.bootstrap')
+    def bootstrap(self, returns) -> dict:
+        """
+        :param returns: 每日策略收益 (小数)
+        :return: {'total_return', 'max_drawdown', 'win_rate'}，每个都是长度 n_samples 的数组
+        """
+        returns = np.asarray(returns, dtype=float)
+        return self._run('bootstrap', returns)
+
+    @inst.timed('robustness.trade_shuffle')
+    def trade_shuffle(self, returns, position) -> dict:
+        """
+        :param position: 每天收盘前的持仓 (和 returns 对齐，非 0 表示持仓)
+        :return: 同 bootstrap；没有交易时返回空数组
+        """
+        trades = trade_returns(np.asarray(returns, dtype=float), position)
+        if len(trades) == 0:
+            return {key: np.zeros(0) for key in ('total_return', 'max_drawdown', 'win_rate')}
+        return self._run('shuffle', trades)
+
+    def run(self, result: dict) -> dict:
+        """
+        对一次回测同时做两种重采样
+        :return: {'bootstrap': 分布, 'trade_shuffle': 分布}
+        """
+        returns, position = self.from_backtest(result)
+        return {
+            'bootstrap': self.bootstrap(returns),
+            'trade_shuffle': self.trade_shuffle(returns, position),
+        }
+
+    def _run(self, method, data) -> dict:
+        sizes = [min(self.chunk_size, self.n_samples - i) for i in range(0, self.n_samples, self.chunk_size)]
+        # 每块一个独立的子种子，不管用几个进程，同一个 seed 结果都一样
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        args = [(method, data, size, self.block_size, seed) for size, seed in zip(sizes, seeds)]
+
+        if self.max_workers <= 1 or len(args) < 2:
+            parts = [_resample_chunk(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                parts = list(pool.map(_resample_chunk, *zip(*args)))
+        return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    @staticmethod
+    def summarize(distribution: dict) -> pd.DataFrame:
+        """分布 -> 分位数表 (行: 指标，列: 均值和各分位数，单位 %)"""
+        rows = {}
+        for key, values in distribution.items():
+            if len(values) == 0:
+                continue
+            row = {'Mean': values.mean() * 100}
+            row.update({f"P{q}": v * 100 for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+            rows[key] = row
+        return pd.DataFrame.from_dict(rows, orient='index').round(2)
+
+    @staticmethod
+    def probability_of_loss(distribution: dict) -> float:
+        """总收益 < 0 的样本占比"""
+        values = distribution['total_return']
+        return float((values < 0).mean()) if len(values) else 0.0
@@ -1,78 +1,206 @@
 # core/scanner.py
+import contextlib
+import os
+import time
 import pandas as pd
-import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from data.yfinance_provider import YFinanceProvider
-from core.patterns import PatternRecognizer # 确保导入了这个
+from core import instrumentation as inst
+from core.pattern_engine import PatternEngine, labels
+
+
+def evaluate_symbol(symbol, df, fund_data, strategy, pattern_mask=None):
+    """
+    单只股票的计算部分 (形态识别 + 策略信号)，纯 CPU 计算
+    :param pattern_mask: 最后一根K线的形态位掩码 (扫描器对整个股票池一次算好)，不传就单独算
+    :return: 一行扫描结果 (dict)，出错返回 None
+    """
+    row, timing = _evaluate_timed(symbol, df, fund_data, strategy, pattern_mask)
+    _record_signals(timing)
+    return row
+
+
+def _evaluate_timed(symbol, df, fund_data, strategy, pattern_mask=None):
+    """
+    进程池任务 (放在模块顶层是为了能被进程池 pickle)：同 evaluate_symbol，另外返回策略信号阶段的耗时
+    worker 进程里的统计数据带不回主进程，所以耗时随结果返回，由主进程记录
+    :return: (结果行或 None, (耗时秒数, 是否出错) 或 None)
+    """
+    timing = None
+    try:
+        # 1. 识别形态
+        if pattern_mask is None:
+            pattern_mask = PatternEngine().detect_latest({symbol: df})[symbol]
+        pattern_tags = labels(pattern_mask)
+        pattern_str = ", ".join(pattern_tags) if pattern_tags else "-"
+
+        # 2. 运行策略 (只在策略需要的末尾窗口上算，扫描只关心最后一根K线)
+        start = time.perf_counter()
+        try:
+            last_row = strategy.evaluate_latest(df)
+        except Exception:
+            timing = (time.perf_counter() - start, True)
+            raise
+        timing = (time.perf_counter() - start, False)
+
+        # 3. 判断状态
+        status = "Wait"
+        if last_row['Position'] == 1: status = "🔺 BUY"
+        elif last_row['Position'] == -1: status = "🔻 SELL"
+        elif last_row['Signal'] == 1: status = "✅ Holding"
+        else: status = "⚪ Empty"
+
+        # 4. 收集结果 (合并基本面数据)
+        # 我们把 fund_data 里的字段拆开存进去
+        mc_billions = fund_data['MarketCap'] / 1e9 # 转换为十亿 (B)
+
+        return {
+            'Symbol': symbol,
+            'Price': round(last_row['Close'], 2),
+            'Status': status,
+            'Pattern': pattern_str,
+            'Sector': fund_data['Sector'],
+            'PE': round(fund_data['PE_Ratio'], 2) if fund_data['PE_Ratio'] else 0,
+            'Mkt Cap (B)': round(mc_billions, 2),
+            'Date': str(last_row.name)[:10]
+        }, timing
+
+    except Exception as e:
+        print(f"❌ 扫描 {symbol} 出错: {e}")
+        return None, timing
+
+
+def _record_signals(timing):
+    if timing is not None:
+        inst.record('scanner.signals', *timing)
+
 
 class MarketScanner:
-    def __init__(self):
-        self.provider = YFinanceProvider()
+    def __init__(self, provider=None, io_workers=8, cpu_workers=None, min_parallel=32):
+        """
+        :param provider: 数据源 (默认 YFinanceProvider)
+        :param io_workers: 获取基本面时的线程数
+        :param cpu_workers: 计算形态/信号的进程数 (默认 CPU 核数，0 表示在当前进程里算)
+        :param min_parallel: 股票数少于这个值时不开进程池 (启动进程的开销比计算本身还大)
+        """
+        self.provider = provider or YFinanceProvider()
+        self.io_workers = io_workers
+        self.cpu_workers = os.cpu_count() if cpu_workers is None else cpu_workers
+        self.min_parallel = min_parallel
+        self.pattern_engine = PatternEngine()
         # 修复：在这里定义默认扫描的股票列表
         self.default_list = [
             "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", # 七巨头
             "AMD", "INTC", "NFLX", "DIS", "PYPL", "COIN"           # 其他热门股
         ]
 
-    def scan_market(self, strategy, symbols=None):
+    def iter_scan(self, strategy, symbols=None, period="2y"):
+        """
+        逐只产出扫描结果，哪只先算完先产出哪只 (方便界面边算边显示)
+        价格按批在后台拉，基本面哪只先到先处理：某只股票的价格和基本面都齐了就马上计算，不等整个股票池
+        :yield: (已完成数量, 总数量, 结果行 dict 或 None)
+        """
+        if symbols is None:
+            symbols = self.default_list
+        symbols = list(dict.fromkeys(symbols))
+        total = len(symbols)
+
+        print(f"🕵️ 开始扫描 {total} 只股票...")
+        inst.count('scanner.symbols', total)
+
+        # 按数据源的批量大小分批 (和数据源内部的分批一致，不会多发请求)
+        chunk_size = getattr(self.provider, 'batch_size', 100)
+        chunks = [symbols[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        chunk_of = {symbol: k for k, chunk in enumerate(chunks) for symbol in chunk}
+        parallel = self.cpu_workers and total >= self.min_parallel
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=1) as price_pool, \
+                (ProcessPoolExecutor(max_workers=self.cpu_workers) if parallel else contextlib.nullcontext()) as cpu_pool:
+            # 1. 价格 (批量请求) 在后台一批一批地拉，每批到了顺便把这批的形态一次识别完
+            price_futures = [price_pool.submit(self._fetch_chunk, chunk, period) for chunk in chunks]
+            pending = {}  # 进程池里还没算完的 future -> symbol
+
+            # 2. 基本面逐只到达 (缓存命中的马上就有)，价格也到了就开始算
+            for symbol, fund_data in self.provider.iter_fundamentals(symbols, self.io_workers):
+                price_frames, pattern_masks = price_futures[chunk_of[symbol]].result()
+                df = price_frames.get(symbol)
+                if df is None or df.empty:
+                    # 没有数据的直接算作完成
+                    done += 1
+                    yield done, total, None
+                    continue
+
+                task = (symbol, df, fund_data, strategy, pattern_masks.get(symbol))
+                if cpu_pool is not None:
+                    try:
+                        pending[cpu_pool.submit(_evaluate_timed, *task)] = symbol
+                    except Exception as e:
+                        # 进程池坏了 (例如 worker 被系统杀掉)：剩下的在当前进程里算
+                        print(f"⚠️ 进程池不可用，改为在当前进程计算: {e}")
+                        cpu_pool = None
+                if cpu_pool is None:
+                    done += 1
+                    yield done, total, evaluate_symbol(*task)
+
+                # 已经算完的先产出，不用等基本面全部到齐
+                for future in [f for f in pending if f.done()]:
+                    done += 1
+                    yield done, total, self._task_result(future, pending.pop(future))
+
+            # 3. 进程池里剩下的
+            for future in as_completed(list(pending)):
+                done += 1
+                yield done, total, self._task_result(future, pending[future])
+
+    def _fetch_chunk(self, symbols, period):
+        """
+        拉一批股票的价格，并一次识别这批股票最后一根 K 线的形态
+        :return: ({symbol: DataFrame}, {symbol: 形态位掩码})，失败时两个都是空字典 (这批股票算作没有数据)
+        """
+        try:
+            with inst.span('scanner.fetch'):
+                price_frames = self.provider.split_panel(self.provider.get_price_history_many(symbols, period))
+            # 这批股票的最后几根K线叠在一起，一次识别所有形态
+            with inst.span('scanner.patterns'):
+                pattern_masks = self.pattern_engine.detect_latest(price_frames)
+            return price_frames, pattern_masks
+        except Exception as e:
+            print(f"❌ 获取价格失败 ({len(symbols)} 只股票): {e}")
+            return {}, {}
+
+    @staticmethod
+    def _task_result(future, symbol):
+        """
+        取进程池任务的结果，顺便把 worker 里量的信号耗时记到当前进程
+        序列化失败、worker 崩溃 (BrokenProcessPool) 等只影响这一只股票
+        """
+        try:
+            row, timing = future.result()
+        except Exception as e:
+            print(f"❌ 扫描 {symbol} 出错: {e}")
+            return None
+        _record_signals(timing)
+        return row
+
+    def scan_market(self, strategy, symbols=None, progress_callback=None):
+        """
+        扫描整个股票池
+        :param progress_callback: 进度回调 callback(已完成数量, 总数量, 结果行或 None)，
+                                  界面用它更新进度条，命令行/测试可以不传
+        :return: 扫描结果 DataFrame (按输入顺序排列)
+        """
         if symbols is None:
             symbols = self.default_list
-            
+
         results = []
-        progress_bar = st.progress(0)
-        
-        print(f"🕵️ 开始扫描 {len(symbols)} 只股票...")
-        
-        for i, symbol in enumerate(symbols):
-            # 更新进度条
-            progress_bar.progress((i + 1) / len(symbols))
-            
-            try:
-                # 1. 获取价格数据
-                df = self.provider.get_price_history(symbol, period="2y")
-                if df.empty: continue
-                
-                # 2. 获取基本面数据 (Day 11 新增)
-                fund_data = self.provider.get_fundamentals(symbol) # <--- 调用刚才写的方法
-                
-                # 3. 识别形态
-                recognizer = PatternRecognizer(df)
-                patterns_df = recognizer.detect_patterns()
-                last_pat = patterns_df.iloc[-1]
-                
-                pattern_tags = []
-                if last_pat['Pattern_Hammer']: pattern_tags.append("🔨 Hammer")
-                if last_pat['Pattern_Doji']: pattern_tags.append("➕ Doji")
-                if last_pat['Pattern_Bullish_Engulfing']: pattern_tags.append("🐂 Bullish")
-                pattern_str = ", ".join(pattern_tags) if pattern_tags else "-"
-
-                # 4. 运行策略
-                signals = strategy.generate_signals(df)
-                last_row = signals.iloc[-1]
-                
-                # 5. 判断状态
-                status = "Wait"
-                if last_row['Position'] == 1: status = "🔺 BUY"
-                elif last_row['Position'] == -1: status = "🔻 SELL"
-                elif last_row['Signal'] == 1: status = "✅ Holding"
-                else: status = "⚪ Empty"
-                
-                # 6. 收集结果 (合并基本面数据)
-                # 我们把 fund_data 里的字段拆开存进去
-                mc_billions = fund_data['MarketCap'] / 1e9 # 转换为十亿 (B)
-                
-                results.append({
-                    'Symbol': symbol,
-                    'Price': round(last_row['Close'], 2),
-                    'Status': status,
-                    'Pattern': pattern_str,
-                    'Sector': fund_data['Sector'],       # <--- 新增
-                    'PE': round(fund_data['PE_Ratio'], 2) if fund_data['PE_Ratio'] else 0, # <--- 新增
-                    'Mkt Cap (B)': round(mc_billions, 2), # <--- 新增
-                    'Date': str(last_row.name)[:10]
-                })
-                
-            except Exception as e:
-                print(f"❌ 扫描 {symbol} 出错: {e}")
-                
-        progress_bar.empty()
-        return pd.DataFrame(results)
\ No newline at end of file
+        for done, total, row in self.iter_scan(strategy, symbols):
+            if row is not None:
+                results.append(row)
+            if progress_callback is not None:
+                progress_callback(done, total, row)
+
+        # 进程池按完成顺序返回，这里恢复成输入顺序
+        order = {symbol: i for i, symbol in enumerate(symbols)}
+        results.sort(key=lambda r: order.get(r['Symbol'], len(order)))
+        return pd.DataFrame(results)
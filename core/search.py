@@ -0,0 +1,119 @@
+# core/search.py
+"""
+自适应参数搜索 (网格太大、不想全部回测时用)
+
+random_search      : 在有效组合里随机抽 budget 个
+successive_halving : 先在较短的近期历史上粗筛一大批，每一轮只留最好的 1/eta，历史逐轮加长，最后一轮用全部历史
+tpe_search         : 基于模型的搜索 (TPE 思路)：按已有结果分成好/坏两组，挑 "像好组、不像坏组" 的组合继续试
+
+搜索空间就是参数网格本身 (和暴力搜索一致)，所以结果表格式也一样
+evaluate 回调由 StrategyOptimizer 提供：evaluate(参数列表, K线数) -> 结果行列表 (含 'Return (%)')
+"""
+import math
+import numpy as np
+
+SCORE = 'Return (%)'
+
+
+def random_search(combos: list, evaluate, budget: int, rng) -> list:
+    """
+    :param combos: 全部有效参数组合
+    :param budget: 最多回测多少次
+    :param rng: np.random.Generator
+    :return: 结果行列表 (全部历史)
+    """
+    picks = rng.permutation(len(combos))[:budget]
+    return evaluate([combos[i] for i in picks], None)
+
+
+def halving_schedule(budget: int, n_candidates: int, eta=3, min_fraction=1 / 9) -> list:
+    """
+    :return: [(本轮组合数, 本轮用的历史比例), ...]，所有轮的回测次数加起来不超过 budget
+    """
+    rungs = max(1, int(math.floor(math.log(1 / min_fraction, eta) + 1e-9)) + 1)
+    fractions = [eta ** -(rungs - 1 - k) for k in range(rungs)]
+    # 第一轮 n 个，之后每轮 n / eta^k 个，总数 ≈ n * sum(eta^-k)
+    n = min(n_candidates, int(budget / sum(eta ** -k for k in range(rungs))))
+    schedule = []
+    for k, fraction in enumerate(fractions):
+        size = max(1, n // eta ** k)
+        schedule.append((size, fraction))
+    return schedule
+
+
+def successive_halving(combos: list, evaluate, budget: int, rng, n_bars: int,
+                       eta=3, min_fraction=1 / 9, min_bars=250) -> list:
+    """
+    :param n_bars: 全部历史的 K 线数
+    :param eta: 每轮淘汰比例 (只留 1/eta)
+    :param min_fraction: 第一轮用的历史比例 (取最近的一段)
+    :param min_bars: 每轮至少用多少根 K 线 (太短的话长周期指标还没算出来)
+    :return: 最后一轮 (全部历史) 的结果行列表
+    """
+    schedule = halving_schedule(budget, len(combos), eta, min_fraction)
+    survivors = [combos[i] for i in rng.permutation(len(combos))[:schedule[0][0]]]
+    rows = []
+    for size, fraction in schedule:
+        survivors = survivors[:size]
+        bars = None if fraction >= 1 else min(n_bars, max(min_bars, int(n_bars * fraction)))
+        print(f"   ✂️ 逐轮淘汰: {len(survivors)} 组参数 × {bars or n_bars} 根K线")
+        rows = evaluate(survivors, bars)
+        # 按本轮成绩排序，下一轮只留前面的
+        order = sorted(range(len(rows)), key=lambda i: rows[i][SCORE], reverse=True)
+        survivors = [survivors[i] for i in order]
+    return rows
+
+
+def _parzen(indices: np.ndarray, n_values: int, bandwidth: float) -> np.ndarray:
+    """离散取值上的核密度 (按取值序号做高斯平滑，再加一点均匀先验，保证没试过的区域也有机会)"""
+    grid = np.arange(n_values)
+    density = np.full(n_values, 1.0 / n_values)
+    if len(indices):
+        kernel = np.exp(-0.5 * ((grid[None, :] - indices[:, None]) / bandwidth) ** 2).sum(axis=0)
+        density = density + kernel / kernel.sum()
+    return density / density.sum()
+
+
+def tpe_search(combos: list, evaluate, budget: int, rng, n_startup=10, gamma=0.25) -> list:
+    """
+    :param n_startup: 前几次先随机试，有了数据再建模型
+    :param gamma: 成绩最好的这部分算 "好组"
+    :return: 结果行列表 (全部历史)
+    """
+    names = list(combos[0])
+    values = [sorted({p[name] for p in combos}) for name in names]
+    position = [{v: i for i, v in enumerate(vals)} for vals in values]
+    # 每个组合在各维度上的取值序号 (组合数 × 参数个数)
+    coords = np.array([[position[d][p[name]] for d, name in enumerate(names)] for p in combos])
+
+    budget = min(budget, len(combos))
+    tried = np.zeros(len(combos), dtype=bool)
+    scores = []
+    rows = []
+
+    def run(i):
+        tried[i] = True
+        row = evaluate([combos[i]], None)[0]
+        rows.append(row)
+        scores.append((i, row[SCORE]))
+
+    for i in rng.permutation(len(combos))[:min(n_startup, budget)]:
+        run(int(i))
+
+    while len(rows) < budget:
+        ranked = sorted(scores, key=lambda s: s[1], reverse=True)
+        n_good = max(1, int(math.ceil(gamma * len(ranked))))
+        good = np.array([i for i, _ in ranked[:n_good]])
+        bad = np.array([i for i, _ in ranked[n_good:]], dtype=int)
+
+        # l(x) / g(x)：各维度独立建模，取值越像好组、越不像坏组，比值越大
+        ratio = np.ones(len(combos))
+        for d, vals in enumerate(values):
+            bandwidth = max(1.0, len(vals) / 10)
+            l = _parzen(coords[good, d], len(vals), bandwidth)
+            g = _parzen(coords[bad, d], len(vals), bandwidth)
+            ratio *= (l / g)[coords[:, d]]
+        ratio[tried] = -np.inf
+        run(int(np.argmax(ratio)))
+
+    return rows
@@ -0,0 +1,95 @@
+# core/shared_frame.py
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+
+def _open_shm(name):
+    """
+    按名字映射已有的共享内存
+    Python 3.13+ 用 track=False：worker 只是借用，不在 resource_tracker 里登记，退出时不会误报泄漏
+    更早的版本 worker 和主进程共用同一个 resource_tracker，重复登记会被去重，由主进程 unlink 时注销
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrame:
+    """
+    把价格 DataFrame 放进共享内存，进程池里的每个 worker 直接映射同一块内存
+    这样数据只拷贝一次，而不是每个任务都 pickle 一份
+
+    用法:
+        shared = SharedFrame(df)          # 主进程
+        spec = shared.spec                # 可以 pickle，传给 worker 的 initializer
+        df, handles = SharedFrame.attach(spec)  # worker 里还原成 DataFrame
+        SharedFrame.detach(handles)       # worker 退出前关闭映射 (先丢掉 DataFrame)
+        shared.release()                  # 主进程用完后释放
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        values = df.to_numpy(dtype=float)
+        is_datetime = isinstance(df.index, pd.DatetimeIndex)
+        # 日期索引按 int64 存，同时记下原来的 dtype (pandas 3 默认是微秒 'M8[us]'，不能假设是纳秒)
+        # 带时区的索引 .values 是 UTC 时间，还原时再转回原时区
+        index = df.index.values.view('i8') if is_datetime else np.asarray(df.index, dtype=np.int64)
+
+        self._values_shm = self._copy_to_shm(values)
+        self._index_shm = self._copy_to_shm(index)
+
+        self.spec = {
+            'values': (self._values_shm.name, values.shape, values.dtype.str),
+            'index': (self._index_shm.name, index.shape, index.dtype.str),
+            'columns': list(df.columns),
+            'is_datetime': is_datetime,
+            'index_dtype': df.index.values.dtype.str if is_datetime else None,
+            'tz': str(df.index.tz) if is_datetime and df.index.tz is not None else None,
+            'index_name': df.index.name,
+        }
+
+    @staticmethod
+    def _copy_to_shm(array: np.ndarray):
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        return shm
+
+    @staticmethod
+    def attach(spec: dict):
+        """
+        worker 端：映射共享内存并还原 DataFrame
+        :return: (DataFrame, 共享内存句柄列表)，句柄必须一直持有，否则内存会被回收
+        """
+        handles = []
+        arrays = {}
+        for key in ('values', 'index'):
+            name, shape, dtype = spec[key]
+            shm = _open_shm(name)
+            handles.append(shm)
+            arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+        if spec['is_datetime']:
+            index = pd.DatetimeIndex(arrays['index'].view(np.dtype(spec['index_dtype'])))
+            if spec['tz'] is not None:
+                index = index.tz_localize('UTC').tz_convert(spec['tz'])
+        else:
+            index = pd.Index(arrays['index'])
+        index.name = spec['index_name']
+        df = pd.DataFrame(arrays['values'], index=index, columns=spec['columns'], copy=False)
+        return df, handles
+
+    @staticmethod
+    def detach(handles):
+        """worker 端：关闭映射 (不删除共享内存，删除由主进程 release 负责)"""
+        for shm in handles:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # 还有数组引用着这块内存，进程退出时系统会回收映射
+
+    def release(self):
+        """主进程释放共享内存"""
+        for shm in (self._values_shm, self._index_shm):
+            shm.close()
+            shm.unlink()
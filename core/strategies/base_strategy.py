@@ -14,4 +14,61 @@ class BaseStrategy(ABC):
         输出带有 'Signal' 列的 DataFrame
         Signal 定义: 1 (买入), -1 (卖入), 0 (观望)
         """
-        pass
\ No newline at end of file
+        pass
+
+    @classmethod
+    def valid_params(cls, **params) -> bool:
+        """
+        参数组合是否有意义 (参数优化时用来跳过无效组合)
+        例如双均线要求 短期 < 长期，子类按需覆盖
+        """
+        return True
+
+    # ---------- 只看最后一根 K 线 (扫描用) ----------
+
+    @property
+    def lookback(self):
+        """
+        算出最后一根 K 线的 Signal 至少需要多少根 K 线
+        None 表示依赖全部历史 (例如带状态机的策略)，子类按需覆盖
+        """
+        return None
+
+    def evaluate_latest(self, df: pd.DataFrame) -> pd.Series:
+        """
+        只在末尾 lookback + 1 根 K 线上跑 generate_signals，返回最后一行 (含 Close/Signal/Position)
+        多取的 1 根是为了算出 Position (今天 Signal - 昨天 Signal)
+        扫描几千只股票时，计算量只和 lookback 有关，和历史长度无关
+        """
+        if self.lookback is not None:
+            df = df.iloc[-(self.lookback + 1):]
+        return self.generate_signals(df).iloc[-1]
+
+    # ---------- 增量模式 (每来一根新 K 线更新一次，不重算整段历史) ----------
+
+    def reset(self):
+        """清空增量状态，子类在这里初始化自己的在线指标"""
+        raise NotImplementedError(f"{type(self).__name__} 不支持增量模式")
+
+    def update(self, bar) -> int:
+        """
+        输入一根新的 K 线 (dict 或 Series，包含 Open/High/Low/Close)
+        返回这根 K 线收盘后的 Signal (1 持有, 0 空仓)，和 generate_signals 的最后一行一致
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持增量模式")
+
+    def _record_signal(self, signal: int) -> int:
+        """记录信号并算出买卖动作 (Position = 今天 Signal - 昨天 Signal)"""
+        prev = getattr(self, 'last_signal', None)
+        self.last_position = float('nan') if prev is None else signal - prev
+        self.last_signal = signal
+        return signal
+
+    def replay(self, df: pd.DataFrame) -> pd.Series:
+        """
+        从头用增量模式逐根跑一遍，返回 Signal 序列
+        用来和批量版对比: (strategy.replay(df) == strategy.generate_signals(df)['Signal']).all()
+        """
+        self.reset()
+        signals = [self.update(bar) for bar in df.to_dict('records')]
+        return pd.Series(signals, index=df.index, name='Signal')
@@ -1,21 +1,45 @@
 # core/strategies/ma_cross.py
 import pandas as pd
-import pandas_ta as ta
+from core import indicators
 from .base_strategy import BaseStrategy
+from core.online_indicators import RollingSMA
 
 class MovingAverageCrossStrategy(BaseStrategy):
     def __init__(self, short_window=20, long_window=50):
         self.short_window = short_window
         self.long_window = long_window
 
+    @classmethod
+    def valid_params(cls, short_window=20, long_window=50, **params) -> bool:
+        # 必须保证 短期 < 长期，否则没意义
+        return short_window < long_window
+
+    @property
+    def lookback(self):
+        # 长期均线需要 long_window 根 K 线，结果和用全部历史算完全一致
+        return self.long_window
+
+    def reset(self):
+        self._online = (RollingSMA(self.short_window), RollingSMA(self.long_window))
+        self.last_signal = None
+
+    def update(self, bar) -> int:
+        if getattr(self, '_online', None) is None:
+            self.reset()
+        short_sma, long_sma = self._online
+        short_val = short_sma.update(bar['Close'])
+        long_val = long_sma.update(bar['Close'])
+        # NaN 比较为 False，数据不足时保持空仓，和批量版一致
+        return self._record_signal(1 if short_val > long_val else 0)
+
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         # 1. 创建副本，避免修改原始数据
         signals = df.copy()
 
-        # 2. 使用 pandas_ta 计算均线
+        # 2. 使用 pandas_ta 计算均线 (经过共享缓存，同样的数据和周期只算一次)
         # SMA: Simple Moving Average
-        signals['SMA_Short'] = ta.sma(signals['Close'], length=self.short_window)
-        signals['SMA_Long'] = ta.sma(signals['Close'], length=self.long_window)
+        signals['SMA_Short'] = indicators.sma(signals['Close'], self.short_window)
+        signals['SMA_Long'] = indicators.sma(signals['Close'], self.long_window)
 
         # 3. 初始化信号列
         signals['Signal'] = 0
@@ -1,20 +1,45 @@
 # core/strategies/macd.py
 import pandas as pd
-import pandas_ta as ta
+from core import indicators
 from .base_strategy import BaseStrategy
+from core.online_indicators import OnlineMACD
 
 class MacdStrategy(BaseStrategy):
+    # EMA 的记忆是无限长的，截断后初始值的影响按 (1 - 2/(n+1))^k 衰减
+    # 预热 10 倍 (slow + signal) 根 K 线后误差远小于价格精度
+    WARMUP_FACTOR = 10
+
     def __init__(self, fast=12, slow=26, signal=9):
         self.fast = fast
         self.slow = slow
         self.signal = signal
 
+    @classmethod
+    def valid_params(cls, fast=12, slow=26, signal=9, **params) -> bool:
+        # 快线周期必须小于慢线
+        return fast < slow
+
+    @property
+    def lookback(self):
+        return self.WARMUP_FACTOR * (self.slow + self.signal)
+
+    def reset(self):
+        self._online = OnlineMACD(self.fast, self.slow, self.signal)
+        self.last_signal = None
+
+    def update(self, bar) -> int:
+        if getattr(self, '_online', None) is None:
+            self.reset()
+        macd, macd_signal = self._online.update(bar['Close'])
+        # 金叉: MACD > Signal
+        return self._record_signal(1 if macd > macd_signal else 0)
+
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         signals = df.copy()
         
         # 1. 计算 MACD
         # pandas_ta 的 macd 函数会返回三列: MACD, Histogram, Signal
-        macd_df = ta.macd(signals['Close'], fast=self.fast, slow=self.slow, signal=self.signal)
+        macd_df = indicators.macd(signals['Close'], self.fast, self.slow, self.signal)
         
         # 因为列名可能会变 (比如 MACD_12_26_9)，我们需要按位置或者重命名
         # 通常列顺序是: macd, histogram, signal
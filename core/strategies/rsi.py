@@ -1,7 +1,8 @@
 # core/strategies/rsi.py
 import pandas as pd
-import pandas_ta as ta
+from core import indicators
 from .base_strategy import BaseStrategy
+from core.online_indicators import OnlineRSI
 import numpy as np
 
 class RsiStrategy(BaseStrategy):
@@ -10,11 +11,37 @@ class RsiStrategy(BaseStrategy):
         self.buy_threshold = buy_threshold
         self.sell_threshold = sell_threshold
 
+    @classmethod
+    def valid_params(cls, period=14, buy_threshold=30, sell_threshold=70, **params) -> bool:
+        # 买入阈值 (超卖) 必须低于卖出阈值 (超买)
+        return buy_threshold < sell_threshold
+
+    @property
+    def lookback(self):
+        # 持仓态度取决于最近一次触发阈值的时间，可能在很久以前，只能用全部历史
+        return None
+
+    def reset(self):
+        self._online = OnlineRSI(self.period)
+        self._stance = 0  # 持仓态度：一开始空仓
+        self.last_signal = None
+
+    def update(self, bar) -> int:
+        if getattr(self, '_online', None) is None:
+            self.reset()
+        rsi = self._online.update(bar['Close'])
+        # 和批量版的 ffill 状态机一样：触发阈值才改变态度，否则保持现状
+        if rsi < self.buy_threshold:
+            self._stance = 1
+        if rsi > self.sell_threshold:
+            self._stance = 0
+        return self._record_signal(self._stance)
+
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         signals = df.copy()
         
         # 1. 计算 RSI
-        signals['RSI'] = ta.rsi(signals['Close'], length=self.period)
+        signals['RSI'] = indicators.rsi(signals['Close'], self.period)
         
         # 2. 初始化信号
         signals['Signal'] = 0
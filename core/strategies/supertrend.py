@@ -1,7 +1,8 @@
 # core/strategies/supertrend.py
 import pandas as pd
-import pandas_ta as ta
+from core import indicators
 from .base_strategy import BaseStrategy
+from core.online_indicators import OnlineSuperTrend
 
 class SuperTrendStrategy(BaseStrategy):
     def __init__(self, period=10, multiplier=3.0):
@@ -12,6 +13,22 @@ class SuperTrendStrategy(BaseStrategy):
         self.period = period
         self.multiplier = multiplier
 
+    @property
+    def lookback(self):
+        # 上下轨是逐根 "棘轮" 式收紧的，方向取决于整段路径，只能用全部历史
+        return None
+
+    def reset(self):
+        self._online = OnlineSuperTrend(self.period, self.multiplier)
+        self.last_signal = None
+
+    def update(self, bar) -> int:
+        if getattr(self, '_online', None) is None:
+            self.reset()
+        _, direction = self._online.update(bar['High'], bar['Low'], bar['Close'])
+        # 1 (绿线) -> 持有, -1 (红线) -> 空仓
+        return self._record_signal(1 if direction == 1 else 0)
+
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         signals = df.copy()
         
@@ -19,8 +36,8 @@ class SuperTrendStrategy(BaseStrategy):
         # pandas_ta 的 supertrend 会返回两列：
         # SUPERT_{period}_{multiplier}: 趋势线数值
         # SUPERTd_{period}_{multiplier}: 方向 (1 为涨, -1 为跌)
-        st_data = ta.supertrend(signals['High'], signals['Low'], signals['Close'], 
-                                length=self.period, multiplier=self.multiplier)
+        st_data = indicators.supertrend(signals['High'], signals['Low'], signals['Close'],
+                                        self.period, self.multiplier)
         
         # 把列名标准化，方便后面用
         # 列名通常比较长，比如 SUPERT_10_3.0，我们直接按位置取
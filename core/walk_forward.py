@@ -0,0 +1,175 @@
+# core/walk_forward.py
+"""
+滚动前推 (walk-forward) 优化
+
+把历史切成若干折：每折在训练段上选出最优参数，再拿到紧接着的测试段上检验 (样本外)
+- 所有参数组合的信号在整段历史上只算一次 (指标也只算一次)，每折只是对信号矩阵切片
+- 每折的结果按 (截至测试段末尾的 OHLC 数据指纹, 策略, 参数网格, 切分位置) 缓存
+  历史往后延长时，已有的折数据没变，直接命中缓存，只算新增的折
+  内存缓存只在当前进程有效；传入 OptimizerResultStore 时折结果同时存进 SQLite，重启后也能复用
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from core.backtester import evaluate_signal_matrix, to_percent
+from core.grid_search import sma_matrix
+from core.indicators import IndicatorCache, fingerprint
+from core.result_store import params_key
+
+# 折结果缓存 (结果是小字典，只按条目数限制)
+fold_cache = IndicatorCache(max_entries=8192)
+
+DATE_COLUMNS = ('Train Start', 'Train End', 'Test Start', 'Test End')
+
+
+def walk_forward_splits(n_bars: int, train_size: int, test_size: int, step=None, anchored=False) -> list:
+    """
+    生成切分位置 (只保留完整的测试段，延长历史时前面的折不会变)
+    :param train_size: 训练段 K 线数 (anchored=True 时是第一折的训练长度)
+    :param test_size: 测试段 K 线数
+    :param step: 每折往后挪多少根 (默认等于 test_size，测试段首尾相接)
+    :param anchored: True 时训练段始终从第一根开始 (扩张窗口)，False 时固定长度滚动
+    :return: [(train_start, train_end, test_start, test_end), ...]，左闭右开
+    """
+    step = step or test_size
+    splits = []
+    train_end = train_size
+    while train_end + test_size <= n_bars:
+        train_start = 0 if anchored else train_end - train_size
+        splits.append((train_start, train_end, train_end, train_end + test_size))
+        train_end += step
+    return splits
+
+
+def _signal_matrix(df, strategy_class, combos) -> np.ndarray:
+    """所有参数组合的持仓信号 (K线数 × 组合数)，整段历史只算一次"""
+    from core.strategies.ma_cross import MovingAverageCrossStrategy
+
+    ma_params = ('short_window', 'long_window')
+    if strategy_class is MovingAverageCrossStrategy and all(name in p for p in combos for name in ma_params):
+        # 双均线：所有窗口的 SMA 一次算完，信号直接用矩阵比较
+        windows = sorted({p[name] for p in combos for name in ma_params})
+        column_of = {w: j for j, w in enumerate(windows)}
+        smas = sma_matrix(df['Close'], windows)
+        short_cols = [column_of[p['short_window']] for p in combos]
+        long_cols = [column_of[p['long_window']] for p in combos]
+        with np.errstate(invalid='ignore'):
+            return (smas[:, short_cols] > smas[:, long_cols]).astype(float)
+
+    # 其他策略 (或双均线网格里没同时给出两个窗口) 逐个生成信号 (指标走共享缓存，同样的周期只算一次)
+    return np.column_stack([
+        strategy_class(**params).generate_signals(df)['Signal'].to_numpy(dtype=float)
+        for params in combos
+    ])
+
+
+def walk_forward(df: pd.DataFrame, strategy_class, combos: list, train_size=252, test_size=63,
+                 step=None, anchored=False, metric='total_return', initial_capital=10000,
+                 cache=fold_cache, store=None) -> pd.DataFrame:
+    """
+    :param combos: 参数组合列表 (例如 expand_grid 的结果)
+    :param metric: 训练段上用哪个指标选参数 (evaluate_signal_matrix 的字段，越大越好)
+    :param cache: 折结果缓存 (进程内)，传 None 表示不缓存
+    :param store: OptimizerResultStore，给了就把折结果存进 SQLite (跨进程、重启后复用)
+    :return: 每折一行：训练/测试段起止日期、选中的参数、训练段收益、测试段收益/回撤/胜率
+    """
+    close = df['Close']
+    # 缓存键用所有价格列 (例如 SuperTrend 还要用 High/Low，只看收盘价会误用别的数据算出的结果)
+    prices = df[[c for c in ('Open', 'High', 'Low', 'Close', 'Volume') if c in df.columns]]
+    splits = walk_forward_splits(len(df), train_size, test_size, step, anchored)
+    if not combos or not splits:
+        return pd.DataFrame()
+
+    grid_key = [strategy_class.__name__, [params_key(p) for p in combos], metric, float(initial_capital)]
+    close_values = close.to_numpy(dtype=float)
+    state = {}  # 信号矩阵只在有折没命中缓存时才算
+
+    def compute(train_start, train_end, test_start, test_end):
+        if 'signals' not in state:
+            state['signals'] = _signal_matrix(df, strategy_class, combos)
+        signals = state['signals']
+
+        train = evaluate_signal_matrix(close_values[train_start:train_end],
+                                       signals[train_start:train_end], initial_capital)
+        best = int(np.nanargmax(train[metric]))
+
+        # 测试段从前一根开始切：测试段第一天的收益用的是前一天收盘时的持仓，各折测试段首尾相接
+        test = evaluate_signal_matrix(close_values[test_start - 1:test_end],
+                                      signals[test_start - 1:test_end, [best]], initial_capital)
+        return {
+            'Train Start': close.index[train_start],
+            'Train End': close.index[train_end - 1],
+            'Test Start': close.index[test_start],
+            'Test End': close.index[test_end - 1],
+            **combos[best],
+            'IS Return (%)': to_percent(train['total_return'][best]),
+            'OOS Return (%)': to_percent(test['total_return'][0]),
+            'OOS Drawdown (%)': to_percent(test['max_drawdown'][0]),
+            'OOS Win Rate': f"{test['win_rate'][0]:.2%}",
+        }
+
+    if cache is None and store is None:
+        return pd.DataFrame([compute(*split) for split in splits])
+
+    # 结果只取决于测试段末尾之前的数据，前缀指纹不变就能复用
+    keys = [fold_key(fingerprint(prices.iloc[:split[3]]), grid_key, split) for split in splits]
+    stored = store.get_folds(keys) if store is not None else {}
+    computed = {}
+
+    def load_or_compute(key, split):
+        if key in stored:
+            return _decode_fold(stored[key], close.index)
+        computed[key] = compute(*split)
+        return computed[key]
+
+    rows = []
+    for key, split in zip(keys, splits):
+        if cache is None:
+            rows.append(load_or_compute(key, split))
+        else:
+            rows.append(cache.get_or_compute(key, lambda key=key, split=split: load_or_compute(key, split)))
+
+    if store is not None and computed:
+        store.put_folds({key: _encode_fold(row) for key, row in computed.items()})
+    return pd.DataFrame(rows)
+
+
+def fold_key(data_fingerprint: str, grid_key: list, split: tuple) -> str:
+    """折结果的缓存键 (字符串，进程内缓存和 SQLite 共用)"""
+    raw = json.dumps([data_fingerprint, grid_key, list(split)], sort_keys=True)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _encode_fold(row: dict) -> dict:
+    """日期转成 ISO 字符串才能存成 JSON"""
+    return {k: v.isoformat() if k in DATE_COLUMNS else v for k, v in row.items()}
+
+
+def _decode_fold(row: dict, index: pd.Index) -> dict:
+    # 日期换回和价格索引同样精度 / 时区的 Timestamp，和直接算出来的结果一致
+    unit = getattr(index, 'unit', 'ns')
+    tz = getattr(index, 'tz', None)
+
+    def to_timestamp(value):
+        ts = pd.Timestamp(value).as_unit(unit)
+        return ts.tz_convert(tz) if tz is not None else ts
+
+    return {k: to_timestamp(v) if k in DATE_COLUMNS else v for k, v in row.items()}
+
+
+def summarize(folds: pd.DataFrame) -> dict:
+    """
+    汇总各折的样本外表现
+    :return: {'folds', 'oos_return_pct' (各测试段连起来的复利收益), 'profitable_folds_pct'}
+    """
+    if folds.empty:
+        return {'folds': 0, 'oos_return_pct': 0.0, 'profitable_folds_pct': 0.0}
+    oos = folds['OOS Return (%)'] / 100
+    return {
+        'folds': len(folds),
+        'oos_return_pct': to_percent(float(np.prod(1 + oos) - 1)),
+        'profitable_folds_pct': to_percent(float((oos > 0).mean())),
+    }
@@ -0,0 +1,139 @@
+# data/feed_sources.py
+"""
+新闻 RSS 的数据来源 (NewsProvider 通过它拿原始 feed，换个来源不用改解析逻辑)
+
+HttpFeedSource      : Google News RSS，带磁盘缓存 + 条件请求 (ETag / Last-Modified)
+DirectoryFeedSource : 从本地目录读 <SYMBOL>.xml，离线调试 / 测试用，不走网络
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+def _new_session():
+    # requests 只有真的要联网时才导入 (离线调试用 DirectoryFeedSource 时完全不加载)
+    import requests
+    return requests.Session()
+
+
+class HttpFeedSource:
+    URL_TEMPLATE = "https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
+
+    def __init__(self, cache_dir='data/cache/news', refresh_interval=600, timeout=10,
+                 url_template=URL_TEMPLATE, session=None):
+        """
+        :param cache_dir: feed 缓存目录
+        :param refresh_interval: 缓存在这么多秒内直接使用，不发请求
+        :param timeout: 单次请求超时 (秒)
+        :param session: requests.Session，默认新建一个 (多线程共享连接池)
+        """
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.url_template = url_template
+        self.session = session or _new_session()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(self, symbol: str) -> bytes:
+        """
+        获取 symbol 的原始 RSS
+        1. 缓存没过刷新间隔 -> 直接读磁盘
+        2. 否则带 If-None-Match / If-Modified-Since 发请求，304 说明没变化，继续用缓存
+        3. 请求失败时有旧缓存就退回旧缓存
+        """
+        url = self.url_template.format(symbol=symbol)
+        body_path, meta_path = self._paths(url)
+        meta = self._load_meta(meta_path)
+        has_body = meta is not None and os.path.exists(body_path)
+
+        # 1. 缓存还新鲜
+        if has_body and time.time() - meta['fetched_at'] < self.refresh_interval:
+            return self._read(body_path)
+
+        # 2. 条件请求
+        headers = {}
+        if has_body:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        import requests
+        try:
+            resp = self.session.get(url, headers=headers, timeout=self.timeout)
+            if resp.status_code == 304 and has_body:
+                meta['fetched_at'] = time.time()
+                self._write_meta(meta_path, meta)
+                return self._read(body_path)
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            # 3. 网络出错，退回旧缓存
+            if has_body:
+                print(f"⚠️ {symbol} 新闻刷新失败，使用缓存: {e}")
+                return self._read(body_path)
+            raise
+
+        self._atomic_write(body_path, resp.content)
+        self._write_meta(meta_path, {
+            'url': url,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        })
+        return resp.content
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.xml', base + '.json'
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _load_meta(path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def _write_meta(cls, path, meta):
+        cls._atomic_write(path, json.dumps(meta).encode('utf-8'))
+
+    @staticmethod
+    def _atomic_write(path, content: bytes):
+        """
+        先写临时文件再 os.replace
+        临时文件名每次唯一：get_company_news_many 的线程池里可能有两个线程同时写同一个 feed
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class DirectoryFeedSource:
+    """从本地目录读取 feed 文件 (<SYMBOL>.xml)，没有文件就当作没有新闻"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, symbol: str) -> bytes:
+        path = os.path.join(self.directory, f"{symbol}.xml")
+        if not os.path.exists(path):
+            return b""
+        with open(path, 'rb') as f:
+            return f.read()
@@ -0,0 +1,70 @@
+# data/fundamentals_cache.py
+import json
+import os
+import sqlite3
+import time
+
+
+class FundamentalsCache:
+    """
+    基本面数据缓存 (PE、行业、市值...)
+    这些数据盘中几乎不变，没必要每次扫描都调用很慢的 ticker.info
+    用 SQLite 存盘，多个进程 (多个 Streamlit 会话、命令行) 可以共享同一份缓存
+    """
+
+    def __init__(self, db_path='data/cache/fundamentals.db', ttl=6 * 3600):
+        """
+        :param db_path: SQLite 文件路径
+        :param ttl: 有效期 (秒)，默认 6 小时
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            # WAL 模式：读写互不阻塞，适合多进程同时访问
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fundamentals ("
+                " symbol TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # 每次操作单独开连接，线程池里并发调用也是安全的
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, symbol: str):
+        """取未过期的缓存，没有或已过期返回 None"""
+        return self.get_many([symbol]).get(symbol)
+
+    def get_many(self, symbols: list) -> dict:
+        """批量取未过期的缓存，只返回命中的股票"""
+        cutoff = time.time() - self.ttl
+        results = {}
+        with self._connect() as conn:
+            # 分批查询，避免超过 SQLite 的参数个数上限
+            for i in range(0, len(symbols), 500):
+                batch = symbols[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT symbol, payload FROM fundamentals"
+                    f" WHERE symbol IN ({placeholders}) AND fetched_at >= ?",
+                    [*batch, cutoff]
+                ).fetchall()
+                results.update({symbol: json.loads(payload) for symbol, payload in rows})
+        return results
+
+    def set(self, symbol: str, data: dict):
+        self.set_many({symbol: data})
+
+    def set_many(self, items: dict):
+        """批量写入 {symbol: data}，一个事务提交"""
+        if not items:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fundamentals (symbol, payload, fetched_at) VALUES (?, ?, ?)",
+                [(symbol, json.dumps(data), now) for symbol, data in items.items()]
+            )
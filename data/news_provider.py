@@ -1,79 +1,106 @@
 # data/news_provider.py
-import feedparser
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import time
-from textblob import TextBlob # <--- 确保导入了 TextBlob
+from data.feed_sources import HttpFeedSource
+from data.sentiment import SentimentEngine, sentiment_label
 
 class NewsProvider:
+    def __init__(self, feed_source=None, max_workers=16, sentiment=None):
+        """
+        :param feed_source: RSS 来源，需要有 fetch(symbol) -> bytes 方法
+                            (默认 HttpFeedSource：Google News + 磁盘缓存 + 条件请求)
+        :param max_workers: 批量获取时的并发线程数
+        :param sentiment: 情绪打分引擎 (默认 SentimentEngine，按标题缓存分数)
+        """
+        self.feed_source = feed_source or HttpFeedSource()
+        self.sentiment = sentiment or SentimentEngine()
+        self.max_workers = max_workers
+
     def get_company_news(self, symbol: str, limit=10):
         """
         使用 Google News RSS 获取最新财经新闻，并进行 AI 情绪分析
         """
         print(f"📡 正在连接 Google News RSS 获取 {symbol} 情报...")
-        
-        rss_url = f"https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
-        
-        try:
-            feed = feedparser.parse(rss_url)
-            
-            clean_news = []
-            if not feed.entries:
-                return []
 
-            for entry in feed.entries[:limit]:
-                # 1. 先定义 title (必须在 TextBlob 之前！)
-                title = entry.get('title', 'No Title')
-                link = entry.get('link', '#')
-                pub_date = entry.get('published', 'Recent')
-                
-                # 2. AI 情绪分析 (Day 12)
-                try:
-                    blob = TextBlob(title)
-                    sentiment_score = blob.sentiment.polarity # type: ignore
-                    
-                    # 给个简单的标签
-                    if sentiment_score > 0.1:
-                        sentiment_label = "Positive"
-                    elif sentiment_score < -0.1:
-                        sentiment_label = "Negative"
-                    else:
-                        sentiment_label = "Neutral"
-                except Exception:
-                    # 如果分析出错，给个默认值
-                    sentiment_score = 0
-                    sentiment_label = "Neutral"
+        news = self._fetch_and_parse(symbol, limit)
+        return self.attach_sentiment(news)
 
-                # 3. 安全获取来源
-                source = 'Google News'
-                if 'source' in entry:
-                    s_data = entry['source']
-                    if isinstance(s_data, dict):
-                        source = s_data.get('title', 'Google News')
-                
-                # 4. 清洗时间格式
-                try:
-                    dt_struct = entry.get('published_parsed')
-                    if dt_struct:
-                        # type: ignore
-                        date_str = time.strftime('%Y-%m-%d %H:%M', dt_struct) # type: ignore
-                    else:
-                        date_str = str(pub_date)[:16]
-                except:
-                    date_str = str(pub_date)
+    def get_company_news_many(self, symbols: list, limit=10):
+        """
+        并发获取多只股票的新闻 (网络请求在线程池里同时进行，总耗时约等于最慢的一次请求)
+        :return: {symbol: [news_item, ...]}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        workers = min(self.max_workers, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(symbols, pool.map(lambda s: self._fetch_and_parse(s, limit), symbols)))
+
+        # 所有股票的标题合在一起打一次分 (同一条转载新闻只算一次)
+        self.attach_sentiment([item for news in results.values() for item in news])
+        return results
+
+    def attach_sentiment(self, news: list) -> list:
+        """给新闻列表批量补上情绪分数和标签 (原地修改)"""
+        scores = self.sentiment.score_many([item['title'] for item in news]) if news else []
+        for item, score in zip(news, scores):
+            item['sentiment'] = score                 # 存入分数
+            item['label'] = sentiment_label(score)    # 存入标签
+        return news
+
+    def _fetch_and_parse(self, symbol, limit):
+        try:
+            raw = self.feed_source.fetch(symbol)
+            return self.parse_feed(raw, limit)
 
-                news_item = {
-                    'title': title,
-                    'link': link,
-                    'publisher': source,
-                    'date': date_str,
-                    'summary': '',
-                    'sentiment': sentiment_score, # 存入分数
-                    'label': sentiment_label      # 存入标签
-                }
-                clean_news.append(news_item)
-                
-            return clean_news
-            
         except Exception as e:
             print(f"❌ RSS 获取失败: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    @staticmethod
+    def parse_feed(raw: bytes, limit=10):
+        """把原始 RSS 解析成新闻列表 (不含情绪分数，由 attach_sentiment 批量补上)"""
+        if not raw:
+            return []
+        import feedparser  # 导入较慢，真正解析时才加载
+        feed = feedparser.parse(raw)
+
+        clean_news = []
+        if not feed.entries:
+            return []
+
+        for entry in feed.entries[:limit]:
+            # 1. 基本字段
+            title = entry.get('title', 'No Title')
+            link = entry.get('link', '#')
+            pub_date = entry.get('published', 'Recent')
+
+            # 2. 安全获取来源
+            source = 'Google News'
+            if 'source' in entry:
+                s_data = entry['source']
+                if isinstance(s_data, dict):
+                    source = s_data.get('title', 'Google News')
+
+            # 3. 清洗时间格式
+            try:
+                dt_struct = entry.get('published_parsed')
+                if dt_struct:
+                    # type: ignore
+                    date_str = time.strftime('%Y-%m-%d %H:%M', dt_struct) # type: ignore
+                else:
+                    date_str = str(pub_date)[:16]
+            except:
+                date_str = str(pub_date)
+
+            news_item = {
+                'title': title,
+                'link': link,
+                'publisher': source,
+                'date': date_str,
+                'summary': ''
+            }
+            clean_news.append(news_item)
+
+        return clean_news
@@ -0,0 +1,188 @@
+# data/price_cache.py
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+
+# yfinance 的 period 写法 -> 往前推多少时间
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+def normalize_index(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    统一索引为不带时区的日期
+    Ticker.history 返回带交易所时区的索引，yf.download 默认不带，不统一的话新旧数据没法合并
+    """
+    if df.empty:
+        return df
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index
+    return df
+
+
+def period_start(period: str, now: pd.Timestamp):
+    """
+    把 period ("2y", "6mo", "ytd"...) 换算成起始日期
+    :return: Timestamp; "max" 或无法识别时返回 None (表示需要全部历史)
+    """
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    offset = PERIOD_OFFSETS.get(period)
+    if offset is None:
+        return None
+    return (now - offset).normalize()
+
+
+class PriceCache:
+    """
+    本地列式 K 线缓存 (每只股票一个 Parquet 文件)
+    放在 YFinanceProvider 前面：命中时直接读盘，过期时只补最后一根之后的数据
+    """
+
+    def __init__(self, cache_dir='data/cache/prices', refresh_interval=15 * 60, gap_tolerance_days=7):
+        """
+        :param cache_dir: 缓存目录
+        :param refresh_interval: 缓存文件在多少秒内视为新鲜，不再联网 (默认 15 分钟)
+        :param gap_tolerance_days: 判断缓存是否覆盖起始日期时允许的空档 (周末、节假日)
+        """
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.gap_tolerance = pd.Timedelta(days=gap_tolerance_days)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        # BRK/B 之类的代码里有斜杠，替换掉避免建出子目录
+        safe = symbol.upper().replace('/', '_')
+        return os.path.join(self.cache_dir, f"{safe}.parquet")
+
+    def load(self, symbol: str) -> pd.DataFrame:
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        try:
+            return normalize_index(pd.read_parquet(path))
+        except Exception as e:
+            # 文件损坏就当没缓存，下次全量覆盖
+            print(f"⚠️ 缓存读取失败 {symbol}: {e}")
+            return pd.DataFrame()
+
+    def _meta_path(self, symbol: str) -> str:
+        return self._path(symbol)[:-len('.parquet')] + '.meta.json'
+
+    def save(self, symbol: str, df: pd.DataFrame, full_from=None, full=False):
+        """
+        :param full: 这次是不是按 period 全量下载的 (增量合并时为 False，不改动原来的记录)
+        :param full_from: 全量下载请求的起始日期 (None 表示 period="max")
+        """
+        if df.empty:
+            return
+        path = self._path(symbol)
+        # 先写临时文件再替换，防止写到一半进程被杀导致缓存损坏
+        self._write_atomic(path, df.to_parquet)
+        if full:
+            # 记下全量下载请求的起点：股票上市比这晚的话，第一根 K 线之前本来就没有数据，不是缓存不够长
+            meta = {'full_from': None if full_from is None else pd.Timestamp(full_from).isoformat()}
+            self._write_atomic(self._meta_path(symbol), lambda p: self._dump_json(p, meta))
+
+    @staticmethod
+    def _dump_json(path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @staticmethod
+    def _write_atomic(path, write):
+        """
+        write(临时路径) 写完再 os.replace 到 path
+        临时文件名每次唯一：同一进程里多个会话线程可能同时保存同一只股票
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def full_from(self, symbol: str):
+        """
+        :return: (是否全量下载过, 请求的起始日期)；起始日期为 None 表示下载的是全部历史 (max)
+        """
+        path = self._meta_path(symbol)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, 'r') as f:
+                value = json.load(f)['full_from']
+        except (OSError, ValueError, KeyError):
+            return False, None
+        return True, None if value is None else pd.Timestamp(value)
+
+    def is_fresh(self, symbol: str) -> bool:
+        """缓存文件是否在 refresh_interval 内刚更新过"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return False
+        return (time.time() - os.path.getmtime(path)) < self.refresh_interval
+
+    def covers(self, cached: pd.DataFrame, start, symbol=None) -> bool:
+        """
+        缓存是否已经包含 start 之后的全部历史
+        - 第一根 K 线早于 (或接近) 需要的起始日期
+        - 或者之前按更早的起点 (或 max) 全量下载过：历史比要求的短 (新股) 也算覆盖，不用每次重新下载
+        """
+        if cached.empty:
+            return False
+        if start is not None and cached.index[0] <= start + self.gap_tolerance:
+            return True
+        if symbol is None:
+            return False
+        downloaded, full_from = self.full_from(symbol)
+        if not downloaded:
+            return False
+        return full_from is None or (start is not None and full_from <= start)
+
+    @staticmethod
+    def merge(cached: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        """合并新旧数据，重叠的日期以新数据为准"""
+        if cached.empty:
+            return new
+        if new.empty:
+            return cached
+        merged = pd.concat([cached, new])
+        merged = merged[~merged.index.duplicated(keep='last')]
+        return merged.sort_index()
+
+    @staticmethod
+    def overlap_consistent(cached: pd.DataFrame, new: pd.DataFrame, rtol=1e-4) -> bool:
+        """
+        检查新旧数据重叠的第一天收盘价是否一致
+        auto_adjust 复权后，分红/拆股会让历史价格整体变化，这时增量拼接会错位，必须全量重拉
+        (调用方应从倒数第二根开始补数据，最后一根可能是盘中未收盘的价格)
+        """
+        common = cached.index.intersection(new.index)
+        if len(common) == 0:
+            return False
+        day = common[0]
+        old_close = cached.at[day, 'Close']
+        new_close = new.at[day, 'Close']
+        return abs(new_close - old_close) <= abs(old_close) * rtol
+
+    @staticmethod
+    def slice_period(df: pd.DataFrame, start) -> pd.DataFrame:
+        if df.empty or start is None:
+            return df
+        return df[df.index >= start]
@@ -7,7 +7,7 @@ class DataProvider(ABC):
     数据提供者抽象基类
     所有具体的数据源(Yahoo, FMP, Webull等)都必须继承此类
     """
-    
+
     @abstractmethod
     def get_price_history(self, symbol: str, period: str = "1y") -> pd.DataFrame:
         """
@@ -16,4 +16,42 @@ class DataProvider(ABC):
         :param period: 时间周期 (e.g., "1y", "1mo", "1d")
         :return: 标准化的 DataFrame [Open, High, Low, Close, Volume]
         """
-        pass
\ No newline at end of file
+        pass
+
+    def get_price_history_many(self, symbols: list, period: str = "1y") -> pd.DataFrame:
+        """
+        批量获取多只股票的历史价格
+        默认实现是逐个调用 get_price_history，支持批量接口的数据源应该覆盖它
+        :param symbols: 股票代码列表
+        :return: 对齐后的面板 DataFrame，列为 MultiIndex (symbol, field)，
+                 所有股票共用同一个日期索引 (某只股票没有数据的日期为 NaN)
+        """
+        frames = {symbol: self.get_price_history(symbol, period) for symbol in symbols}
+        return self.build_panel(frames)
+
+    def get_latest_prices(self, symbols: list) -> dict:
+        """
+        批量获取最新价 (最近一根 K 线的收盘价)
+        :return: {symbol: price}，没有数据的股票不会出现在结果里
+        """
+        frames = self.split_panel(self.get_price_history_many(symbols, period="5d"))
+        return {symbol: float(df['Close'].iloc[-1]) for symbol, df in frames.items() if not df.empty}
+
+    @staticmethod
+    def build_panel(frames: dict) -> pd.DataFrame:
+        """把 {symbol: DataFrame} 拼成按日期对齐的面板，空数据的股票直接丢弃"""
+        frames = {symbol: df for symbol, df in frames.items() if not df.empty}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).sort_index()
+
+    @staticmethod
+    def split_panel(panel: pd.DataFrame) -> dict:
+        """
+        面板拆回 {symbol: DataFrame}
+        去掉整行为 NaN 的日期 (上市前、停牌)，保证每只股票拿到的是自己的真实 K 线
+        """
+        if panel.empty:
+            return {}
+        symbols = panel.columns.get_level_values(0).unique()
+        return {symbol: panel[symbol].dropna(how='all') for symbol in symbols}
@@ -0,0 +1,73 @@
+# data/quote_cache.py
+import threading
+import time
+
+
+class QuoteCache:
+    """
+    最新价短时缓存 (默认 60 秒)
+    过期或没有缓存的股票合并成一次批量请求，不会每只持仓单独请求一次
+    """
+
+    def __init__(self, provider=None, ttl=60):
+        """
+        :param provider: 数据源，需要有 get_latest_prices(symbols) 方法 (默认 YFinanceProvider)
+        :param ttl: 报价有效期 (秒)
+        """
+        self._provider = provider
+        self.ttl = ttl
+        self._quotes = {}  # symbol -> (price, fetched_at)
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            from data.yfinance_provider import YFinanceProvider
+            self._provider = YFinanceProvider()
+        return self._provider
+
+    def get_prices(self, symbols: list) -> dict:
+        """
+        :return: {symbol: 最新价}，获取失败的股票不会出现在结果里
+        """
+        now = time.time()
+        # 只在查找和写入时持锁，网络请求期间不占着锁，别的线程读缓存里没过期的报价不用等
+        with self._lock:
+            prices = {}
+            stale = []
+            for symbol in dict.fromkeys(symbols):
+                cached = self._quotes.get(symbol)
+                if cached is not None and now - cached[1] < self.ttl:
+                    prices[symbol] = cached[0]
+                else:
+                    stale.append(symbol)
+            provider = self.provider if stale else None
+
+        if stale:
+            fetched = provider.get_latest_prices(stale)
+            with self._lock:
+                for symbol, price in fetched.items():
+                    cached = self._quotes.get(symbol)
+                    # 请求期间别的线程可能已经存了更新的报价，不要用旧的覆盖它
+                    if cached is None or cached[1] <= now:
+                        self._quotes[symbol] = (price, now)
+                    prices[symbol] = price
+
+        return prices
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_quote_cache() -> QuoteCache:
+    """进程内共享的报价缓存 (Streamlit 每次刷新页面都能复用)"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = QuoteCache()
+        return _shared_cache
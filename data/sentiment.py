@@ -0,0 +1,167 @@
+# data/sentiment.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_title(title: str) -> str:
+    """统一大小写和空白，同一条被多家转载的标题会得到同一个 key"""
+    return re.sub(r"\s+", " ", str(title)).strip().lower()
+
+
+def title_key(title: str) -> str:
+    return hashlib.blake2b(normalize_title(title).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def sentiment_label(score: float) -> str:
+    """分数转成简单标签"""
+    if score > 0.1:
+        return "Positive"
+    elif score < -0.1:
+        return "Negative"
+    return "Neutral"
+
+
+class SentimentEngine:
+    """
+    标题情绪打分 (TextBlob polarity) + 两级缓存
+    - 内存 LRU：同一进程里重复出现的标题直接命中
+    - SQLite：按 标准化标题的哈希 持久化，跨刷新、跨进程复用，超过 max_rows 时删掉最早的记录
+    没命中的标题去重后一起打分、一个事务写回
+    """
+
+    def __init__(self, db_path='data/cache/sentiment.db', max_rows=200_000, memory_size=10_000):
+        """
+        :param db_path: SQLite 文件路径
+        :param max_rows: 磁盘缓存最多保留的标题数
+        :param memory_size: 内存 LRU 的容量
+        """
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._analyzer = None
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            # WAL 模式：读写互不阻塞，适合多进程同时访问
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment ("
+                " key TEXT PRIMARY KEY,"
+                " score REAL NOT NULL,"
+                " scored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sentiment_scored_at ON sentiment (scored_at)")
+
+    def _connect(self):
+        # 每次操作单独开连接，线程池里并发调用也是安全的
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def score(self, title: str) -> float:
+        return self.score_many([title])[0]
+
+    def score_many(self, titles: list) -> list:
+        """
+        批量打分
+        :return: 和 titles 一一对应的分数列表 (-1 ~ 1)
+        """
+        keys = [title_key(t) for t in titles]
+        scores = {}
+
+        # 1. 内存 LRU
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    scores[key] = self._memory[key]
+
+        # 2. 磁盘缓存
+        missing = [k for k in dict.fromkeys(keys) if k not in scores]
+        if missing:
+            scores.update(self._load(missing))
+
+        # 3. 剩下的才真正打分 (同一批里重复的标题只算一次)，一个事务写回
+        fresh = {}
+        for key, title in zip(keys, titles):
+            if key not in scores and key not in fresh:
+                fresh[key] = self._analyze(normalize_title(title))
+        # 打分失败的不写缓存 (下次还会重算)，只在这次返回里当作中性
+        fresh = {k: v for k, v in fresh.items() if v is not None}
+        if fresh:
+            self._store(fresh)
+            scores.update(fresh)
+
+        self._remember({k: scores[k] for k in dict.fromkeys(keys) if k in scores})
+        return [scores.get(k, 0.0) for k in keys]
+
+    def backfill(self, titles, batch_size=1000) -> int:
+        """
+        给一批历史标题 (例如存档的新闻库) 预先打分写进缓存
+        :param titles: 任意可迭代的标题序列，按 batch_size 分批处理
+        :return: 处理的标题数
+        """
+        total = 0
+        batch = []
+        for title in titles:
+            batch.append(title)
+            if len(batch) >= batch_size:
+                self.score_many(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.score_many(batch)
+            total += len(batch)
+        print(f"🧠 情绪回填完成: {total} 条标题")
+        return total
+
+    def _analyze(self, text: str):
+        """:return: 分数；分析器没装或出错时返回 None (不能当成中性分数缓存下来)"""
+        try:
+            if self._analyzer is None:
+                from textblob.sentiments import PatternAnalyzer
+                self._analyzer = PatternAnalyzer()
+            return float(self._analyzer.analyze(text).polarity)
+        except Exception:
+            return None
+
+    def _load(self, keys: list) -> dict:
+        results = {}
+        with self._connect() as conn:
+            # 分批查询，避免超过 SQLite 的参数个数上限
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, score FROM sentiment WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                results.update(dict(rows))
+        return results
+
+    def _store(self, scores: dict):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment (key, score, scored_at) VALUES (?, ?, ?)",
+                [(key, score, now) for key, score in scores.items()]
+            )
+            # 超出容量时删掉最早打分的记录
+            count = conn.execute("SELECT COUNT(*) FROM sentiment").fetchone()[0]
+            if count > self.max_rows:
+                conn.execute(
+                    "DELETE FROM sentiment WHERE key IN"
+                    " (SELECT key FROM sentiment ORDER BY scored_at LIMIT ?)",
+                    (count - self.max_rows,)
+                )
+
+    def _remember(self, scores: dict):
+        with self._lock:
+            for key, score in scores.items():
+                self._memory[key] = score
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
@@ -1,42 +1,282 @@
 # data/yfinance_provider.py
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
+from core import instrumentation as inst
 from .provider_interface import DataProvider
+from .price_cache import PriceCache, period_start, normalize_index
+from .fundamentals_cache import FundamentalsCache
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
 
 class YFinanceProvider(DataProvider):
+    def __init__(self, use_cache=True, cache_dir='data/cache/prices', session=None, batch_size=100,
+                 fundamentals_ttl=6 * 3600, fundamentals_db='data/cache/fundamentals.db'):
+        """
+        :param use_cache: 是否启用本地缓存 (K 线 + 基本面，默认开启)
+        :param cache_dir: K 线缓存目录
+        :param session: 复用的 HTTP 会话 (不传则用 yfinance 内部共享的连接池)
+        :param batch_size: 批量下载时每次请求的股票数量
+        :param fundamentals_ttl: 基本面缓存有效期 (秒)
+        :param fundamentals_db: 基本面缓存的 SQLite 文件
+        """
+        self.cache = PriceCache(cache_dir) if use_cache else None
+        self.fundamentals_cache = FundamentalsCache(fundamentals_db, ttl=fundamentals_ttl) if use_cache else None
+        self.session = session
+        self.batch_size = batch_size
+
+    @inst.timed('provider.price_history')
     def get_price_history(self, symbol: str, period: str = "1y") -> pd.DataFrame:
-        print(f"📥 [YFinance] 正在获取 {symbol} 数据 ({period})...")
-        
+        if self.cache is None:
+            return self._download(symbol, period=period)
+
+        cached = self.cache.load(symbol)
+        if cached.empty:
+            return self._refresh_full(symbol, period)
+
+        start = period_start(period, pd.Timestamp.now())
+
+        # 1. 缓存不够长 (或者要 max 但之前没拉过全部历史)，全量拉一次
+        if not self.cache.covers(cached, start, symbol):
+            return self._refresh_full(symbol, period)
+
+        # 2. 缓存刚更新过，直接读盘
+        if self.cache.is_fresh(symbol):
+            print(f"⚡ [Cache] {symbol} 命中本地缓存 ({period})")
+            inst.count('provider.price_cache_hit')
+            return self.cache.slice_period(cached, start)
+
+        # 3. 增量更新：从倒数第二根开始补 (最后一根可能是盘中价格，需要覆盖)
+        resume_from = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+        new = self._download(symbol, start=resume_from.strftime('%Y-%m-%d'))
+        if new.empty:
+            # 网络失败时退回旧缓存，总比没有强
+            return self.cache.slice_period(cached, start)
+
+        if not self.cache.overlap_consistent(cached, new):
+            # 期间发生了分红/拆股，复权价整体变了，旧缓存作废
+            print(f"🔄 [Cache] {symbol} 复权价格变化，重新全量下载")
+            return self._refresh_full(symbol, period)
+
+        merged = self.cache.merge(cached, new)
+        self.cache.save(symbol, merged)
+        return self.cache.slice_period(merged, start)
+
+    @inst.timed('provider.price_history_many')
+    def get_price_history_many(self, symbols: list, period: str = "1y") -> pd.DataFrame:
+        """
+        批量获取多只股票的历史价格 (yf.download 一次请求多只)
+        缓存新鲜的直接读盘，过期的按最早的缺口一起增量补，没有缓存的按 period 一起全量下载
+        :return: 列为 MultiIndex (symbol, field) 的对齐面板
+        """
+        symbols = list(dict.fromkeys(symbols))  # 去重但保持顺序
+        frames = {}
+        full_fetch = []
+        incremental = {}  # symbol -> (cached, start)
+
+        if self.cache is None:
+            full_fetch = symbols
+        else:
+            start = period_start(period, pd.Timestamp.now())
+            for symbol in symbols:
+                cached = self.cache.load(symbol)
+                if not self.cache.covers(cached, start, symbol):
+                    full_fetch.append(symbol)
+                elif self.cache.is_fresh(symbol):
+                    frames[symbol] = self.cache.slice_period(cached, start)
+                else:
+                    incremental[symbol] = (cached, start)
+
+            if frames:
+                print(f"⚡ [Cache] {len(frames)} 只股票命中本地缓存 ({period})")
+                inst.count('provider.price_cache_hit', len(frames))
+
+        # 1. 增量补数据：从所有过期缓存里最早的倒数第二根开始，一次请求补齐
+        if incremental:
+            resume_from = min(
+                cached.index[-2] if len(cached) > 1 else cached.index[-1]
+                for cached, _ in incremental.values()
+            )
+            downloaded = self._download_many(list(incremental), start=resume_from.strftime('%Y-%m-%d'))
+            for symbol, (cached, start) in incremental.items():
+                new = downloaded.get(symbol, pd.DataFrame())
+                if new.empty:
+                    frames[symbol] = self.cache.slice_period(cached, start)
+                elif not self.cache.overlap_consistent(cached, new):
+                    print(f"🔄 [Cache] {symbol} 复权价格变化，重新全量下载")
+                    full_fetch.append(symbol)
+                else:
+                    merged = self.cache.merge(cached, new)
+                    self.cache.save(symbol, merged)
+                    frames[symbol] = self.cache.slice_period(merged, start)
+
+        # 2. 全量下载
+        if full_fetch:
+            full_from = period_start(period, pd.Timestamp.now())
+            downloaded = self._download_many(full_fetch, period=period)
+            for symbol, df in downloaded.items():
+                if self.cache is not None:
+                    self.cache.save(symbol, df, full_from=full_from, full=True)
+                frames[symbol] = df
+
+        # 按调用方给的顺序输出
+        ordered = {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+        return self.build_panel(ordered)
+
+    @inst.timed('provider.latest_prices')
+    def get_latest_prices(self, symbols: list) -> dict:
+        """
+        批量获取最新价：一次请求拿所有股票最近几天的日线，取最后一根收盘价
+        不走 K 线缓存 (缓存 15 分钟刷新一次，对报价来说太旧了)
+        """
+        frames = self._download_many(list(dict.fromkeys(symbols)), period="5d")
+        return {symbol: float(df['Close'].dropna().iloc[-1]) for symbol, df in frames.items()
+                if df['Close'].notna().any()}
+
+    @inst.timed('provider.download')
+    def _download_many(self, symbols: list, **download_kwargs) -> dict:
+        """
+        用 yf.download 分批下载，每批 batch_size 只股票一个请求 (内部多线程)
+        :return: {symbol: DataFrame}，下载失败或为空的股票不会出现在结果里
+        """
+        span = download_kwargs.get('period') or f"since {download_kwargs.get('start')}"
+        results = {}
+
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i:i + self.batch_size]
+            print(f"📥 [YFinance] 批量获取 {len(batch)} 只股票数据 ({span})...")
+            inst.count('provider.download_symbols', len(batch))
+            try:
+                import yfinance as yf
+                raw = yf.download(
+                    batch, auto_adjust=True, group_by='ticker', threads=True,
+                    progress=False, session=self.session, **download_kwargs
+                )
+            except Exception as e:
+                print(f"❌ 错误: 批量获取失败 - {e}")
+                continue
+
+            if raw is None or raw.empty:
+                continue
+
+            # 只有一只股票时 yfinance 可能不返回 MultiIndex 列
+            if not isinstance(raw.columns, pd.MultiIndex):
+                raw = pd.concat({batch[0]: raw}, axis=1)
+
+            for symbol in batch:
+                if symbol not in raw.columns.get_level_values(0):
+                    print(f"⚠️ 警告: {symbol} 返回数据为空")
+                    continue
+                df = raw[symbol][OHLCV_COLUMNS].dropna(how='all')
+                if df.empty:
+                    print(f"⚠️ 警告: {symbol} 返回数据为空")
+                    continue
+                results[symbol] = normalize_index(df.copy())
+
+        return results
+
+    def _refresh_full(self, symbol: str, period: str) -> pd.DataFrame:
+        full_from = period_start(period, pd.Timestamp.now())
+        df = self._download(symbol, period=period)
+        if not df.empty and self.cache is not None:
+            self.cache.save(symbol, df, full_from=full_from, full=True)
+        return df
+
+    @inst.timed('provider.download')
+    def _download(self, symbol: str, **history_kwargs) -> pd.DataFrame:
+        """
+        直接从 Yahoo 下载
+        :param history_kwargs: 透传给 ticker.history (period=... 或 start=...)
+        """
+        span = history_kwargs.get('period') or f"since {history_kwargs.get('start')}"
+        print(f"📥 [YFinance] 正在获取 {symbol} 数据 ({span})...")
+        inst.count('provider.download_symbols')
+
         try:
             # auto_adjust=True 自动处理分红和拆股（复权）
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period, auto_adjust=True)
-            
+            import yfinance as yf
+            ticker = yf.Ticker(symbol, session=self.session)
+            df = ticker.history(auto_adjust=True, **history_kwargs)
+
             if df.empty:
                 print(f"⚠️ 警告: {symbol} 返回数据为空")
                 return pd.DataFrame()
 
             # 数据清洗：保留核心列，重置索引
             # yfinance 返回的列包含: Open, High, Low, Close, Volume, Dividends, Stock Splits
-            df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-            
-            # 确保索引是 Datetime 类型
-            df.index = pd.to_datetime(df.index)
-            
-            return df
-            
+            df = df[OHLCV_COLUMNS]
+
+            # 确保索引是不带时区的 Datetime 类型 (和批量下载、本地缓存保持一致)
+            return normalize_index(df.copy())
+
         except Exception as e:
             print(f"❌ 错误: 获取 {symbol} 失败 - {e}")
             return pd.DataFrame()
+
     def get_fundamentals(self, symbol: str) -> dict:
         """
         获取股票的基本面数据 (PE, 市值, 行业等)
+        优先读本地缓存，过期了才调用 ticker.info
         """
+        if self.fundamentals_cache is not None:
+            cached = self.fundamentals_cache.get(symbol)
+            if cached is not None:
+                return cached
+
+        data = self._fetch_fundamentals(symbol)
+        if data is None:
+            return self._empty_fundamentals(symbol)
+        if self.fundamentals_cache is not None:
+            self.fundamentals_cache.set(symbol, data)
+        return data
+
+    @inst.timed('provider.fundamentals')
+    def warm_fundamentals(self, symbols: list, max_workers=8) -> dict:
+        """
+        批量预热基本面缓存：只对过期的股票调用 ticker.info (线程池并发)
+        :return: {symbol: 基本面字典}，覆盖传入的所有股票
+        """
+        return dict(self.iter_fundamentals(symbols, max_workers))
+
+    def iter_fundamentals(self, symbols: list, max_workers=8):
+        """
+        逐只产出基本面：缓存命中的马上全部产出，过期的在线程池里并发获取，哪只先返回先产出哪只
+        (扫描器用它边拿基本面边计算，不用等最慢的那只)
+        :yield: (symbol, 基本面字典)，覆盖传入的所有股票
+        """
+        symbols = list(dict.fromkeys(symbols))
+        cached = self.fundamentals_cache.get_many(symbols) if self.fundamentals_cache is not None else {}
+        missing = [s for s in symbols if s not in cached]
+        inst.count('provider.fundamentals_cache_hit', len(cached))
+        inst.count('provider.fundamentals_fetch', len(missing))
+
+        for symbol in symbols:
+            if symbol in cached:
+                yield symbol, cached[symbol]
+        if not missing:
+            return
+
+        print(f"📑 正在获取 {len(missing)} 只股票的基本面 (缓存命中 {len(cached)} 只)...")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self._fetch_fundamentals, symbol): symbol for symbol in missing}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                data = future.result()
+                if data is None:
+                    yield symbol, self._empty_fundamentals(symbol)
+                    continue
+                # 失败的结果不写缓存；成功的每只单独写，扫描中途停下也不会白拿
+                if self.fundamentals_cache is not None:
+                    self.fundamentals_cache.set(symbol, data)
+                yield symbol, data
+
+    def _fetch_fundamentals(self, symbol: str):
+        """调用 ticker.info，失败返回 None (失败的结果不写缓存)"""
         try:
-            ticker = yf.Ticker(symbol)
+            import yfinance as yf
+            ticker = yf.Ticker(symbol, session=self.session)
             # info 属性包含了大量信息，但请求速度较慢，请耐心
             info = ticker.info
-            
+
             return {
                 'Symbol': symbol,
                 'Sector': info.get('sector', 'Unknown'),
@@ -49,9 +289,13 @@ class YFinanceProvider(DataProvider):
             }
         except Exception as e:
             print(f"⚠️ 无法获取 {symbol} 基本面: {e}")
-            # 返回空值防止程序崩溃
-            return {
-                'Symbol': symbol, 
-                'Sector': '-', 'Industry': '-', 
-                'MarketCap': 0, 'PE_Ratio': 0, 'Forward_PE': 0, 'EPS': 0, 'Volume': 0
-            }    
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def _empty_fundamentals(symbol: str) -> dict:
+        # 返回空值防止程序崩溃
+        return {
+            'Symbol': symbol,
+            'Sector': '-', 'Industry': '-',
+            'MarketCap': 0, 'PE_Ratio': 0, 'Forward_PE': 0, 'EPS': 0, 'Volume': 0
+        }
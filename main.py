@@ -40,7 +40,7 @@ def main():
     buy_and_hold_return = (df['Close'].iloc[-1] / df['Close'].iloc[0]) - 1
     print(f"\n基准对比 (买入持有): {buy_and_hold_return:.2%}")
 
-    if float(metrics['Total Return'].strip('%')) > buy_and_hold_return * 100:
+    if results['values']['total_return'] > buy_and_hold_return:
         print("✅ 策略跑赢了死拿！牛逼！")
     else:
         print("⚠️ 策略没跑赢死拿，需要优化。")
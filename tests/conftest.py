@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# 让测试里可以直接 import core / data / ui (和在仓库根目录运行 main.py 一样)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+# tests/test_account_store.py
+import json
+
+from core.account_store import JournalAccountStore
+from core.paper_account import PaperAccount
+
+
+# 和仓库里 data/paper_account.json 一样的老格式 (流水最新的在最前)
+LEGACY = {
+    "cash": 66000.0,
+    "positions": {"GOOGL": {"qty": 100, "avg_price": 340.0}},
+    "history": [
+        {"time": "2026-01-08 15:24:33", "symbol": "GOOGL", "action": "BUY",
+         "price": 340.0, "qty": 100, "amount": 34000.0}
+    ],
+}
+
+
+def _legacy(path):
+    with open(path, 'w') as f:
+        json.dump(LEGACY, f, indent=4)
+
+
+def test_migration_leaves_legacy_file_untouched(tmp_path):
+    data_file = tmp_path / 'paper_account.json'
+    _legacy(data_file)
+    before = data_file.read_text()
+
+    account = PaperAccount(str(data_file))
+    assert account.get_positions() == LEGACY['positions']
+    ok, _ = account.execute_trade('GOOGL', 'SELL', 350.0, 40)
+    assert ok
+    account.execute_trade('MSFT', 'BUY', 100.0, 5)
+    account.save_account()
+
+    assert data_file.read_text() == before
+    reloaded = PaperAccount(str(data_file))
+    assert reloaded.get_balance() == 66000.0 + 350.0 * 40 - 500.0
+    assert reloaded.get_positions()['GOOGL']['qty'] == 60
+    assert set(reloaded.get_positions()) == {'GOOGL', 'MSFT'}
+    assert [t['action'] for t in reloaded.get_history(newest_first=False)] == ['BUY', 'SELL', 'BUY']
+
+
+def test_load_replays_only_records_after_snapshot(tmp_path):
+    data_file = str(tmp_path / 'paper_account.json')
+    account = PaperAccount(store=JournalAccountStore(data_file, snapshot_every=4))
+    for _ in range(10):
+        account.execute_trade('AAPL', 'BUY', 10.0, 1)
+
+    store = JournalAccountStore(data_file, snapshot_every=4)
+    data = store.load()
+    # 快照在第 8 笔，启动时只重放后面 2 笔，前面的流水用到时才读
+    assert store.snapshot_seq == 8
+    assert data['history']._head is None and len(data['history']._tail) == 2
+    assert data['positions']['AAPL']['qty'] == 10
+    assert len(data['history']) == 10
+
+
+def test_two_accounts_on_same_files_do_not_reuse_seq(tmp_path):
+    """两个进程 (这里用两个对象模拟) 交替成交：序号不重复，各自都能看到对方的成交"""
+    data_file = str(tmp_path / 'paper_account.json')
+    a = PaperAccount(data_file)
+    b = PaperAccount(data_file)
+
+    a.execute_trade('AAPL', 'BUY', 100.0, 10)
+    b.execute_trade('MSFT', 'BUY', 200.0, 10)   # b 先补上 a 的成交，现金不会被重复使用
+    a.execute_trade('AAPL', 'SELL', 110.0, 5)
+
+    with open(a.store.journal_file) as f:
+        seqs = [json.loads(line)['seq'] for line in f]
+    assert seqs == [1, 2, 3]
+
+    expected = 100000.0 - 1000 - 2000 + 550
+    assert b.get_balance() == 100000.0 - 1000 - 2000
+    assert a.get_balance() == expected
+    assert PaperAccount(data_file).get_balance() == expected
@@ -0,0 +1,28 @@
+# tests/test_backtester.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.backtester import Backtester
+
+
+def _frame(gaps=()):
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2020-01-01', periods=200, freq='D')
+    close = pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.02, 200)), index=index)
+    for gap in gaps:
+        close.iloc[gap] = np.nan
+    signal = pd.Series((rng.random(200) > 0.4).astype(float), index=index)
+    return pd.DataFrame({'Close': close, 'Signal': signal})
+
+
+@pytest.mark.parametrize('gaps', [(), (50,), (50, slice(120, 123))])
+def test_fast_path_matches_full_path(gaps):
+    """缺失收盘价时，快速路径 (优化器、网格搜索用的) 和逐日明细的结果也要一致"""
+    df = _frame(gaps)
+    bt = Backtester()
+    full = bt.run_backtest(df, include_data=True)['values']
+    fast = bt.run_backtest(df, include_data=False)['values']
+    for key in full:
+        assert np.isfinite(fast[key]), key
+        assert fast[key] == pytest.approx(full[key]), key
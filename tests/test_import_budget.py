@@ -0,0 +1,44 @@
+# tests/test_import_budget.py
+"""启动时间预算：入口模块导入时不能提前加载重依赖，导入耗时不超预算 (慢机器用 IMPORT_BUDGET_SCALE 放宽)"""
+import importlib.util
+import os
+import re
+
+import pytest
+
+from benchmarks import import_budget
+
+MODULES = list(import_budget.BUDGETS)
+
+
+@pytest.fixture(scope='module')
+def results():
+    scale = float(os.environ.get('IMPORT_BUDGET_SCALE', '1'))
+    return {row['module']: row for row in import_budget.check(scale)}
+
+
+def _usable(row, forbidden):
+    """导入失败的入口跳过；但如果缺的正好是重依赖，说明它在模块顶部被导入了，直接判失败"""
+    if row['error']:
+        missing = re.search(r"No module named '([\w.]+)'", row['error'])
+        if missing and missing.group(1).split('.')[0] in forbidden:
+            pytest.fail(f"{row['module']} 导入时加载了 {missing.group(1)}")
+        pytest.skip(f"{row['module']} 导入失败 (依赖没装): {row['error']}")
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_no_heavy_modules_at_import(results, module):
+    forbidden = import_budget.BUDGETS[module][1]
+    row = results[module]
+    _usable(row, forbidden)
+    installed = [name for name in forbidden if importlib.util.find_spec(name) is not None]
+    if not installed:
+        pytest.skip("重依赖都没装，检查不出是否提前加载")
+    assert row['heavy'] == []
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_time_within_budget(results, module):
+    row = results[module]
+    _usable(row, import_budget.BUDGETS[module][1])
+    assert row['ms'] <= row['budget_ms']
@@ -0,0 +1,25 @@
+# tests/test_incremental.py
+import pytest
+
+from benchmarks.synthetic import make_ohlcv
+
+# 批量版的指标来自 pandas_ta
+pytest.importorskip('pandas_ta')
+
+from core.strategies.ma_cross import MovingAverageCrossStrategy
+from core.strategies.macd import MacdStrategy
+from core.strategies.rsi import RsiStrategy
+from core.strategies.supertrend import SuperTrendStrategy
+
+
+@pytest.mark.parametrize('strategy', [
+    MovingAverageCrossStrategy(20, 50),
+    MacdStrategy(12, 26, 9),
+    RsiStrategy(14, 30, 70),
+    SuperTrendStrategy(10, 3.0),
+], ids=lambda s: type(s).__name__)
+def test_replay_matches_generate_signals(strategy):
+    df = make_ohlcv(500)
+    batch = strategy.generate_signals(df)['Signal']
+    incremental = strategy.replay(df)
+    assert (incremental.astype(int) == batch.astype(int)).all()
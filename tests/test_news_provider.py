@@ -0,0 +1,46 @@
+# tests/test_news_provider.py
+import os
+
+import pytest
+
+from data.feed_sources import DirectoryFeedSource
+from data.news_provider import NewsProvider
+from data.sentiment import SentimentEngine
+
+pytest.importorskip('feedparser')
+
+FEEDS = os.path.join(os.path.dirname(__file__), 'fixtures', 'feeds')
+
+
+@pytest.fixture
+def provider(tmp_path):
+    # 本地目录代替 Google News，不走网络
+    return NewsProvider(feed_source=DirectoryFeedSource(FEEDS),
+                        sentiment=SentimentEngine(db_path=str(tmp_path / 'sentiment.db')))
+
+
+def test_news_many_from_directory(provider):
+    results = provider.get_company_news_many(['MSFT', 'AAPL', 'NOPE', 'BAD', 'AAPL'], limit=2)
+
+    # 按调用方给的顺序返回 (去重)，没有 feed 的和 feed 损坏的都是空列表
+    assert list(results) == ['MSFT', 'AAPL', 'NOPE', 'BAD']
+    assert results['NOPE'] == []
+    assert results['BAD'] == []
+
+    # feed 里的顺序保留，limit 生效
+    assert [item['title'] for item in results['AAPL']] == [
+        'Apple beats earnings expectations',
+        'Apple shares slip after product event',
+    ]
+    first = results['AAPL'][0]
+    assert first['publisher'] == 'Example Wire'
+    assert first['date'] == '2024-01-02 14:30'
+    assert all('sentiment' in item and 'label' in item for news in results.values() for item in news)
+
+
+def test_single_symbol_matches_batch(provider):
+    single = provider.get_company_news('AAPL', limit=10)
+    assert [item['link'] for item in single] == [
+        'https://example.com/aapl-1', 'https://example.com/aapl-2', 'https://example.com/aapl-3',
+    ]
+    assert single[2]['publisher'] == 'Google News'
@@ -0,0 +1,61 @@
+# tests/test_optimizer_parallel.py
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_ohlcv
+from core import indicators
+from core.indicators import fingerprint
+from core.shared_frame import SharedFrame
+
+
+def test_shared_frame_keeps_index_dtype():
+    df = make_ohlcv(50)
+    df.index = df.index.as_unit('us')
+    shared = SharedFrame(df)
+    try:
+        restored, handles = SharedFrame.attach(shared.spec)
+        assert restored.index.equals(df.index)
+        assert restored.index.dtype == df.index.dtype
+        pd.testing.assert_frame_equal(restored, df.astype(float), check_freq=False)
+        del restored
+        SharedFrame.detach(handles)
+    finally:
+        shared.release()
+
+
+def test_shared_frame_keeps_timezone():
+    df = make_ohlcv(20)
+    df.index = df.index.tz_localize('America/New_York')
+    shared = SharedFrame(df)
+    try:
+        restored, handles = SharedFrame.attach(shared.spec)
+        assert restored.index.equals(df.index)
+        del restored
+        SharedFrame.detach(handles)
+    finally:
+        shared.release()
+
+
+def test_fingerprint_depends_on_index_unit():
+    close = make_ohlcv(20)['Close']
+    as_us = close.set_axis(close.index.as_unit('us'))
+    # 同样的 int64，按纳秒解释就成了 1970 年的日期，指纹必须不一样
+    wrong = close.set_axis(pd.DatetimeIndex(as_us.index.asi8.astype('M8[ns]')))
+    assert fingerprint(as_us) != fingerprint(wrong)
+
+
+def test_parallel_matches_serial_with_warm_cache():
+    pytest.importorskip('pandas_ta')
+    from core.optimizer import StrategyOptimizer
+    from core.strategies.macd import MacdStrategy
+
+    df = make_ohlcv(600)
+    grid = {'fast': [8, 12], 'slow': [20, 26], 'signal': [9]}
+    indicators.cache.clear()
+    # 主进程先把缓存焐热，fork 出来的 worker 会继承这份缓存
+    MacdStrategy(8, 20, 9).generate_signals(df)
+
+    optimizer = StrategyOptimizer(df)
+    serial = optimizer.optimize_strategy(MacdStrategy, grid, max_workers=0)
+    parallel = optimizer.optimize_strategy(MacdStrategy, grid, max_workers=2)
+    pd.testing.assert_frame_equal(serial.reset_index(drop=True), parallel.reset_index(drop=True))
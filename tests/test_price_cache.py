@@ -0,0 +1,41 @@
+# tests/test_price_cache.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.price_cache import PriceCache
+
+pytest.importorskip('pyarrow')
+
+
+def _bars(start, periods):
+    index = pd.date_range(start, periods=periods, freq='B')
+    return pd.DataFrame({'Close': np.linspace(10, 20, periods)}, index=index)
+
+
+def test_short_history_is_covered_after_full_download(tmp_path):
+    """新股的历史比 period 短：全量下载过一次之后就算覆盖，不用每次重新下载"""
+    cache = PriceCache(str(tmp_path))
+    now = pd.Timestamp('2024-06-01')
+    df = _bars('2024-03-01', 60)
+    start = now - pd.DateOffset(years=1)
+
+    cache.save('IPO', df)
+    assert not cache.covers(cache.load('IPO'), start, 'IPO')
+
+    cache.save('IPO', df, full_from=start, full=True)
+    assert cache.covers(cache.load('IPO'), start + pd.Timedelta(days=1), 'IPO')
+    # 要求更早的起点 (或 max) 时仍然要重新下载
+    assert not cache.covers(cache.load('IPO'), start - pd.DateOffset(years=1), 'IPO')
+    assert not cache.covers(cache.load('IPO'), None, 'IPO')
+
+    # 增量合并不会清掉全量下载的记录
+    cache.save('IPO', cache.merge(df, _bars('2024-05-24', 5)))
+    assert cache.covers(cache.load('IPO'), start, 'IPO')
+
+
+def test_max_download_covers_any_start(tmp_path):
+    cache = PriceCache(str(tmp_path))
+    cache.save('NEW', _bars('2024-03-01', 60), full_from=None, full=True)
+    assert cache.covers(cache.load('NEW'), None, 'NEW')
+    assert cache.covers(cache.load('NEW'), pd.Timestamp('1990-01-01'), 'NEW')
@@ -0,0 +1,41 @@
+# tests/test_quote_cache.py
+import threading
+
+from data.quote_cache import QuoteCache
+
+
+class SlowProvider:
+    """MSFT 的请求会一直卡住，直到测试放行"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def get_latest_prices(self, symbols):
+        if 'MSFT' in symbols:
+            self.started.set()
+            self.release.wait(5)
+        return {s: 100.0 for s in symbols}
+
+
+def test_cached_reads_do_not_wait_for_fetch():
+    provider = SlowProvider()
+    cache = QuoteCache(provider=provider)
+    provider.release.set()
+    cache.get_prices(['AAPL'])
+    provider.release.clear()
+
+    slow = threading.Thread(target=cache.get_prices, args=(['MSFT'],))
+    slow.start()
+    assert provider.started.wait(5)
+
+    # MSFT 的请求还没返回，AAPL 的缓存照样能读到
+    result = {}
+    reader = threading.Thread(target=lambda: result.update(cache.get_prices(['AAPL'])))
+    reader.start()
+    reader.join(1)
+    assert result == {'AAPL': 100.0}
+
+    provider.release.set()
+    slow.join(5)
+    assert cache.get_prices(['MSFT']) == {'MSFT': 100.0}
@@ -0,0 +1,19 @@
+# tests/test_robustness.py
+import numpy as np
+import pytest
+
+from core.robustness import MonteCarlo
+
+
+def test_rejects_empty_sample_count():
+    with pytest.raises(ValueError):
+        MonteCarlo(n_samples=0)
+
+
+def test_worker_count_does_not_change_results():
+    returns = np.random.default_rng(1).normal(0, 0.01, 300)
+    serial = MonteCarlo(n_samples=50, chunk_size=20, max_workers=0, seed=7).bootstrap(returns)
+    pooled = MonteCarlo(n_samples=50, chunk_size=20, max_workers=2, seed=7).bootstrap(returns)
+    assert len(serial['total_return']) == 50
+    for key in serial:
+        np.testing.assert_array_equal(serial[key], pooled[key])
@@ -0,0 +1,92 @@
+# tests/test_scanner.py
+import numpy as np
+import pandas as pd
+
+from core.scanner import MarketScanner
+from data.provider_interface import DataProvider
+
+
+class FakeProvider(DataProvider):
+    """合成数据的数据源：NODATA 没有价格，基本面按倒序逐只到达"""
+
+    batch_size = 2
+
+    def __init__(self):
+        self.fundamentals_done = False
+
+    def get_price_history(self, symbol, period="1y"):
+        if symbol == 'NODATA':
+            return pd.DataFrame()
+        rng = np.random.default_rng(len(symbol))
+        index = pd.date_range('2024-01-01', periods=60, freq='B')
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 60))
+        return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                             'Close': close, 'Volume': 1e6}, index=index)
+
+    def iter_fundamentals(self, symbols, max_workers=8):
+        for symbol in reversed(symbols):
+            yield symbol, {'Symbol': symbol, 'Sector': 'Tech', 'MarketCap': 1e9, 'PE_Ratio': 10}
+        self.fundamentals_done = True
+
+
+class LastBar:
+    """最简单的策略：永远持有"""
+
+    def evaluate_latest(self, df):
+        row = df.iloc[-1].copy()
+        row['Signal'], row['Position'] = 1, 0
+        return row
+
+
+class Unpicklable(LastBar):
+    def __init__(self):
+        self.callback = lambda: None  # 进程池序列化任务时会失败
+
+
+SYMBOLS = ['AAPL', 'MSFT', 'NODATA', 'GOOGL', 'AMZN']
+
+
+def test_rows_stream_before_fundamentals_finish():
+    provider = FakeProvider()
+    scanner = MarketScanner(provider=provider, cpu_workers=0)
+    scan = scanner.iter_scan(LastBar(), SYMBOLS)
+
+    done, total, row = next(scan)
+    assert (done, total) == (1, 5) and row['Symbol'] == 'AMZN'
+    assert not provider.fundamentals_done
+
+    rest = list(scan)
+    assert [d for d, _, _ in rest] == [2, 3, 4, 5]
+    assert sum(r is None for _, _, r in rest) == 1  # NODATA
+
+
+def test_scan_market_keeps_input_order():
+    scanner = MarketScanner(provider=FakeProvider(), cpu_workers=0)
+    progress = []
+    df = scanner.scan_market(LastBar(), SYMBOLS, progress_callback=lambda d, t, r: progress.append(d))
+    assert list(df['Symbol']) == ['AAPL', 'MSFT', 'GOOGL', 'AMZN']
+    assert progress == [1, 2, 3, 4, 5]
+
+
+def test_failed_worker_tasks_do_not_abort_scan():
+    scanner = MarketScanner(provider=FakeProvider(), cpu_workers=2, min_parallel=1)
+    results = list(scanner.iter_scan(Unpicklable(), SYMBOLS))
+    assert [d for d, _, _ in results] == [1, 2, 3, 4, 5]
+    assert all(row is None for _, _, row in results)
+
+
+def test_worker_signal_timings_reach_parent():
+    """进程池里算的信号耗时要记到主进程的统计里"""
+    from core import instrumentation as inst
+
+    inst.reset()
+    inst.enable()
+    try:
+        scanner = MarketScanner(provider=FakeProvider(), cpu_workers=2, min_parallel=1)
+        rows = [row for _, _, row in scanner.iter_scan(LastBar(), SYMBOLS) if row is not None]
+        spans = {s['name']: s for s in inst.snapshot()['spans']}
+    finally:
+        inst.disable()
+        inst.reset()
+    assert len(rows) == 4
+    assert spans['scanner.signals']['count'] == 4
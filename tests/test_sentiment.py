@@ -0,0 +1,25 @@
+# tests/test_sentiment.py
+from types import SimpleNamespace
+
+from data.sentiment import SentimentEngine
+
+
+class BrokenAnalyzer:
+    def analyze(self, text):
+        raise RuntimeError("analyzer unavailable")
+
+
+class FixedAnalyzer:
+    def analyze(self, text):
+        return SimpleNamespace(polarity=0.5)
+
+
+def test_failed_scores_are_not_cached(tmp_path):
+    engine = SentimentEngine(db_path=str(tmp_path / 'sentiment.db'))
+    engine._analyzer = BrokenAnalyzer()
+    assert engine.score_many(['Stocks rally', 'Stocks rally']) == [0.0, 0.0]
+
+    # 分析器恢复后，之前失败的标题要重新打分，而不是一直命中缓存里的 0
+    engine._analyzer = FixedAnalyzer()
+    assert engine.score('Stocks rally') == 0.5
+    assert SentimentEngine(db_path=str(tmp_path / 'sentiment.db')).score('stocks  RALLY') == 0.5
@@ -0,0 +1,84 @@
+# tests/test_walk_forward.py
+from benchmarks.synthetic import make_ohlcv
+from core import walk_forward as wf
+from core.indicators import IndicatorCache
+from core.strategies.base_strategy import BaseStrategy
+from core.strategies.ma_cross import MovingAverageCrossStrategy
+
+
+class RangeBreakout(BaseStrategy):
+    """测试用：收盘价突破前 N 天最高价时持仓 (信号依赖 High，不只是 Close)"""
+
+    def __init__(self, period=20):
+        self.period = period
+
+    def generate_signals(self, df):
+        signals = df.copy()
+        signals['Signal'] = (signals['Close'] > signals['High'].shift(1).rolling(self.period).max() * 0.98).astype(int)
+        return signals
+
+
+def test_cache_key_includes_high_low():
+    df = make_ohlcv(600)
+    other = df.copy()
+    other['High'] = other['High'] * 1.05  # 收盘价一样，High 不一样
+    cache = IndicatorCache()
+    combos = [{'period': 10}, {'period': 20}]
+    first = wf.walk_forward(df, RangeBreakout, combos, 200, 100, cache=cache)
+    second = wf.walk_forward(other, RangeBreakout, combos, 200, 100, cache=cache)
+    fresh = wf.walk_forward(other, RangeBreakout, combos, 200, 100, cache=None)
+    assert cache.stats()['hits'] == 0
+    assert second.equals(fresh)
+    assert len(first) == len(second)
+
+
+def test_ma_cross_with_partial_grid_uses_generic_path():
+    import pytest
+    pytest.importorskip('pandas_ta')
+    df = make_ohlcv(600)
+    # 只扫短期均线，长期均线用默认值：向量化路径拿不到 long_window，应该退回逐个生成信号
+    folds = wf.walk_forward(df, MovingAverageCrossStrategy, [{'short_window': 10}, {'short_window': 20}],
+                            200, 100, cache=None)
+    assert not folds.empty
+
+
+def test_extending_history_reuses_folds():
+    df = make_ohlcv(700)
+    cache = IndicatorCache()
+    combos = [{'short_window': s, 'long_window': l} for s in (10, 20) for l in (50, 100)]
+    short = wf.walk_forward(df.iloc[:600], MovingAverageCrossStrategy, combos, 200, 100, cache=cache)
+    longer = wf.walk_forward(df, MovingAverageCrossStrategy, combos, 200, 100, cache=cache)
+    assert cache.stats()['hits'] == len(short)
+    assert longer.iloc[:len(short)].equals(short)
+
+
+class CountingBreakout(RangeBreakout):
+    """记录生成了多少次信号 (看折结果是不是从存储里读的)"""
+    calls = 0
+
+    def generate_signals(self, df):
+        CountingBreakout.calls += 1
+        return super().generate_signals(df)
+
+
+def test_store_reuses_folds_across_processes(tmp_path):
+    """折结果存进 SQLite：换一个进程 (这里用新的存储对象、不用内存缓存模拟) 直接复用，延长历史只算新折"""
+    from core.result_store import OptimizerResultStore
+
+    db = str(tmp_path / 'optimizer.db')
+    df = make_ohlcv(700)
+    combos = [{'period': 10}, {'period': 20}]
+
+    first = wf.walk_forward(df.iloc[:600], CountingBreakout, combos, 200, 100,
+                            cache=None, store=OptimizerResultStore(db))
+    computed = CountingBreakout.calls
+
+    again = wf.walk_forward(df.iloc[:600], CountingBreakout, combos, 200, 100,
+                            cache=None, store=OptimizerResultStore(db))
+    assert CountingBreakout.calls == computed
+    assert again.equals(first)
+
+    longer = wf.walk_forward(df, CountingBreakout, combos, 200, 100, cache=None, store=OptimizerResultStore(db))
+    assert CountingBreakout.calls == computed + len(combos)  # 只为新增的折算了一次信号矩阵
+    assert len(longer) == len(first) + 1
+    assert longer.iloc[:len(first)].equals(first)
@@ -0,0 +1,141 @@
+# ui/cache.py
+"""
+Dashboard 的缓存层 (所有标签页、所有用户会话共享)
+
+st.cache_resource : 进程内只建一次的对象 (数据源、新闻源、模拟账户)
+st.cache_data     : 计算结果，按 (股票, 周期, 策略, 参数) 缓存，带过期时间和条目上限
+
+策略对象不能直接当缓存 key，统一转成 (策略类名, 参数元组)，在缓存函数里再按注册表实例化
+新闻、优化器、组合回测、模拟账户只在第一次用到时才导入，打开页面不会把所有子系统都加载一遍
+"""
+import inspect
+import streamlit as st
+
+from data.yfinance_provider import YFinanceProvider
+from core.backtester import Backtester
+from core.strategies.ma_cross import MovingAverageCrossStrategy
+from core.strategies.rsi import RsiStrategy
+from core.strategies.macd import MacdStrategy
+from core.strategies.supertrend import SuperTrendStrategy
+
+# 策略类名 -> 策略类
+STRATEGY_REGISTRY = {cls.__name__: cls for cls in (
+    MovingAverageCrossStrategy, RsiStrategy, MacdStrategy, SuperTrendStrategy
+)}
+
+
+def strategy_key(strategy):
+    """
+    策略对象 -> (策略类名, ((参数名, 值), ...))，可以作为缓存 key
+    参数取自构造函数的签名，增量模式的内部状态不会混进来
+    """
+    cls = type(strategy)
+    names = [p for p in inspect.signature(cls.__init__).parameters if p != 'self']
+    return cls.__name__, tuple((name, getattr(strategy, name)) for name in names)
+
+
+def build_strategy(name, params):
+    return STRATEGY_REGISTRY[name](**dict(params))
+
+
+# ---------- 共享对象 ----------
+
+@st.cache_resource
+def get_provider():
+    """全进程共用一个数据源 (K 线磁盘缓存、基本面缓存、HTTP 会话都复用)"""
+    return YFinanceProvider()
+
+
+@st.cache_resource
+def get_news_provider():
+    from data.news_provider import NewsProvider
+    return NewsProvider()
+
+
+@st.cache_resource
+def get_result_store():
+    """参数优化结果库 (跨刷新、跨会话保留，算过的参数组合不再重算)"""
+    from core.result_store import OptimizerResultStore
+    return OptimizerResultStore()
+
+
+@st.cache_resource
+def get_paper_account():
+    """全进程共用一个模拟账户，多个会话同时下单也只有一个对象在写流水"""
+    from core.paper_account import PaperAccount
+    return PaperAccount()
+
+
+# ---------- 计算结果 ----------
+
+@st.cache_data(ttl=900, max_entries=256, show_spinner=False)
+def load_prices(symbol, period):
+    return get_provider().get_price_history(symbol, period)
+
+
+@st.cache_data(ttl=900, max_entries=256, show_spinner=False)
+def run_backtest(symbol, period, strategy_name, params, initial_capital):
+    """
+    单只股票回测 (拉数据 + 生成信号 + 回测)
+    :return: Backtester.run_backtest 的结果，没有数据返回 None
+    """
+    df = load_prices(symbol, period)
+    if df.empty:
+        return None
+    signals_df = build_strategy(strategy_name, params).generate_signals(df)
+    return Backtester(initial_capital).run_backtest(signals_df)
+
+
+@st.cache_data(ttl=900, max_entries=64, show_spinner=False)
+def run_robustness(symbol, period, strategy_name, params, initial_capital, n_samples=10000):
+    """
+    对单只股票的回测做蒙特卡洛重采样 (固定种子，同样的输入结果一样)
+    :return: {'bootstrap': 分位数表, 'trade_shuffle': 分位数表, 'prob_loss': 亏损概率}，没有数据返回 None
+    """
+    results = run_backtest(symbol, period, strategy_name, params, initial_capital)
+    if results is None:
+        return None
+    from core.robustness import MonteCarlo
+    dist = MonteCarlo(n_samples=n_samples, seed=0).run(results)
+    return {
+        'bootstrap': MonteCarlo.summarize(dist['bootstrap']),
+        'trade_shuffle': MonteCarlo.summarize(dist['trade_shuffle']),
+        'prob_loss': MonteCarlo.probability_of_loss(dist['bootstrap']),
+    }
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def run_optimizer(symbol, period, strategy_name, param_grid, method='grid', budget=None):
+    """
+    参数优化 (双均线走向量化引擎，其他策略走多进程网格搜索)
+    :param param_grid: ((参数名, (取值, ...)), ...)
+    :param method: 'grid' 暴力搜索，或 StrategyOptimizer.search 的 'random' / 'halving' / 'tpe'
+    :param budget: 自适应搜索的回测次数上限
+    :return: 结果表，没有数据返回 None
+    """
+    df = load_prices(symbol, period)
+    if df.empty:
+        return None
+    from core.optimizer import StrategyOptimizer
+    # 结果逐批写进结果库：页面刷新或崩溃后重跑同样的扫参，会跳过已经算过的组合
+    optimizer = StrategyOptimizer(df, store=get_result_store(), label=f"{symbol} {period}")
+    grid = {name: list(values) for name, values in param_grid}
+    strategy_class = STRATEGY_REGISTRY[strategy_name]
+    if method != 'grid':
+        # 固定种子：同样的设置每次搜出来的结果一样，缓存才有意义
+        return optimizer.search(strategy_class, grid, method=method, budget=budget, seed=0)
+    if strategy_class is MovingAverageCrossStrategy:
+        return optimizer.optimize(grid['short_window'], grid['long_window'])
+    return optimizer.optimize_strategy(strategy_class, grid)
+
+
+@st.cache_data(ttl=900, max_entries=32, show_spinner=False)
+def run_portfolio(symbols, strategy_name, params, period, capital):
+    from core.portfolio import PortfolioBacktester
+    tester = PortfolioBacktester(initial_capital=capital, provider=get_provider())
+    return tester.run_portfolio_backtest(list(symbols), STRATEGY_REGISTRY[strategy_name], dict(params), period)
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def load_news(symbol, limit=10):
+    return get_news_provider().get_company_news(symbol, limit=limit)
@@ -1,21 +1,56 @@
 # ui/dashboard.py
 import streamlit as st
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import itertools
 import pandas as pd
 
-from data.yfinance_provider import YFinanceProvider
 from core.strategies.ma_cross import MovingAverageCrossStrategy
-from core.backtester import Backtester
-from core.scanner import MarketScanner # <--- 新增导入
-from core.optimizer import StrategyOptimizer # <--- 新增
+from core.backtester import to_percent
 from core.strategies.rsi import RsiStrategy   # <--- 新增
 from core.strategies.macd import MacdStrategy # <--- 新增
-from data.news_provider import NewsProvider # <--- 新增
 from core.strategies.supertrend import SuperTrendStrategy # <--- 新增
-from core.portfolio import PortfolioBacktester # <--- 新增
-from core.paper_account import PaperAccount # <--- 新增
+from ui import cache # 数据/回测/新闻缓存 (所有标签页、所有会话共享)
+from ui import downsample # 长图表降采样
+from core import instrumentation as inst # 各阶段耗时统计
+
+# 参数优化页可选的策略：参数名 -> (显示名, 默认开始, 默认结束, 默认步长)
+OPTIMIZER_SPACES = {
+    "双均线 (MA Cross)": (MovingAverageCrossStrategy, {
+        'short_window': ("短期均线范围 (Short)", 10, 50, 5),
+        'long_window': ("长期均线范围 (Long)", 100, 200, 10),
+    }),
+    "RSI (超买超卖)": (RsiStrategy, {
+        'period': ("RSI 周期", 7, 21, 7),
+        'buy_threshold': ("买入阈值", 20, 35, 5),
+        'sell_threshold': ("卖出阈值", 65, 80, 5),
+    }),
+    "MACD (趋势跟踪)": (MacdStrategy, {
+        'fast': ("快线 (Fast)", 8, 16, 2),
+        'slow': ("慢线 (Slow)", 20, 32, 3),
+        'signal': ("信号线 (Signal)", 7, 11, 2),
+    }),
+    "SuperTrend (超级趋势)": (SuperTrendStrategy, {
+        'period': ("ATR 周期", 7, 14, 1),
+        'multiplier': ("倍数 (Multiplier)", 2.0, 4.0, 0.5),
+    }),
+}
+
+# 参数优化页的搜索方式：显示名 -> StrategyOptimizer.search 的 method ('grid' 表示暴力搜索)
+SEARCH_METHODS = {
+    "网格 (全部组合)": 'grid',
+    "TPE (基于模型)": 'tpe',
+    "逐轮淘汰 (Successive Halving)": 'halving',
+    "随机搜索 (Random)": 'random',
+}
+
+
+def param_values(start, end, step):
+    """生成包含 end 的取值列表 (整数用 range，小数按步长累加)"""
+    if all(float(v).is_integer() for v in (start, end, step)):
+        # range(start, end + 1, step) 确保包含 end
+        return list(range(int(start), int(end) + 1, int(step)))
+    n = int(round((end - start) / step)) + 1
+    return [round(start + i * step, 6) for i in range(max(n, 0))]
+
 
 def render_dashboard():
     st.title("🎄 Stock Intelligence System")
@@ -82,61 +117,88 @@ def render_dashboard():
             run_backtest = st.button("🚀 开始回测", type="primary")
 
         # 4. 运行逻辑
+        # 点过一次回测后记住状态，之后拖动显示区间等控件引起的刷新直接用缓存结果重画
         if run_backtest:
+            st.session_state['bt_active'] = True
+
+        if st.session_state.get('bt_active'):
             with st.spinner(f"正在使用 {strategy_type} 分析 {symbol} ..."):
-                provider = YFinanceProvider()
-                df = provider.get_price_history(symbol, period)
+                # 同样的 (股票, 周期, 策略, 参数) 直接用缓存结果，拖动别的控件不会重新下载和回测
+                strategy_name, strategy_params = cache.strategy_key(strategy)
+                results = cache.run_backtest(symbol, period, strategy_name, strategy_params, initial_capital)
                 
-                if not df.empty and strategy:
-                    # 运行多态策略 (不管选的是谁，都有 generate_signals 方法)
-                    signals_df = strategy.generate_signals(df)
-                    
-                    backtester = Backtester(initial_capital)
-                    results = backtester.run_backtest(signals_df)
-                    
-                    # --- 下面的绘图代码基本不用变，或者稍微适配一下指标线 ---
-                    metrics = results['metrics']
-                    data = results['data']
-                    
-                    m1, m2, m3, m4 = st.columns(4)
-                    m1.metric("最终资产", metrics['Final Value'])
-                    m2.metric("总收益率", metrics['Total Return'])
-                    m3.metric("最大回撤", metrics['Max Drawdown'])
-                    m4.metric("胜率", metrics['Win Rate (Daily)'])
-                    
-                    # 绘图区
-                    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3])
-                    fig.add_trace(go.Candlestick(x=data.index, open=data['Open'], high=data['High'], low=data['Low'], close=data['Close'], name='K线'), row=1, col=1)
-                    
-                    # 动态画指标线
-                    if strategy_type == "双均线 (MA Cross)":
-                        fig.add_trace(go.Scatter(x=data.index, y=data['SMA_Short'], line=dict(color='orange'), name='Short'), row=1, col=1)
-                        fig.add_trace(go.Scatter(x=data.index, y=data['SMA_Long'], line=dict(color='blue'), name='Long'), row=1, col=1)
-                    elif strategy_type == "RSI (超买超卖)":
-                        # RSI 可以在下面画个小图，或者直接不管，只看买卖点。这里简单处理，只画买卖点。
-                        pass 
-                    elif strategy_type == "SuperTrend (超级趋势)":
-                    # 根据方向变色：涨势用绿线，跌势用红线
-                    # 这里我们简单画一条线，Plotly 会自动连起来，或者我们可以分段画
-                    # 简单画法：直接画一条线，颜色固定，或者用 marker
-                        fig.add_trace(go.Scatter(
-                            x=data.index, 
-                            y=data['SuperTrend'], 
-                            line=dict(color='purple', width=2, dash='dash'), 
-                            name='SuperTrend Line'
-                        ), row=1, col=1)
-                    
-                    # 画买卖点 (所有策略通用)
-                    buys = data[data['Position'] == 1]
-                    sells = data[data['Position'] == -1]
-                    fig.add_trace(go.Scatter(x=buys.index, y=buys['Close'], mode='markers', marker=dict(color='green', size=12, symbol='triangle-up'), name='Buy'), row=1, col=1)
-                    fig.add_trace(go.Scatter(x=sells.index, y=sells['Close'], mode='markers', marker=dict(color='red', size=12, symbol='triangle-down'), name='Sell'), row=1, col=1)
-                    
-                    # 资金曲线
-                    fig.add_trace(go.Scatter(x=data.index, y=data['Equity_Curve'], fill='tozeroy', line=dict(color='green'), name='净值'), row=2, col=1)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.error("无法获取数据")
+            if results is not None:
+                # --- 下面的绘图代码基本不用变，或者稍微适配一下指标线 ---
+                metrics = results['metrics']
+                data = results['data']
+                
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("最终资产", metrics['Final Value'])
+                m2.metric("总收益率", metrics['Total Return'])
+                m3.metric("最大回撤", metrics['Max Drawdown'])
+                m4.metric("胜率", metrics['Win Rate (Daily)'])
+                
+                # 显示区间：只把看得见的部分发给浏览器，超出点数预算就降采样
+                first_day, last_day = data.index[0].date(), data.index[-1].date()
+                view_start, view_end = st.slider("显示区间", min_value=first_day, max_value=last_day,
+                                                 value=(first_day, last_day), key=f"bt_view_{symbol}_{period}")
+                view = downsample.visible_window(data, view_start, view_end)
+                candles = downsample.aggregate_ohlc(view)
+                merge_k = downsample.bars_per_candle(len(view))
+                if merge_k > 1:
+                    st.caption(f"📉 区间内共 {len(view)} 根K线，每根蜡烛合并 {merge_k} 根显示 (买卖点按原始日期标注)")
+                
+                # 绘图区 (plotly 导入较慢，真正要画图时才加载)
+                import plotly.graph_objects as go
+                from plotly.subplots import make_subplots
+                fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3])
+                fig.add_trace(go.Candlestick(x=candles.index, open=candles['Open'], high=candles['High'], low=candles['Low'], close=candles['Close'], name='K线'), row=1, col=1)
+                
+                # 动态画指标线 (折线用 LTTB 降采样)
+                if strategy_type == "双均线 (MA Cross)":
+                    sma_short = downsample.lttb(view['SMA_Short'])
+                    sma_long = downsample.lttb(view['SMA_Long'])
+                    fig.add_trace(go.Scatter(x=sma_short.index, y=sma_short, line=dict(color='orange'), name='Short'), row=1, col=1)
+                    fig.add_trace(go.Scatter(x=sma_long.index, y=sma_long, line=dict(color='blue'), name='Long'), row=1, col=1)
+                elif strategy_type == "RSI (超买超卖)":
+                    # RSI 可以在下面画个小图，或者直接不管，只看买卖点。这里简单处理，只画买卖点。
+                    pass 
+                elif strategy_type == "SuperTrend (超级趋势)":
+                # 根据方向变色：涨势用绿线，跌势用红线
+                # 这里我们简单画一条线，Plotly 会自动连起来，或者我们可以分段画
+                # 简单画法：直接画一条线，颜色固定，或者用 marker
+                    st_line = downsample.lttb(view['SuperTrend'])
+                    fig.add_trace(go.Scatter(
+                        x=st_line.index, 
+                        y=st_line, 
+                        line=dict(color='purple', width=2, dash='dash'), 
+                        name='SuperTrend Line'
+                    ), row=1, col=1)
+                
+                # 画买卖点 (所有策略通用，不降采样)
+                buys = view[view['Position'] == 1]
+                sells = view[view['Position'] == -1]
+                fig.add_trace(go.Scatter(x=buys.index, y=buys['Close'], mode='markers', marker=dict(color='green', size=12, symbol='triangle-up'), name='Buy'), row=1, col=1)
+                fig.add_trace(go.Scatter(x=sells.index, y=sells['Close'], mode='markers', marker=dict(color='red', size=12, symbol='triangle-down'), name='Sell'), row=1, col=1)
+                
+                # 资金曲线
+                equity = downsample.lttb(view['Equity_Curve'])
+                fig.add_trace(go.Scatter(x=equity.index, y=equity, fill='tozeroy', line=dict(color='green'), name='净值'), row=2, col=1)
+                st.plotly_chart(fig, use_container_width=True)
+
+                # 稳健性检验：把每日收益重采样几千次，看这条资金曲线是不是运气
+                with st.expander("🎲 稳健性检验 (Monte Carlo)"):
+                    n_samples = st.select_slider("重采样次数", options=[1000, 5000, 10000], value=10000, key="mc_samples")
+                    if st.button("运行检验", key="mc_run"):
+                        mc = cache.run_robustness(symbol, period, strategy_name, strategy_params,
+                                                  initial_capital, n_samples)
+                        st.metric("亏损概率 (块自助法)", f"{mc['prob_loss']:.1%}")
+                        st.markdown("**块自助法 (Block Bootstrap)**")
+                        st.dataframe(mc['bootstrap'], use_container_width=True)
+                        st.markdown("**交易乱序 (Trade Shuffle)** — 总收益不变，看回撤的分布")
+                        st.dataframe(mc['trade_shuffle'], use_container_width=True)
+            else:
+                st.error("无法获取数据")
 
     # ==========================
     # TAB 2: 市场扫描 (UI 优化版)
@@ -161,17 +223,31 @@ def render_dashboard():
             symbols_list = [s.strip().upper() for s in scan_tickers.split(',') if s.strip()]
             # -------------------------------
             
-            # 1. 实例化扫描器
-            scanner = MarketScanner()
+            # 1. 实例化扫描器 (点了扫描才加载扫描器和形态引擎)
+            from core.scanner import MarketScanner
+            scanner = MarketScanner(provider=cache.get_provider())
             
             # 2. 实例化一个默认策略用于扫描 (例如：标准双均线 50/200)
             # 你也可以换成 RsiStrategy() 或 SuperTrendStrategy()
             scan_strategy = MovingAverageCrossStrategy(short_window=50, long_window=200)
             
             # 3. 传入策略对象和股票列表 (修复报错：现在需要两个参数)
-            with st.spinner(f"正在扫描 {len(symbols_list)} 只股票 (策略: MA 50/200)..."):
-                scan_results = scanner.scan_market(scan_strategy, symbols_list)
-                
+            # 扫描器本身不依赖 Streamlit，进度和逐行结果通过回调推给界面
+            st.caption(f"正在扫描 {len(symbols_list)} 只股票 (策略: MA 50/200)...")
+            progress_bar = st.progress(0)
+            live_table = st.empty()
+            live_rows = []
+
+            def on_scan_progress(done, total, row):
+                progress_bar.progress(done / total)
+                if row is not None:
+                    live_rows.append(row)
+                    live_table.dataframe(pd.DataFrame(live_rows), use_container_width=True)
+
+            scan_results = scanner.scan_market(scan_strategy, symbols_list, progress_callback=on_scan_progress)
+            progress_bar.empty()
+            live_table.empty()
+
             if not scan_results.empty:
                 # ==========================
                 # 🔍 过滤器逻辑 (Day 11)
@@ -266,75 +342,100 @@ def render_dashboard():
     # ==========================
     with tab3:
         st.subheader("🧪 寻找最优策略参数")
-        st.write("暴力测试不同的均线组合，寻找该股票的历史最佳参数。")
+        st.write("暴力测试不同的参数组合，寻找该股票的历史最佳参数。")
         
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
             opt_symbol = st.text_input("股票代码", value="AAPL", key="opt_symbol").upper()
             
         with col2:
             opt_period = st.selectbox("数据周期", ["2y", "5y", "10y"], index=1, key="opt_period")
 
+        with col3:
+            opt_strategy_name = st.selectbox("优化策略", list(OPTIMIZER_SPACES), key="opt_strategy")
+
         st.divider()
         
-        # 参数范围选择
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("**短期均线范围 (Short)**")
-            s_start = st.number_input("开始", 10, 50, 10)
-            s_end = st.number_input("结束", 20, 100, 50)
-            s_step = st.number_input("步长", 1, 10, 5) # 步长越大跑得越快，越不精细
-        
-        with c2:
-            st.markdown("**长期均线范围 (Long)**")
-            l_start = st.number_input("开始", 50, 100, 100)
-            l_end = st.number_input("结束", 100, 300, 200)
-            l_step = st.number_input("步长", 1, 20, 10)
+        # 参数范围选择 (每个参数一列：开始 / 结束 / 步长)
+        opt_strategy_cls, opt_space = OPTIMIZER_SPACES[opt_strategy_name]
+        param_grid = {}
+        param_cols = st.columns(len(opt_space))
+        for p_col, (p_name, (p_label, p_start, p_end, p_step)) in zip(param_cols, opt_space.items()):
+            with p_col:
+                st.markdown(f"**{p_label}**")
+                start_v = st.number_input("开始", value=p_start, step=p_step, key=f"opt_{opt_strategy_name}_{p_name}_start")
+                end_v = st.number_input("结束", value=p_end, step=p_step, key=f"opt_{opt_strategy_name}_{p_name}_end")
+                step_v = st.number_input("步长", value=p_step, step=p_step, min_value=p_step, key=f"opt_{opt_strategy_name}_{p_name}_step") # 步长越大跑得越快，越不精细
+                param_grid[p_name] = param_values(start_v, end_v, step_v)
+
+        # 搜索方式：网格太大时用自适应搜索，只回测预算内的次数
+        s_col1, s_col2 = st.columns(2)
+        with s_col1:
+            search_label = st.selectbox("搜索方式", list(SEARCH_METHODS), key="opt_search")
+        search_method = SEARCH_METHODS[search_label]
+        with s_col2:
+            search_budget = st.number_input("回测次数预算", min_value=10, value=60, step=10, key="opt_budget",
+                                            disabled=search_method == 'grid')
 
         if st.button("🧪 开始挖掘", type="primary"):
-            provider = YFinanceProvider()
-            df = provider.get_price_history(opt_symbol, opt_period)
+            total_combos = len(list(itertools.product(*param_grid.values())))
+            if search_method == 'grid':
+                st.info(f"即将进行 {total_combos} 次回测模拟，请稍候...")
+            else:
+                st.info(f"网格共 {total_combos} 种组合，{search_label} 最多回测 {search_budget} 次...")
+            
+            # 运行：双均线走向量化引擎，其他策略走多进程网格搜索 (同样的网格直接用缓存结果)
+            with st.spinner("正在疯狂计算中..."):
+                grid_key = tuple((name, tuple(values)) for name, values in param_grid.items())
+                res_df = cache.run_optimizer(opt_symbol, opt_period, opt_strategy_cls.__name__, grid_key,
+                                             search_method, None if search_method == 'grid' else int(search_budget))
             
-            if df.empty:
+            if res_df is None:
                 st.error("无法获取数据")
             else:
-                optimizer = StrategyOptimizer(df)
-                
-                # 创建 range 对象
-                # range(start, end + 1, step) 确保包含 end
-                s_range = range(s_start, s_end + 1, s_step)
-                l_range = range(l_start, l_end + 1, l_step)
-                
-                total_combos = len(list(itertools.product(s_range, l_range)))
-                st.info(f"即将进行 {total_combos} 次回测模拟，请稍候...")
-                
-                # 运行
-                with st.spinner("正在疯狂计算中..."):
-                    res_df = optimizer.optimize(s_range, l_range)
-                
-                # 显示结果
-                st.success("优化完成！已按收益率从高到低排序：")
+                if res_df.empty:
+                    st.warning("没有有效的参数组合，请检查参数范围。")
+                else:
+                    # 显示结果
+                    st.success("优化完成！已按收益率从高到低排序：")
                 
-                # 冠军参数
-                best = res_df.iloc[0]
-                st.metric("🏆 最佳回报组合", f"Short {int(best['Short'])} / Long {int(best['Long'])}", f"{best['Return (%)']:.2f}%")
+                    # 冠军参数
+                    best = res_df.iloc[0]
+                    param_names = [c for c in res_df.columns if c not in ('Return (%)', 'Drawdown (%)', 'Win Rate')]
+                    best_label = " / ".join(f"{name} {best[name]:g}" for name in param_names)
+                    st.metric("🏆 最佳回报组合", best_label, f"{best['Return (%)']:.2f}%")
                 
-                # 详细表格
-                st.dataframe(res_df.style.background_gradient(subset=['Return (%)'], cmap='RdYlGn'), width="stretch")
+                    # 详细表格
+                    st.dataframe(res_df.style.background_gradient(subset=['Return (%)'], cmap='RdYlGn'), width="stretch")
                 
-                # 散点图可视化 (可选)
-                import plotly.express as px
+                    # 散点图可视化 (可选，取前两个参数作为坐标轴)
+                    import plotly.express as px
                 
-                # 修复：计算绝对值用来控制气泡大小 (防止因负收益报错)
-                res_df['Size'] = res_df['Return (%)'].abs()
+                    # 修复：计算绝对值用来控制气泡大小 (防止因负收益报错)
+                    res_df['Size'] = res_df['Return (%)'].abs()
                 
-                fig = px.scatter(res_df, x='Short', y='Long', 
-                                 size='Size',           # 大小用绝对值
-                                 color='Return (%)',    # 颜色看真本事 (红亏绿赚)
-                                 hover_data=['Return (%)', 'Win Rate'], # 鼠标放上去显示真实数据
-                                 title="参数热力分布 (颜色越绿越赚)", 
-                                 color_continuous_scale='RdYlGn')
-                st.plotly_chart(fig)  
+                    fig = px.scatter(res_df, x=param_names[0], y=param_names[1 if len(param_names) > 1 else 0],
+                                     size='Size',           # 大小用绝对值
+                                     color='Return (%)',    # 颜色看真本事 (红亏绿赚)
+                                     hover_data=['Return (%)', 'Win Rate'], # 鼠标放上去显示真实数据
+                                     title="参数热力分布 (颜色越绿越赚)", 
+                                     color_continuous_scale='RdYlGn')
+                    st.plotly_chart(fig)  
+
+        # 历史扫参：直接从结果库读，不用重新回测
+        with st.expander("📚 历史扫参 (Past Sweeps)"):
+            store = cache.get_result_store()
+            only_symbol = st.checkbox(f"只看 {opt_symbol} {opt_period}", value=True, key="opt_history_filter")
+            sweeps = store.list_sweeps(label=f"{opt_symbol} {opt_period}" if only_symbol else None)
+            if sweeps.empty:
+                st.caption("还没有扫参记录")
+            else:
+                st.dataframe(sweeps, use_container_width=True, hide_index=True)
+                sweep_labels = {row.id: f"#{row.id} {row.label} {row.strategy} ({row.method})"
+                                for row in sweeps.itertuples()}
+                sweep_id = st.selectbox("查看结果", list(sweep_labels), format_func=sweep_labels.get,
+                                        key="opt_history_id")
+                st.dataframe(store.load_sweep(int(sweep_id)), use_container_width=True)
 
     # ==========================
     # TAB 4: 情报中心 (Day 8 重制版)
@@ -350,10 +451,13 @@ def render_dashboard():
             
         st.divider()
 
-        if search_btn or news_symbol:
-            news_provider = NewsProvider()
+        # 点过一次搜集后才拉新闻 (打开页面不联网，也不加载 feedparser / textblob)
+        if search_btn:
+            st.session_state['news_active'] = True
+
+        if st.session_state.get('news_active'):
             with st.spinner(f"正在从全网搜集关于 {news_symbol} 的线索..."):
-                news_list = news_provider.get_company_news(news_symbol, limit=10)
+                news_list = cache.load_news(news_symbol, limit=10)
             
             if news_list:
                 # --- Day 12: 计算整体情绪平均分 ---
@@ -435,10 +539,9 @@ def render_dashboard():
         if st.button("🔥 运行组合压力测试", type="primary"):
             symbols_list = [s.strip().upper() for s in pf_symbols.split(',') if s.strip()]
             
-            pf_tester = PortfolioBacktester(initial_capital=pf_capital)
-            
             with st.spinner(f"正在同时交易 {len(symbols_list)} 只股票..."):
-                results = pf_tester.run_portfolio_backtest(symbols_list, strategy_cls, params, pf_period)
+                results = cache.run_portfolio(tuple(symbols_list), strategy_cls.__name__,
+                                              tuple(params.items()), pf_period, pf_capital)
             
             total_equity = results['total_equity']
             if total_equity is not None:
@@ -453,8 +556,10 @@ def render_dashboard():
                 
                 # 2. 绘制总资产曲线
                 st.markdown("### 📈 组合总资产曲线")
+                import plotly.graph_objects as go
                 fig = go.Figure()
-                fig.add_trace(go.Scatter(x=total_equity.index, y=total_equity, fill='tozeroy', line=dict(color='gold'), name='Total Portfolio'))
+                equity_line = downsample.lttb(total_equity)
+                fig.add_trace(go.Scatter(x=equity_line.index, y=equity_line, fill='tozeroy', line=dict(color='gold'), name='Total Portfolio'))
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # 3. 各股表现对比
@@ -464,7 +569,7 @@ def render_dashboard():
                 for sym, data in details.items():
                     metrics = data['metrics']
                     # 提取数值
-                    ret_val = float(metrics['Total Return'].strip('%'))
+                    ret_val = to_percent(data['values']['total_return'])
                     rows.append({
                         'Symbol': sym,
                         'Return (%)': ret_val,
@@ -484,19 +589,26 @@ def render_dashboard():
     with tab6:
         st.subheader("💰 实盘模拟账户 (Paper Trading)")
         
-        account = PaperAccount()
+        account = cache.get_paper_account()
         
         # --- 1. 账户概览 ---
         balance = account.get_balance()
         positions = account.get_positions()
         
-        # 计算总市值 (需要获取当前股价，这里简化处理，只显示成本价值，或者你可以调用 yfinance 获取现价)
-        # 为了不卡顿，我们暂时只显示 cash
+        # 按最新价估值 (报价缓存 60 秒，所有持仓合并成一次批量请求，不会每次刷新都卡住)
+        # 点过 "刷新行情" 才取报价，之前按成本价估值，打开页面不联网
+        if st.button("🔄 刷新行情", key="paper_quotes"):
+            st.session_state['paper_live'] = True
+        live_quotes = st.session_state.get('paper_live', False)
+        valuation = account.mark_to_market(live=live_quotes)
+        if positions and not live_quotes:
+            st.caption("当前按成本价估值，点 \"刷新行情\" 获取最新价")
         
         col1, col2, col3 = st.columns(3)
         col1.metric("💵 可用现金 (Cash)", f"${balance:,.2f}")
         col2.metric("📦 持仓股票数", len(positions))
-        # col3 可以放总盈亏 (需要实时价格，留作后续优化)
+        col3.metric("💼 总资产 (Equity)", f"${valuation['equity']:,.2f}",
+                    delta=f"{valuation['unrealized_pnl']:+,.2f} 浮动盈亏")
         
         st.divider()
         
@@ -522,12 +634,14 @@ def render_dashboard():
         st.subheader("📊 当前持仓")
         if positions:
             pos_data = []
-            for sym, data in positions.items():
+            for row in valuation['positions']:
                 pos_data.append({
-                    "Symbol": sym,
-                    "Quantity": data['qty'],
-                    "Avg Cost": f"${data['avg_price']:.2f}",
-                    "Total Cost": f"${data['qty'] * data['avg_price']:.2f}"
+                    "Symbol": row['symbol'],
+                    "Quantity": row['qty'],
+                    "Avg Cost": f"${row['avg_price']:.2f}",
+                    "Last Price": f"${row['price']:.2f}" + (" (成本价)" if row['stale'] else ""),
+                    "Market Value": f"${row['market_value']:,.2f}",
+                    "P&L": f"${row['pnl']:+,.2f} ({row['pnl_pct']:+.2%})"
                 })
             st.dataframe(pd.DataFrame(pos_data), use_container_width=True)
         else:
@@ -535,6 +649,44 @@ def render_dashboard():
             
         # --- 4. 交易历史 ---
         with st.expander("📜 交易流水 (History)"):
-            history = account.data.get('history', [])
+            history = account.get_history()
             if history:
-                st.dataframe(pd.DataFrame(history), use_container_width=True)                                       
\ No newline at end of file
+                st.dataframe(pd.DataFrame(history), use_container_width=True)
+
+    # 最后画诊断面板，这样能看到本次刷新里各阶段的耗时
+    render_diagnostics()                                       
+
+
+def render_diagnostics():
+    """侧边栏的诊断面板：各阶段耗时 (fetch / 基本面 / 形态 / 信号 / 回测) 和计数器"""
+    with st.sidebar.expander("🩺 性能诊断 (Diagnostics)"):
+        enabled = st.toggle("开启耗时统计", value=inst.is_enabled())
+        inst.enable(enabled)
+        if not enabled:
+            st.caption("关闭时不记录任何数据")
+            return
+
+        snap = inst.snapshot()
+        if not snap['spans'] and not snap['counters']:
+            st.caption("还没有数据，先跑一次扫描或回测")
+            return
+
+        if snap['spans']:
+            st.dataframe(pd.DataFrame([{
+                "Stage": s['name'] + (f" {s['labels']}" if s['labels'] else ""),
+                "Calls": s['count'],
+                "Total (s)": round(s['total_s'], 3),
+                "Mean (ms)": round(s['mean_s'] * 1000, 1),
+                "Max (ms)": round(s['max_s'] * 1000, 1),
+            } for s in snap['spans']]), use_container_width=True, hide_index=True)
+        if snap['counters']:
+            st.dataframe(pd.DataFrame([{
+                "Counter": c['name'] + (f" {c['labels']}" if c['labels'] else ""),
+                "Value": c['value'],
+            } for c in snap['counters']]), use_container_width=True, hide_index=True)
+
+        st.download_button("⬇️ Prometheus", inst.to_prometheus(), file_name="metrics.prom")
+        st.download_button("⬇️ JSON Lines", inst.to_json_lines(), file_name="spans.jsonl")
+        if st.button("🧹 清空统计"):
+            inst.reset()
+            st.rerun()
@@ -0,0 +1,92 @@
+# ui/downsample.py
+"""
+图表降采样 (在服务端做，浏览器只收到 "点数预算" 以内的数据)
+
+折线 (均线、SuperTrend、资金曲线) : LTTB (Largest-Triangle-Three-Buckets)，保留形状上的拐点
+K 线                              : 每 k 根合并成一根 (开=第一根开, 高=最高, 低=最低, 收=最后一根收)
+买卖点                            : 不降采样，原样画出
+"""
+import math
+import numpy as np
+import pandas as pd
+
+# 单条序列最多发给浏览器的点数
+DEFAULT_POINT_BUDGET = 1500
+
+
+def _x_values(index) -> np.ndarray:
+    """LTTB 需要数值型的横轴：日期用纳秒时间戳，其他用位置"""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    return np.arange(len(index), dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    LTTB 选点
+    :return: 被保留的点的下标 (升序，首尾一定保留)
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # 除首尾外分成 threshold - 2 个桶，每个桶选一个点：
+    # 和 上一个选中的点、下一个桶的平均点 组成的三角形面积最大的那个
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int(math.floor((i + 1) * every)) + 1
+        avg_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    selected[-1] = n - 1
+    return selected
+
+
+def lttb(series: pd.Series, budget=DEFAULT_POINT_BUDGET) -> pd.Series:
+    """折线降采样到 budget 个点以内 (NaN 先去掉，不参与选点)"""
+    series = series.dropna()
+    if len(series) <= budget:
+        return series
+    keep = lttb_indices(_x_values(series.index), series.to_numpy(dtype=np.float64), budget)
+    return series.iloc[keep]
+
+
+def bars_per_candle(n_bars: int, budget=DEFAULT_POINT_BUDGET) -> int:
+    """可见区间有 n_bars 根 K 线时，每根显示的蜡烛要合并几根原始 K 线"""
+    return max(1, math.ceil(n_bars / budget))
+
+
+def aggregate_ohlc(df: pd.DataFrame, budget=DEFAULT_POINT_BUDGET) -> pd.DataFrame:
+    """
+    K 线聚合：每 k 根合并成一根，k 由点数预算决定
+    日期用每组第一根 K 线的日期
+    """
+    k = bars_per_candle(len(df), budget)
+    if k == 1:
+        return df[['Open', 'High', 'Low', 'Close']]
+
+    groups = np.arange(len(df)) // k
+    grouped = df[['Open', 'High', 'Low', 'Close']].groupby(groups)
+    out = grouped.agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'})
+    out.index = df.index[::k]
+    return out
+
+
+def visible_window(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """按界面上选的显示区间截取数据 (start/end 可以是 date 或字符串，None 表示不限)"""
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        # end 是日期时包含当天全部 K 线 (分钟线)
+        df = df[df.index < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    return df